@@ -1,7 +1,10 @@
-from .league import League
+from .league import League, LeagueRegistry
 from .state import State
-from .base_api import BaseApi
+from .base_api import BaseApi, DeadlineExceeded, SleeperUnavailable, UNCHANGED
 from .user import User
 from .drafts import Drafts
 from .stats import Stats
-from .players import Players
\ No newline at end of file
+from .players import Players
+from .models import LeagueUser, Roster, Matchup, Transaction, LeagueIndex
+from .rate_limit import TokenBucket
+from .scoring import ScoringRules
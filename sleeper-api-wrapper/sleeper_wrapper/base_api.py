@@ -1,15 +1,390 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
 import requests
-import json
 
+from .rate_limit import TokenBucket, PRIORITY_REPORT, PRIORITY_BACKFILL
 
-class BaseApi():
-	def _call(self, url):
-		result_json_string = requests.get(url);
+TIMEOUT = 10
+
+_session = requests.Session()
+
+
+class CircuitBreaker():
+	"""Opens after `threshold` consecutive failures. While open, one trial call is let through every `backoff`
+	seconds; the backoff doubles on each failed trial up to `max_backoff`."""
+
+	def __init__(self, threshold=3, base_backoff=5, max_backoff=300):
+		self.threshold = threshold
+		self.base_backoff = base_backoff
+		self.max_backoff = max_backoff
+		self.failures = 0
+		self.backoff = base_backoff
+		self.opened_at = None
+		self._lock = threading.Lock()
+
+	def is_open(self):
+		return self.opened_at is not None
+
+	def allow(self):
+		"""returns True if a call should go upstream"""
+		with self._lock:
+			if self.opened_at is None:
+				return True
+			if time.time() - self.opened_at >= self.backoff:
+				# half open: let this call through and hold everyone else back until it reports in
+				self.opened_at = time.time()
+				return True
+			return False
+
+	def record_success(self):
+		with self._lock:
+			self.failures = 0
+			self.backoff = self.base_backoff
+			self.opened_at = None
+
+	def record_failure(self):
+		with self._lock:
+			self.failures += 1
+			if self.opened_at is not None:
+				self.backoff = min(self.backoff * 2, self.max_backoff)
+			if self.failures >= self.threshold:
+				self.opened_at = time.time()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+# url -> (digest, last good payload), so an outage or an unchanged response can be answered from memory
+_last_good = OrderedDict()
+_last_good_lock = threading.Lock()
+LAST_GOOD_SIZE = 256
+# payloads too big to keep a second copy of; callers are expected to keep their own
+UNREMEMBERED_FAMILIES = ("players/nfl", "stats/nfl/regular/*", "projections/nfl/regular/*", "stats/nfl/regular/*/*",
+                         "projections/nfl/regular/*/*")
+
+# url -> (etag, last_modified, digest) of the newest response
+_validators = OrderedDict()
+# (caller, url) -> digest of the response the caller was last given, for if_changed
+_seen = OrderedDict()
+_validators_lock = threading.Lock()
+VALIDATORS_SIZE = 4096
+
+_refreshing = set()
+_local = threading.local()
+_call_listeners = []
+_thread_state_carriers = []
+_rate_limiter = TokenBucket()
+_response_store = None
+
+
+def add_call_listener(listener):
+	"""listener(url, status, nbytes, duration, stale) is called after every BaseApi call, e.g. for tracing"""
+	_call_listeners.append(listener)
+
+
+def add_thread_state_carrier(carrier):
+	"""carrier(func) is called on a thread handing func to another thread, e.g. a pool, and returns func wrapped
+	to carry more of its thread state along, e.g. the current trace"""
+	_thread_state_carriers.append(carrier)
+
+
+def bind_thread_state(func):
+	"""returns func wrapped to run with this thread's deadline and priority, wherever it runs. Thread pools do not
+	inherit them, so every callable handed to one should be bound first."""
+	deadline = getattr(_local, "deadline", None)
+	priority = getattr(_local, "priority", PRIORITY_REPORT)
+
+	def bound(*args, **kwargs):
+		previous = (getattr(_local, "deadline", None), getattr(_local, "priority", PRIORITY_REPORT))
+		_local.deadline, _local.priority = deadline, priority
 		try:
-			result_json_string.raise_for_status()
-		except requests.exceptions.HTTPError as e:
-			return []
-			#return SleeperWrapperException("Empty value returned")
+			return func(*args, **kwargs)
+		finally:
+			_local.deadline, _local.priority = previous
+	for carrier in _thread_state_carriers:
+		bound = carrier(bound)
+	return bound
+
+
+def _notify(url, status, nbytes, duration, stale):
+	for listener in _call_listeners:
+		listener(url, status, nbytes, duration, stale)
+
+
+class _Unchanged():
+	"""falsy, so a caller that forgets to check for it treats it as nothing new"""
+	def __bool__(self):
+		return False
+
+	def __repr__(self):
+		return "UNCHANGED"
+
+
+# returned instead of a payload to callers passing if_changed when they were already given this response
+UNCHANGED = _Unchanged()
+
+
+class DeadlineExceeded(Exception):
+	"""raised by BaseApi calls made after the calling thread's deadline has passed"""
+	pass
+
+
+class SleeperUnavailable(Exception):
+	"""raised by BaseApi calls when Sleeper is down or erroring and there is no earlier response to answer with"""
+	pass
+
+
+def set_deadline(deadline):
+	"""deadline: time.time() after which calls on this thread raise DeadlineExceeded, or None for no deadline"""
+	_local.deadline = deadline
+
+
+def set_priority(priority):
+	"""priority: rate_limit.PRIORITY_* class of the calls made on this thread"""
+	_local.priority = priority
+
+
+def set_rate_limiter(limiter):
+	"""limiter: TokenBucket every call takes a token from, e.g. one shared between processes, or None for no limit"""
+	global _rate_limiter
+	_rate_limiter = limiter
+
+
+def get_rate_limiter():
+	return _rate_limiter
+
+
+def set_response_store(store):
+	"""store: consulted before every call, or None. store.get(url) returns a payload to answer with instead of
+	calling Sleeper, or None; store.put(url, payload) is given every fresh response, e.g. to publish it to other
+	processes"""
+	global _response_store
+	_response_store = store
+
+
+def _timeout():
+	deadline = getattr(_local, "deadline", None)
+	if deadline is None:
+		return TIMEOUT
+	remaining = deadline - time.time()
+	if remaining <= 0:
+		raise DeadlineExceeded()
+	return min(TIMEOUT, remaining)
+
+
+def _wait_for_token(priority):
+	"""waits for a rate limit token, but never past the thread's deadline"""
+	limiter = _rate_limiter
+	if limiter is None:
+		return
+	deadline = getattr(_local, "deadline", None)
+	timeout = None if deadline is None else max(0.0, deadline - time.time())
+	if not limiter.acquire(priority, timeout):
+		raise DeadlineExceeded()
+
+
+def endpoint_family(url):
+	"""groups urls that fail together, e.g. .../league/123/matchups/4 -> league/*/matchups/*"""
+	path = url.split("://", 1)[-1].split("?", 1)[0]
+	segments = path.split("/")[1:]
+	if segments and segments[0] == "v1":
+		segments = segments[1:]
+	return "/".join("*" if re.fullmatch(r"\d+", segment) else segment for segment in segments)
+
+
+def get_breaker(family):
+	with _breakers_lock:
+		if family not in _breakers:
+			_breakers[family] = CircuitBreaker()
+		return _breakers[family]
+
+
+def _lru_put(lru, key, value, size):
+	lru[key] = value
+	lru.move_to_end(key)
+	while len(lru) > size:
+		lru.popitem(last=False)
+
+
+def _remember(url, result, digest=None):
+	if endpoint_family(url) in UNREMEMBERED_FAMILIES:
+		return
+	with _last_good_lock:
+		_lru_put(_last_good, url, (digest, result), LAST_GOOD_SIZE)
+
+
+def _recall(url):
+	"""returns (digest, payload) of the last good response, or None"""
+	with _last_good_lock:
+		return _last_good.get(url)
+
+
+def _unconsumed():
+	"""(caller, url) -> digest of the responses this thread's callers were given but have not marked consumed"""
+	pending = getattr(_local, "unconsumed", None)
+	if pending is None:
+		pending = _local.unconsumed = {}
+	return pending
+
+
+def _condition(url, caller):
+	"""returns (validators, known): the validators to make the request conditional on, or None, and the payload to
+	answer with when the server reports no change, or None when the caller already has that response"""
+	with _validators_lock:
+		validators = _validators.get(url)
+		seen = _seen.get((caller, url)) if caller is not None else None
+	if validators is None:
+		return None, None
+	if seen is not None and seen == validators[2]:
+		return validators, None
+	last_good = _recall(url)
+	if last_good is not None and last_good[0] == validators[2]:
+		return validators, last_good[1]
+	return None, None
+
+
+class _Unavailable(Exception):
+	pass
+
+
+def _fetch(url, timeout=TIMEOUT, validators=None):
+	"""returns (parsed body, digest of the body), ([], None) for client errors, or raises _Unavailable when Sleeper is
+	down or erroring. validators: (etag, last_modified, digest) of a response already held; (UNCHANGED, digest) is
+	returned without parsing when the server answers 304 or sends the same bytes again"""
+	start = time.time()
+	status = None
+	nbytes = 0
+	headers = {}
+	if validators is not None:
+		if validators[0]:
+			headers["If-None-Match"] = validators[0]
+		if validators[1]:
+			headers["If-Modified-Since"] = validators[1]
+	try:
+		response = _session.get(url, timeout=timeout, headers=headers)
+		status = response.status_code
+		if status == 429 and _rate_limiter is not None:
+			_rate_limiter.drain()
+		nbytes = len(response.content)
+		if status == 304 and validators is not None:
+			return UNCHANGED, validators[2]
+		response.raise_for_status()
+		# servers without ETags still let us skip parsing a body we have already seen
+		digest = hashlib.blake2b(response.content, digest_size=16).digest()
+		with _validators_lock:
+			_lru_put(_validators, url, (response.headers.get("ETag"), response.headers.get("Last-Modified"), digest),
+					 VALIDATORS_SIZE)
+		if validators is not None and digest == validators[2]:
+			return UNCHANGED, digest
+		return response.json(), digest
+	except requests.exceptions.HTTPError as e:
+		if e.response is not None and e.response.status_code < 500 and e.response.status_code != 429:
+			return [], None
+		raise _Unavailable(e)
+	except (requests.exceptions.RequestException, ValueError) as e:
+		raise _Unavailable(e)
+	finally:
+		if _call_listeners:
+			_notify(url, status, nbytes, time.time() - start, False)
+
+
+def _refresh_in_background(url, breaker):
+	"""retries url with the breaker's backoff until it answers, then refreshes the last good response"""
+	with _breakers_lock:
+		if url in _refreshing:
+			return
+		_refreshing.add(url)
+
+	def refresh():
+		try:
+			while True:
+				time.sleep(breaker.backoff)
+				try:
+					_wait_for_token(PRIORITY_BACKFILL)
+					result, digest = _fetch(url)
+				except _Unavailable:
+					breaker.record_failure()
+					continue
+				breaker.record_success()
+				_remember(url, result, digest)
+				return
+		finally:
+			with _breakers_lock:
+				_refreshing.discard(url)
+
+	threading.Thread(target=refresh, daemon=True).start()
+
+
+class BaseApi():
+	def _call(self, url, if_changed=None):
+		"""if_changed: a name for the calling job. UNCHANGED is then returned instead of the payload when it is the
+		same response that caller last marked consumed (see mark_consumed), so it can skip its work."""
+		_timeout()  # raises DeadlineExceeded once the thread's deadline has passed
+		store = _response_store
+		if store is not None:
+			stored = store.get(url)
+			if stored is not None:
+				return stored
+
+		breaker = get_breaker(endpoint_family(url))
+		error = "circuit open"
+
+		if breaker.allow():
+			_wait_for_token(getattr(_local, "priority", PRIORITY_REPORT))
+			validators, known = _condition(url, if_changed)
+			try:
+				result, digest = _fetch(url, _timeout(), validators)
+			except _Unavailable as e:
+				breaker.record_failure()
+				error = e
+			else:
+				breaker.record_success()
+				if result is UNCHANGED:
+					if known is None:
+						return UNCHANGED
+					result = known
+				else:
+					_remember(url, result, digest)
+					if store is not None and result:
+						store.put(url, result)
+				if if_changed is not None and digest is not None:
+					# only seen once the caller is done with it; see mark_consumed
+					_unconsumed()[(if_changed, url)] = digest
+				return result
+
+		# Sleeper is failing: answer with the last good response right away and refresh it in the background
+		last_good = _recall(url)
+		if last_good is None:
+			raise SleeperUnavailable("{} is unavailable ({}) and there is no earlier response".format(url, error))
+		_local.stale = True
+		if _call_listeners:
+			_notify(url, None, 0, 0.0, True)
+		_refresh_in_background(url, breaker)
+		if if_changed is not None and last_good[0] is not None:
+			with _validators_lock:
+				if _seen.get((if_changed, url)) == last_good[0]:
+					return UNCHANGED
+		return last_good[1]
+
+	@staticmethod
+	def mark_consumed(caller):
+		"""records the responses this thread was given for caller as seen, once the caller's work on them succeeded.
+		Until then the caller is given them again, so a job that fails halfway retries with the same data."""
+		pending = _unconsumed()
+		consumed = [(key, digest) for key, digest in pending.items() if key[0] == caller]
+		with _validators_lock:
+			for key, digest in consumed:
+				_lru_put(_seen, key, digest, VALIDATORS_SIZE)
+		for key, _ in consumed:
+			pending.pop(key, None)
 
-		result = result_json_string.json()
-		return result;
\ No newline at end of file
+	@staticmethod
+	def pop_stale():
+		"""True if a call made on this thread since the last pop_stale was answered from the last good response"""
+		stale = getattr(_local, "stale", False)
+		_local.stale = False
+		return stale
@@ -1,26 +1,74 @@
-from .base_api import BaseApi
+import threading
+import time
+
+from .base_api import BaseApi, UNCHANGED
 from .stats import Stats
+from .models import LeagueUser, LeagueIndex, Matchup
+from .scoring import ScoringRules
+
+# roster slots that are not part of the starting lineup
+BENCH_SLOTS = ("BN", "IR", "TAXI")
 
 class League(BaseApi):
-	def __init__(self, league_id):
+	# seconds the lazily loaded parts of a league are kept before they are fetched again
+	MAX_AGES = {"league": 3600, "users": 3600, "rosters": 60}
+
+	def __init__(self, league_id, league=None, max_ages=None):
+		"""league: a previously fetched league payload to reuse. Nothing is fetched here: the league, its users and
+		its rosters are each loaded on first use and kept for max_ages seconds, by part (see MAX_AGES)."""
 		self.league_id = league_id
 		self._base_url = "https://api.sleeper.app/v1/league/{}".format(self.league_id)
-		self._league = self._call(self._base_url)
+		self.max_ages = dict(self.MAX_AGES, **(max_ages or {}))
+		# part -> (loaded at, payload)
+		self._parts = {}
+		self._rules = None
+		if league is not None:
+			self._parts["league"] = (time.time(), league)
+
+	def _load(self, part, url, if_changed=None):
+		"""returns the part from memory while it is fresh. A caller passing if_changed always asks Sleeper, so that
+		it hears about changes, and what it gets back is kept for everyone else."""
+		loaded = self._parts.get(part)
+		if if_changed is None and loaded is not None and time.time() - loaded[0] < self.max_ages[part]:
+			return loaded[1]
+		result = self._call(url, if_changed)
+		if result and result is not UNCHANGED:
+			self._parts[part] = (time.time(), result)
+		return result
+
+	def loaded(self, part):
+		"""returns the part ("league", "users", "rosters") held in memory however old it is, or None; never fetches"""
+		loaded = self._parts.get(part)
+		return loaded[1] if loaded is not None else None
+
+	def invalidate(self, *parts):
+		"""drops the given parts ("league", "users", "rosters"), or all of them, so they are fetched on next use"""
+		for part in parts or tuple(self.MAX_AGES):
+			self._parts.pop(part, None)
 
 	def get_league(self):
-		return self._league
+		return self._load("league", self._base_url)
 
 	def get_league_scoring_settings(self):
-		return self._league["scoring_settings"]
+		return self.get_league()["scoring_settings"]
 
-	def get_rosters(self):
-		return self._call("{}/{}".format(self._base_url,"rosters"))
+	def get_scoring_rules(self):
+		"""returns the league's ScoringRules, compiled once per load of the league"""
+		league = self.get_league()
+		rules = self._rules
+		if rules is None or rules[0] is not league:
+			rules = self._rules = (league, ScoringRules(league.get("scoring_settings")))
+		return rules[1]
 
-	def get_users(self):
-		return self._call("{}/{}".format(self._base_url,"users"))
+	def get_rosters(self, if_changed=None):
+		"""if_changed: see BaseApi._call; returns UNCHANGED if this caller already has the current rosters"""
+		return self._load("rosters", "{}/{}".format(self._base_url,"rosters"), if_changed)
 
-	def get_matchups(self, week):
-		return self._call("{}/{}/{}".format(self._base_url,"matchups", week))
+	def get_users(self, if_changed=None):
+		return self._load("users", "{}/{}".format(self._base_url,"users"), if_changed)
+
+	def get_matchups(self, week, if_changed=None):
+		return self._call("{}/{}/{}".format(self._base_url,"matchups", week), if_changed)
 
 	def get_playoff_winners_bracket(self):
 		return self._call("{}/{}".format(self._base_url,"winners_bracket"))
@@ -28,8 +76,8 @@ class League(BaseApi):
 	def get_playoff_losers_bracket(self):
 		return self._call("{}/{}".format(self._base_url,"losers_bracket"))
 
-	def get_transactions(self, week):
-		return self._call("{}/{}/{}".format(self._base_url,"transactions", week))
+	def get_transactions(self, week, if_changed=None):
+		return self._call("{}/{}/{}".format(self._base_url,"transactions", week), if_changed)
 
 	def get_traded_picks(self):
 		return self._call("{}/{}".format(self._base_url,"traded_picks"))
@@ -43,25 +91,31 @@ class League(BaseApi):
 
 		#Maps the user_id to team name for easy lookup
 		for user in users:
-			try:
-				users_dict[user["user_id"]] = user["metadata"]["team_name"]
-			except:
-				users_dict[user["user_id"]] = user["display_name"]
+			league_user = LeagueUser.from_json(user)
+			users_dict[league_user.user_id] = league_user.team_name
 		return users_dict
 
-	def get_standings(self, rosters, users):
-		users_dict = self.map_users_to_team_name(users)
+	def get_index(self, rosters=None, users=None):
+		"""returns a LeagueIndex, fetching the rosters and users that were not passed in"""
+		if rosters is None:
+			rosters = self.get_rosters()
+		if users is None:
+			users = self.get_users()
+		return LeagueIndex.from_json(users, rosters)
+
+	def get_standings(self, rosters, users, weeks_matchups=None):
+		"""weeks_matchups: list of the matchups of every week to count, e.g. for the standings as of a past week; the
+		records are then tallied from those games instead of taken from the rosters"""
+		index = LeagueIndex.from_json(users, rosters)
+		records = self.tally_records(weeks_matchups) if weeks_matchups is not None else None
 
 		roster_standings_list = []
-		for roster in rosters:
-			wins = roster["settings"]["wins"]
-			points = roster["settings"]["fpts"]
-			name = roster["owner_id"]
-			losses = roster["settings"]["losses"]
-			if name is not None:
-				roster_tuple = (wins, losses, points, users_dict[name])
+		for roster in index.rosters.values():
+			if records is None:
+				wins, losses, fpts = roster.wins, roster.losses, roster.fpts
 			else:
-				roster_tuple = (wins, losses, points, None)
+				wins, losses, fpts = records.get(roster.roster_id, (0, 0, 0))
+			roster_tuple = (wins, losses, fpts, index.team_name(roster.roster_id))
 			roster_standings_list.append(roster_tuple)
 
 		roster_standings_list.sort(reverse = 1)
@@ -72,6 +126,29 @@ class League(BaseApi):
 		
 		return clean_standings_list
 
+	@staticmethod
+	def tally_records(weeks_matchups):
+		"""returns dict {roster_id: (wins, losses, points for)} over the given weeks' matchups; ties count as
+		neither, as in the rosters' settings, and teams without an opponent only add their points"""
+		records = {}
+		for matchups in weeks_matchups:
+			pairs = {}
+			for matchup in matchups:
+				matchup = Matchup.from_json(matchup)
+				wins, losses, fpts = records.get(matchup.roster_id, (0, 0, 0))
+				records[matchup.roster_id] = (wins, losses, round(fpts + matchup.points, 2))
+				if matchup.matchup_id is not None:
+					pairs.setdefault(matchup.matchup_id, []).append(matchup)
+			for pair in pairs.values():
+				if len(pair) != 2 or pair[0].points == pair[1].points:
+					continue
+				winner, loser = sorted(pair, key=lambda matchup: matchup.points, reverse=True)
+				wins, losses, fpts = records[winner.roster_id]
+				records[winner.roster_id] = (wins + 1, losses, fpts)
+				wins, losses, fpts = records[loser.roster_id]
+				records[loser.roster_id] = (wins, losses + 1, fpts)
+		return records
+
 	def map_rosterid_to_ownerid(self, rosters ):
 		"""returns: dict {roster_id:[owner_id,pts]} """
 		result_dict = {}
@@ -82,36 +159,36 @@ class League(BaseApi):
 
 		return result_dict
 
-	def get_scoreboards(self, rosters, matchups, users, score_type, week):
-		""" returns dict {matchup_id:[(team_name,score), (team_name, score)]}"""
-		roster_id_dict = self.map_rosterid_to_ownerid(rosters)
-
-
+	def get_scoreboards(self, rosters, matchups, users, score_type, week, points=None, projected=None):
+		""" returns dict {matchup_id:[(team_name, score, projected, left), (team_name, score, projected, left)]}
+		left is the projection of the starters still to play, those without a stat line yet
+		points, projected: {player_id: points} of the week's stats and projections, already scored, e.g. shared
+		between leagues; the week's stats are fetched per team otherwise, and left is what the team is short of its
+		projection"""
 		if len(matchups) == 0:
 			return None
 
-		#Get the users to team name stats
-		users_dict = self.map_users_to_team_name(users)
-
+		index = LeagueIndex.from_json(users, rosters)
 
 		#map roster_id to points
 		scoreboards_dict = {}
 
 		for team in matchups:
 			matchup_id = team["matchup_id"]
-			current_roster_id = team["roster_id"]
-			owner_id = roster_id_dict[current_roster_id]
-			if owner_id is not None:
-				team_name = users_dict[owner_id]
-			else:
-				team_name = "Team name not available"
+			team_name = index.team_name(team["roster_id"], "Team name not available")
 
-			team_score = self.get_team_score(team["starters"], score_type, week)
-			projected_score = self.get_team_score(team["starters"], score_type, week, projected=True)
+			if points is not None and projected is not None:
+				team_score = sum(points.get(starter, 0.0) for starter in team["starters"])
+				projected_score = sum(projected.get(starter, 0.0) for starter in team["starters"])
+				left = sum(projected.get(starter, 0.0) for starter in team["starters"] if starter not in points)
+			else:
+				team_score = self.get_team_score(team["starters"], score_type, week)
+				projected_score = self.get_team_score(team["starters"], score_type, week, projected=True)
+				left = max((projected_score or 0) - (team_score or 0), 0)
 			if team_score is None:
 				team_score = 0
 
-			team_score_tuple = (team_name, team_score, projected_score)
+			team_score_tuple = (team_name, team_score, projected_score, left)
 			if matchup_id not in scoreboards_dict:
 				scoreboards_dict[matchup_id] = [team_score_tuple]
 			else:
@@ -122,6 +199,8 @@ class League(BaseApi):
 		""" -Notes: Need to find a better way to compare scores rather than abs value of the difference of floats. """
 		close_games_dict = {}
 		for key in scoreboards:
+			if len(scoreboards[key]) < 2:
+				continue
 			team_one_score = scoreboards[key][0][1]
 			team_two_score = scoreboards[key][1][1]
 
@@ -132,9 +211,13 @@ class League(BaseApi):
 	def get_team_score(self,starters, score_type, week, projected=False):
 		total_score = 0.0
 		stats = Stats()
-		scoring_settings = self.get_league_scoring_settings()
 		week_stats = stats.get_week_projections("regular", 2022, week) if projected else \
 		             stats.get_week_stats("regular", 2022, week)
+		if score_type == "pts_custom":
+			# the stats payload may be shared with other leagues, so score it without writing pts_custom into it
+			rules = self.get_scoring_rules()
+			return sum(rules.score((week_stats or {}).get(starter)) for starter in starters)
+		scoring_settings = self.get_league_scoring_settings()
 		for starter in starters:
 			if stats.get_player_week_stats(week_stats, starter, scoring_settings) is not None:
 				try:
@@ -144,11 +227,68 @@ class League(BaseApi):
 
 		return total_score
 
-	def empty_roster_spots(self):
-		pass
+	def get_starter_slots(self):
+		"""returns the league's starting slots in lineup order, e.g. ["QB", "RB", "RB", "WR", "FLEX", ...]"""
+		return [slot for slot in (self.get_league() or {}).get("roster_positions") or [] if slot not in BENCH_SLOTS]
+
+	def empty_roster_spots(self, rosters=None):
+		"""returns {roster_id: [slot, ...]} of the starting slots each roster has left empty. Sleeper fills an empty
+		slot with "0"."""
+		if rosters is None:
+			rosters = self.get_rosters()
+		slots = self.get_starter_slots()
+		result = {}
+		for roster in rosters or []:
+			starters = list(roster.get("starters") or [])
+			starters += [None] * (len(slots) - len(starters))
+			empty = [slot for slot, player_id in zip(slots, starters) if player_id in (None, "", "0")]
+			if empty:
+				result[roster["roster_id"]] = empty
+		return result
 
 	def get_negative_scores(self, week):
 		pass
 
 	def get_rosters_players(self):
 		pass
+
+
+class LeagueRegistry():
+	"""One shared League per league_id for the whole process: getting a league again costs nothing, and the League
+	is where per-league caches live."""
+
+	def __init__(self, max_ages=None):
+		"""max_ages: dict {part: seconds} overriding League.MAX_AGES for every league"""
+		self.max_ages = max_ages
+		self._leagues = {}
+		self._lock = threading.Lock()
+
+	def get(self, league_id, league=None):
+		"""returns the shared League. league: a payload to seed it with if it is new, e.g. from a snapshot"""
+		league_id = str(league_id)
+		with self._lock:
+			shared = self._leagues.get(league_id)
+			if shared is None:
+				shared = self._leagues[league_id] = League(league_id, league, self.max_ages)
+		return shared
+
+	def invalidate(self, league_id=None, *parts):
+		"""drops parts (all by default) of one league, or of every league when league_id is None"""
+		with self._lock:
+			leagues = list(self._leagues.values()) if league_id is None else [self._leagues.get(str(league_id))]
+		for league in leagues:
+			if league is not None:
+				league.invalidate(*parts)
+
+	def items(self):
+		with self._lock:
+			return list(self._leagues.items())
+
+	def __contains__(self, league_id):
+		return str(league_id) in self._leagues
+
+	def __iter__(self):
+		return iter([league_id for league_id, _ in self.items()])
+
+	def __len__(self):
+		return len(self._leagues)
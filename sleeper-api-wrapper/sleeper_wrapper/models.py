@@ -0,0 +1,148 @@
+import sys
+
+
+def _intern_ids(player_ids):
+	"""interns player ids so every model referencing a player shares one string"""
+	return tuple(sys.intern(player_id) for player_id in player_ids or ())
+
+
+def _intern_id_dict(player_dict):
+	if not player_dict:
+		return None
+	return {sys.intern(player_id): value for player_id, value in player_dict.items()}
+
+
+class LeagueUser:
+	__slots__ = ("user_id", "display_name", "team_name")
+
+	def __init__(self, user_id, display_name, team_name):
+		self.user_id = user_id
+		self.display_name = display_name
+		self.team_name = team_name
+
+	@classmethod
+	def from_json(cls, user):
+		"""user: https://docs.sleeper.app/#getting-users-in-a-league"""
+		try:
+			team_name = user["metadata"]["team_name"]
+		except (KeyError, TypeError):
+			team_name = user["display_name"]
+		return cls(user["user_id"], user["display_name"], team_name)
+
+
+class Roster:
+	__slots__ = ("roster_id", "owner_id", "players", "starters", "reserve", "wins", "losses", "ties", "fpts")
+
+	def __init__(self, roster_id, owner_id, players, starters, reserve, wins, losses, ties, fpts):
+		self.roster_id = roster_id
+		self.owner_id = owner_id
+		self.players = players
+		self.starters = starters
+		self.reserve = reserve
+		self.wins = wins
+		self.losses = losses
+		self.ties = ties
+		self.fpts = fpts
+
+	@classmethod
+	def from_json(cls, roster):
+		"""roster: https://docs.sleeper.app/#getting-rosters-in-a-league"""
+		settings = roster.get("settings") or {}
+		return cls(roster["roster_id"], roster.get("owner_id"), _intern_ids(roster.get("players")),
+				   _intern_ids(roster.get("starters")), _intern_ids(roster.get("reserve")),
+				   settings.get("wins", 0), settings.get("losses", 0), settings.get("ties", 0),
+				   settings.get("fpts", 0))
+
+	def bench(self):
+		"""returns the players that are neither starting nor on reserve"""
+		not_benched = set(self.starters) | set(self.reserve)
+		return tuple(player_id for player_id in self.players if player_id not in not_benched)
+
+
+class Matchup:
+	__slots__ = ("matchup_id", "roster_id", "points", "starters", "players")
+
+	def __init__(self, matchup_id, roster_id, points, starters, players):
+		self.matchup_id = matchup_id
+		self.roster_id = roster_id
+		self.points = points
+		self.starters = starters
+		self.players = players
+
+	@classmethod
+	def from_json(cls, matchup):
+		"""matchup: https://docs.sleeper.app/#getting-matchups-in-a-league"""
+		return cls(matchup.get("matchup_id"), matchup["roster_id"], matchup.get("points") or 0,
+				   _intern_ids(matchup.get("starters")), _intern_ids(matchup.get("players")))
+
+	def bench(self):
+		starters = set(self.starters)
+		return tuple(player_id for player_id in self.players if player_id not in starters)
+
+
+class Transaction:
+	__slots__ = ("transaction_id", "type", "status", "created", "roster_ids", "adds", "drops", "draft_picks",
+				 "waiver_bid", "leg", "waiver_budget")
+
+	def __init__(self, transaction_id, type, status, created, roster_ids, adds, drops, draft_picks, waiver_bid, leg,
+				 waiver_budget=()):
+		self.transaction_id = transaction_id
+		self.type = type
+		self.status = status
+		self.created = created
+		self.roster_ids = roster_ids
+		self.adds = adds
+		self.drops = drops
+		self.draft_picks = draft_picks
+		self.waiver_bid = waiver_bid
+		self.leg = leg
+		# FAAB traded along: [{"sender": roster_id, "receiver": roster_id, "amount": int}]
+		self.waiver_budget = waiver_budget
+
+	@classmethod
+	def from_json(cls, transaction):
+		"""transaction: https://docs.sleeper.app/#get-transactions"""
+		settings = transaction.get("settings") or {}
+		return cls(transaction["transaction_id"], transaction["type"], transaction.get("status"),
+				   transaction["created"], tuple(transaction.get("roster_ids") or ()),
+				   _intern_id_dict(transaction.get("adds")), _intern_id_dict(transaction.get("drops")),
+				   transaction.get("draft_picks") or [], settings.get("waiver_bid"), transaction.get("leg"),
+				   transaction.get("waiver_budget") or [])
+
+
+class LeagueIndex:
+	"""Parses a league's users and rosters once and precomputes the lookups every report needs."""
+	__slots__ = ("users", "rosters", "team_names", "player_rosters")
+
+	def __init__(self, users, rosters):
+		"""users and rosters: lists of LeagueUser and Roster"""
+		self.users = {user.user_id: user for user in users}
+		self.rosters = {roster.roster_id: roster for roster in rosters}
+
+		# roster_id -> team name, None when the roster has no owner
+		self.team_names = {}
+		for roster in rosters:
+			user = self.users.get(roster.owner_id)
+			self.team_names[roster.roster_id] = user.team_name if user is not None else None
+
+		# player_id -> roster_id
+		self.player_rosters = {}
+		for roster in rosters:
+			for player_id in roster.players:
+				self.player_rosters[player_id] = roster.roster_id
+
+	@classmethod
+	def from_json(cls, users, rosters):
+		return cls([LeagueUser.from_json(user) for user in users or []],
+				   [Roster.from_json(roster) for roster in rosters or []])
+
+	def team_name(self, roster_id, default=None):
+		name = self.team_names.get(roster_id)
+		return name if name is not None else default
+
+	def roster_of(self, player_id):
+		"""returns the roster_id holding player_id, or None if the player is a free agent"""
+		return self.player_rosters.get(player_id)
+
+	def rostered_players(self):
+		return self.player_rosters.keys()
@@ -0,0 +1,126 @@
+import os
+import struct
+import threading
+import time
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+# Lower goes first.
+PRIORITY_LIVE = 0  # transactions, live scores
+PRIORITY_REPORT = 1  # scheduled posts
+PRIORITY_BACKFILL = 2  # history, caches and other catch-up work
+
+# Sleeper asks for less than 1000 calls a minute; stay a little under it
+REQUESTS_PER_MINUTE = 900
+
+_STATE = struct.Struct("dd")  # tokens, updated_at
+
+
+class TokenBucket():
+	"""A token bucket with priority classes. A class may only take a token while more than its reserve is left in
+	the bucket, so low priority work waits and leaves the last tokens to live calls instead of running into 429s.
+
+	With a path the bucket lives in that file, guarded by flock, and is shared by every process on the host that
+	uses the same path. Without one it is shared by the threads of this process."""
+
+	def __init__(self, per_minute=REQUESTS_PER_MINUTE, burst=60, reserves=(0, 0.25, 0.5), path=None):
+		"""
+		:param per_minute: Int tokens added per minute
+		:param burst: Int size of the bucket
+		:param reserves: Tuple of the fraction of the bucket each priority class must leave for the classes above it
+		:param path: String path of the file shared between processes, or None
+		"""
+		self.rate = per_minute / 60.0
+		self.burst = burst
+		self.reserves = [reserve * burst for reserve in reserves]
+		self.path = path if fcntl is not None else None
+		self.waited = [0.0] * len(reserves)
+		self._tokens = float(burst)
+		self._updated_at = time.time()
+		self._lock = threading.Lock()
+		self._waiting = [0] * len(reserves)
+		self._fd = None
+		self._fd_pid = None
+
+	def _file(self):
+		# a forked child shares the parent's open file, and with it the flock; it needs its own
+		if self._fd is None or self._fd_pid != os.getpid():
+			self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+			self._fd_pid = os.getpid()
+		return self._fd
+
+	def _load(self, now):
+		if self.path is None:
+			return self._tokens, self._updated_at
+		data = os.pread(self._file(), _STATE.size, 0)
+		if len(data) < _STATE.size:
+			return float(self.burst), now
+		return _STATE.unpack(data)
+
+	def _store(self, tokens, updated_at):
+		if self.path is None:
+			self._tokens, self._updated_at = tokens, updated_at
+		else:
+			os.pwrite(self._file(), _STATE.pack(tokens, updated_at), 0)
+
+	def _take(self, priority):
+		"""takes a token if the priority class may, else returns the seconds to wait before trying again"""
+		with self._lock:
+			if self.path is not None:
+				fcntl.flock(self._file(), fcntl.LOCK_EX)
+			try:
+				now = time.time()
+				tokens, updated_at = self._load(now)
+				tokens = min(self.burst, tokens + max(0.0, now - updated_at) * self.rate)
+				reserve = self.reserves[priority]
+				# a higher class already waiting in this process goes first
+				if tokens - 1 >= reserve and not any(self._waiting[:priority]):
+					self._store(tokens - 1, now)
+					return 0
+				self._store(tokens, now)
+				return max(reserve + 1 - tokens, 1) / self.rate
+			finally:
+				if self.path is not None:
+					fcntl.flock(self._file(), fcntl.LOCK_UN)
+
+	def acquire(self, priority=PRIORITY_REPORT, timeout=None):
+		"""
+		Takes a token, waiting for one if needed.
+		:param priority: Int PRIORITY_* class of the call
+		:param timeout: Float seconds to wait at most, or None to wait as long as it takes
+		:return: Boolean True if a token was taken
+		"""
+		priority = min(max(priority, 0), len(self.reserves) - 1)
+		wait = self._take(priority)
+		if not wait:
+			return True
+		give_up_at = None if timeout is None else time.time() + timeout
+		start = time.time()
+		with self._lock:
+			self._waiting[priority] += 1
+		try:
+			while wait:
+				if give_up_at is not None:
+					if time.time() + wait > give_up_at:
+						return False
+				time.sleep(min(wait, 1.0))
+				wait = self._take(priority)
+			return True
+		finally:
+			with self._lock:
+				self._waiting[priority] -= 1
+				self.waited[priority] += time.time() - start
+
+	def drain(self):
+		"""empties the bucket, e.g. after a 429, so every class backs off until it refills"""
+		with self._lock:
+			if self.path is not None:
+				fcntl.flock(self._file(), fcntl.LOCK_EX)
+			try:
+				self._store(0.0, time.time())
+			finally:
+				if self.path is not None:
+					fcntl.flock(self._file(), fcntl.LOCK_UN)
@@ -0,0 +1,28 @@
+import hashlib
+import json
+
+
+class ScoringRules():
+	"""A league's scoring_settings compiled once into (stat, points) pairs, so scoring a player only looks at the
+	stats the league actually scores and never writes into the shared stats payload."""
+	__slots__ = ("weights", "key")
+
+	def __init__(self, scoring_settings):
+		"""scoring_settings: dict {stat: points per unit}, e.g. League.get_league_scoring_settings()"""
+		self.weights = tuple(sorted((stat, float(points)) for stat, points in (scoring_settings or {}).items()
+									if isinstance(points, (int, float)) and points))
+		# the same for every league that scores the same way, whatever order or zero weights its settings have
+		self.key = hashlib.sha1(json.dumps(self.weights).encode("utf-8")).hexdigest()[:16]
+
+	def score(self, player_stats):
+		"""returns the custom points of one player's stats dict, 0 for None"""
+		if not player_stats:
+			return 0.0
+		get = player_stats.get
+		return sum(get(stat, 0) * points for stat, points in self.weights)
+
+	def score_all(self, week_stats, player_ids=None):
+		"""returns {player_id: custom points} for player_ids, or for everyone in week_stats"""
+		if player_ids is None:
+			return {player_id: self.score(stats) for player_id, stats in week_stats.items()}
+		return {player_id: self.score(week_stats.get(player_id)) for player_id in player_ids}
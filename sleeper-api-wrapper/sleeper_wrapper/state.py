@@ -1,9 +1,13 @@
 from .base_api import BaseApi
 
 class State(BaseApi):
-    def __init__(self):
+    def __init__(self, state=None):
+        """state: a previously fetched state payload to reuse instead of calling the API"""
         self._base_url = "https://api.sleeper.app/v1/state/nfl"
-        self._state = self._call(self._base_url)
+        self._state = state if state is not None else self._call(self._base_url)
+
+    def get_state(self):
+        return self._state
 
     def get_season_start_date(self):
         return self._state["season_start_date"]
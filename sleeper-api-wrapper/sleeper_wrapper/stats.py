@@ -9,14 +9,14 @@ class Stats(BaseApi):
 	def get_all_stats(self, season_type, season):
 		return self._call("{}/{}/{}".format(self._base_url, season_type, season)) 
 
-	def get_week_stats(self, season_type, season, week):
-		return self._call("{}/{}/{}/{}".format(self._base_url, season_type, season, week))
+	def get_week_stats(self, season_type, season, week, if_changed=None):
+		return self._call("{}/{}/{}/{}".format(self._base_url, season_type, season, week), if_changed)
 
 	def get_all_projections(self, season_type, season):
 		return self._call("{}/{}/{}".format(self._projections_base_url, season_type, season))
 
-	def get_week_projections(self, season_type, season, week):
-		return self._call("{}/{}/{}/{}".format(self._projections_base_url, season_type, season, week))
+	def get_week_projections(self, season_type, season, week, if_changed=None):
+		return self._call("{}/{}/{}/{}".format(self._projections_base_url, season_type, season, week), if_changed)
 
 	def get_player_week_stats(self, stats, player_id, settings):
 		try:
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import re
+import threading
+from collections import Counter
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from . import base_api
+
+SLEEPER_URL = "https://api.sleeper.app/"
+
+
+def reset_api_state():
+	"""forgets everything BaseApi keeps between calls: circuit breakers, last good responses, validators and the
+	response store, so one test's failures or responses never leak into the next"""
+	with base_api._breakers_lock:
+		base_api._breakers.clear()
+	with base_api._last_good_lock:
+		base_api._last_good.clear()
+	with base_api._validators_lock:
+		base_api._validators.clear()
+		base_api._seen.clear()
+	base_api._unconsumed().clear()
+	base_api.BaseApi.pop_stale()
+	base_api.set_response_store(None)
+
+
+class StandInSleeper(BaseAdapter):
+	"""A local stand-in for the Sleeper API. Once installed, every BaseApi call is answered by the registered routes
+	instead of the network, and requests are counted per endpoint family."""
+
+	def __init__(self, etags=True):
+		"""etags: send ETags and answer a matching If-None-Match with 304, as opposed to a server without them"""
+		super().__init__()
+		self.etags = etags
+		self._routes = []
+		self._lock = threading.Lock()
+		self.requests = Counter()
+		self.bytes = Counter()
+		self.not_modified = Counter()
+
+	def route(self, pattern, handler):
+		"""pattern: regex matched against the url path after /v1/. handler(match, query) returns the payload to
+		send as JSON, or None for a 404"""
+		self._routes.append((re.compile(pattern + "$"), handler))
+
+	def install(self):
+		base_api._session.mount(SLEEPER_URL, self)
+
+	def uninstall(self):
+		base_api._session.mount(SLEEPER_URL, HTTPAdapter())
+
+	def respond(self, request, path, query):
+		"""returns (status, body bytes, headers) for a request"""
+		for pattern, handler in self._routes:
+			match = pattern.match(path)
+			if match:
+				payload = handler(match, query)
+				if payload is None:
+					return 404, b"", {}
+				body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+				if not self.etags:
+					return 200, body, {}
+				etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+				if request.headers.get("If-None-Match") == etag:
+					return 304, b"", {"ETag": etag}
+				return 200, body, {"ETag": etag}
+		return 404, b"", {}
+
+	def send(self, request, **kwargs):
+		url = request.url
+		path_and_query = url[len(SLEEPER_URL):].split("?", 1)
+		path = path_and_query[0][len("v1/"):] if path_and_query[0].startswith("v1/") else path_and_query[0]
+		query = dict(pair.split("=", 1) for pair in path_and_query[1].split("&")) if len(path_and_query) > 1 else {}
+
+		status, body, headers = self.respond(request, path, query)
+		with self._lock:
+			family = base_api.endpoint_family(url)
+			self.requests[family] += 1
+			self.bytes[family] += len(body)
+			if status == 304:
+				self.not_modified[family] += 1
+
+		response = requests.Response()
+		response.status_code = status
+		response._content = body
+		response.headers = CaseInsensitiveDict(headers)
+		response.headers.setdefault("Content-Type", "application/json")
+		response.encoding = "utf-8"
+		response.url = url
+		response.request = request
+		return response
+
+	def close(self):
+		pass
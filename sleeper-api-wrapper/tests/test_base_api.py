@@ -0,0 +1,132 @@
+import pytest
+
+from sleeper_wrapper import base_api
+from sleeper_wrapper.base_api import BaseApi, CircuitBreaker, SleeperUnavailable
+
+def test_endpoint_family():
+	assert base_api.endpoint_family("https://api.sleeper.app/v1/league/355526480094113792/matchups/4") == "league/*/matchups/*"
+	assert base_api.endpoint_family("https://api.sleeper.app/v1/state/nfl") == "state/nfl"
+
+def test_circuit_breaker():
+	breaker = CircuitBreaker(threshold=2, base_backoff=60)
+	breaker.record_failure()
+	assert breaker.allow()
+	breaker.record_failure()
+	assert not breaker.allow()
+	breaker.record_success()
+	assert breaker.allow()
+
+def test_stale_while_revalidate(monkeypatch):
+	""" Tests that a failing endpoint is answered with the last good response, marked as stale"""
+	url = "https://api.sleeper.app/v1/league/1/users"
+	monkeypatch.setattr(base_api, "_fetch", lambda url, timeout=None, validators=None: ([{"user_id": "1"}], None))
+	assert BaseApi()._call(url) == [{"user_id": "1"}]
+	assert not BaseApi.pop_stale()
+
+	def unavailable(url, timeout=None, validators=None):
+		raise base_api._Unavailable()
+	monkeypatch.setattr(base_api, "_fetch", unavailable)
+	monkeypatch.setattr(base_api, "_refresh_in_background", lambda url, breaker: None)
+	assert BaseApi()._call(url) == [{"user_id": "1"}]
+	assert BaseApi.pop_stale()
+	assert not BaseApi.pop_stale()
+	# nothing to fall back on
+	with pytest.raises(SleeperUnavailable):
+		BaseApi()._call("https://api.sleeper.app/v1/league/2/users")
+
+def _serve_rosters(stand_in, rosters):
+	stand_in.route(r"league/(\d+)/rosters", lambda match, query: rosters)
+	stand_in.install()
+
+def test_conditional_get_reports_unchanged():
+	""" Tests that a caller passing if_changed is told when it already has the response, via 304s"""
+	from sleeper_wrapper import League, UNCHANGED
+	from sleeper_wrapper.testing import StandInSleeper
+	rosters = [{"roster_id": 1, "players": ["1"]}]
+	stand_in = StandInSleeper()
+	_serve_rosters(stand_in, rosters)
+	try:
+		league = League("101", {})
+		assert league.get_rosters(if_changed="job") == rosters
+		league.mark_consumed("job")
+		assert league.get_rosters(if_changed="job") is UNCHANGED
+		# other callers still get the payload, answered from memory on the 304
+		assert league.get_rosters(if_changed="other job") == rosters
+		# without if_changed the League's own copy answers, without asking Sleeper
+		assert league.get_rosters() == rosters
+		assert stand_in.not_modified["league/*/rosters"] == 2
+
+		rosters.append({"roster_id": 2, "players": ["2"]})
+		assert len(league.get_rosters(if_changed="job")) == 2
+		league.mark_consumed("job")
+		assert league.get_rosters(if_changed="job") is UNCHANGED
+	finally:
+		stand_in.uninstall()
+
+def test_weekly_stats_are_not_kept_twice():
+	""" Tests that a week's stats and projections get no last good copy, since their callers keep their own"""
+	from sleeper_wrapper import Stats
+	from sleeper_wrapper.testing import StandInSleeper
+	stand_in = StandInSleeper()
+	stand_in.route(r"(stats|projections)/nfl/regular/(\d+)/(\d+)", lambda match, query: {"1": {"rec": 3}})
+	stand_in.install()
+	try:
+		assert Stats().get_week_stats("regular", 2022, 3) == {"1": {"rec": 3}}
+		assert Stats().get_week_projections("regular", 2022, 3) == {"1": {"rec": 3}}
+	finally:
+		stand_in.uninstall()
+	assert base_api._recall("https://api.sleeper.app/v1/stats/nfl/regular/2022/3") is None
+	assert base_api._recall("https://api.sleeper.app/v1/projections/nfl/regular/2022/3") is None
+
+def test_unconsumed_responses_are_given_again():
+	""" Tests that a caller which never marked a response consumed, e.g. because it failed, is given it again"""
+	from sleeper_wrapper import League, UNCHANGED
+	from sleeper_wrapper.testing import StandInSleeper
+	rosters = [{"roster_id": 1, "players": ["1"]}]
+	stand_in = StandInSleeper()
+	_serve_rosters(stand_in, rosters)
+	try:
+		league = League("103", {})
+		assert league.get_rosters(if_changed="job") == rosters
+		assert league.get_rosters(if_changed="job") == rosters
+		league.mark_consumed("other job")
+		assert league.get_rosters(if_changed="job") == rosters
+		league.mark_consumed("job")
+		assert league.get_rosters(if_changed="job") is UNCHANGED
+	finally:
+		stand_in.uninstall()
+
+def test_unchanged_body_without_etags():
+	""" Tests that a server without ETags still lets an unchanged body skip parsing"""
+	from sleeper_wrapper import League, UNCHANGED
+	from sleeper_wrapper.testing import StandInSleeper
+	stand_in = StandInSleeper(etags=False)
+	_serve_rosters(stand_in, [{"roster_id": 1}])
+	try:
+		league = League("102", {})
+		assert league.get_rosters(if_changed="job") == [{"roster_id": 1}]
+		league.mark_consumed("job")
+		assert league.get_rosters(if_changed="job") is UNCHANGED
+		assert not league.get_rosters(if_changed="job")
+		assert stand_in.requests["league/*/rosters"] == 3
+	finally:
+		stand_in.uninstall()
+
+def test_bound_calls_keep_the_callers_priority_and_deadline():
+	""" Tests that a call handed to a thread pool keeps the calling thread's priority and deadline"""
+	import time
+	from concurrent.futures import ThreadPoolExecutor
+	from sleeper_wrapper.rate_limit import PRIORITY_BACKFILL, PRIORITY_REPORT
+
+	def thread_state():
+		return base_api._local.priority, base_api._local.deadline
+
+	deadline = time.time() + 60
+	base_api.set_priority(PRIORITY_BACKFILL)
+	base_api.set_deadline(deadline)
+	try:
+		with ThreadPoolExecutor(max_workers=1) as executor:
+			assert executor.submit(base_api.bind_thread_state(thread_state)).result() == (PRIORITY_BACKFILL, deadline)
+	finally:
+		base_api.set_priority(PRIORITY_REPORT)
+		base_api.set_deadline(None)
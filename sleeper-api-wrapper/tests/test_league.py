@@ -117,8 +117,63 @@ def test_get_close_games(capsys):
 	close_games = league.get_close_games(scoreboards, 10)
 	assert isinstance(close_games, dict)
 
+def test_get_scoreboards_from_scored_points():
+	""" Tests that points scored once elsewhere are summed over each team's starters without fetching stats"""
+	league = League("1", {"league_id": "1", "scoring_settings": {"rec": 1}})
+	users = [{"user_id": "u1", "display_name": "alpha"}, {"user_id": "u2", "display_name": "beta"}]
+	rosters = [{"roster_id": 1, "owner_id": "u1"}, {"roster_id": 2, "owner_id": "u2"}]
+	matchups = [{"matchup_id": 1, "roster_id": 1, "starters": ["10", "11"]},
+				{"matchup_id": 1, "roster_id": 2, "starters": ["12"]}]
+	scoreboards = league.get_scoreboards(rosters, matchups, users, "pts_custom", 1, {"10": 5.0, "11": 2.5},
+										 {"10": 6.0, "12": 9.0})
+	# beta's starter has no stat line yet, so all of its projection is still to play
+	assert scoreboards == {1: [("alpha", 7.5, 6.0, 0.0), ("beta", 0.0, 9.0, 9.0)]}
+
+def test_get_standings_from_past_weeks():
+	""" Tests that standings as of a past week are tallied from that week's and earlier matchups"""
+	league = League("1", {"league_id": "1"})
+	users = [{"user_id": "u1", "display_name": "alpha"}, {"user_id": "u2", "display_name": "beta"}]
+	# the rosters' records are the season's latest, which past weeks must not show
+	rosters = [{"roster_id": 1, "owner_id": "u1", "settings": {"wins": 0, "losses": 3, "fpts": 300}},
+			   {"roster_id": 2, "owner_id": "u2", "settings": {"wins": 3, "losses": 0, "fpts": 330}}]
+	weeks = [[{"matchup_id": 1, "roster_id": 1, "points": 110.5}, {"matchup_id": 1, "roster_id": 2, "points": 100}],
+			 [{"matchup_id": 1, "roster_id": 1, "points": 90}, {"matchup_id": 1, "roster_id": 2, "points": 120}],
+			 [{"matchup_id": 1, "roster_id": 1, "points": 95}, {"matchup_id": 1, "roster_id": 2, "points": 95}]]
+	assert league.get_standings(rosters, users, weeks[:1]) == [("alpha", "1", "0", "110.5"), ("beta", "0", "1", "100")]
+	assert league.get_standings(rosters, users, weeks) == [("beta", "1", "1", "315"), ("alpha", "1", "1", "295.5")]
+	assert league.get_standings(rosters, users)[0] == ("beta", "3", "0", "330")
+
 def test_empty_roster_spots():
 	pass
 
 def test_get_negative_scores():
-	pass
\ No newline at end of file
+	pass
+
+def test_league_registry_loads_lazily():
+	""" Tests that the registry shares one League per id, which fetches each part once until it is invalidated"""
+	from sleeper_wrapper import LeagueRegistry
+	from sleeper_wrapper.testing import StandInSleeper
+	stand_in = StandInSleeper()
+	stand_in.route(r"league/(\d+)$", lambda match, query: {"league_id": match.group(1), "scoring_settings": {"rec": 1}})
+	stand_in.route(r"league/(\d+)/users", lambda match, query: [{"user_id": "1"}])
+	stand_in.install()
+	try:
+		registry = LeagueRegistry()
+		league = registry.get(7)
+		assert registry.get("7") is league
+		assert sum(stand_in.requests.values()) == 0
+
+		assert league.get_league()["league_id"] == "7"
+		assert league.get_scoring_rules() is league.get_scoring_rules()
+		league.get_users()
+		league.get_users()
+		assert stand_in.requests["league/*"] == 1
+		assert stand_in.requests["league/*/users"] == 1
+
+		registry.invalidate(7, "users")
+		league.get_users()
+		league.get_league()
+		assert stand_in.requests["league/*/users"] == 2
+		assert stand_in.requests["league/*"] == 1
+	finally:
+		stand_in.uninstall()
@@ -0,0 +1,35 @@
+from sleeper_wrapper import LeagueIndex, Matchup, Transaction
+
+USERS = [
+	{"user_id": "1", "display_name": "alpha", "metadata": {"team_name": "Team Alpha"}},
+	{"user_id": "2", "display_name": "beta", "metadata": {}},
+]
+ROSTERS = [
+	{"roster_id": 1, "owner_id": "1", "players": ["4034", "6794"], "starters": ["4034"], "settings": {"wins": 3, "losses": 1, "fpts": 500}},
+	{"roster_id": 2, "owner_id": "2", "players": ["4881"], "starters": ["4881"], "settings": {"wins": 1, "losses": 3, "fpts": 400}},
+	{"roster_id": 3, "owner_id": None, "players": None, "starters": None, "settings": {}},
+]
+
+def test_league_index():
+	""" Tests the precomputed team name and player lookups"""
+	index = LeagueIndex.from_json(USERS, ROSTERS)
+
+	assert index.team_name(1) == "Team Alpha"
+	assert index.team_name(2) == "beta"
+	assert index.team_name(3) is None
+	assert index.team_name(3, "Team NA") == "Team NA"
+	assert index.roster_of("6794") == 1
+	assert index.roster_of("1") is None
+
+def test_matchup_bench():
+	matchup = Matchup.from_json({"matchup_id": 1, "roster_id": 1, "points": 10.5, "starters": ["4034"], "players": ["4034", "6794"]})
+
+	assert matchup.bench() == ("6794",)
+
+def test_transaction():
+	transaction = Transaction.from_json({"transaction_id": "9", "type": "waiver", "status": "complete", "created": 1000,
+		"roster_ids": [2], "adds": {"6794": 2}, "drops": None, "settings": {"waiver_bid": 12}})
+
+	assert transaction.waiver_bid == 12
+	assert transaction.adds == {"6794": 2}
+	assert transaction.drops is None
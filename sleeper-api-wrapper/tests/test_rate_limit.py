@@ -0,0 +1,37 @@
+import time
+from multiprocessing import Process
+
+from sleeper_wrapper.rate_limit import TokenBucket, PRIORITY_LIVE, PRIORITY_REPORT, PRIORITY_BACKFILL
+
+def test_burst_then_refill():
+	bucket = TokenBucket(per_minute=600, burst=5, reserves=(0, 0, 0))
+	for _ in range(5):
+		assert bucket.acquire(timeout=0)
+	assert not bucket.acquire(timeout=0)
+	assert bucket.acquire(timeout=1)
+
+def test_low_priority_leaves_the_reserve():
+	""" Tests that backfills stop at their reserve while live calls can still empty the bucket"""
+	bucket = TokenBucket(per_minute=1, burst=10, reserves=(0, 0.2, 0.5))
+	backfills = sum(bucket.acquire(PRIORITY_BACKFILL, timeout=0) for _ in range(10))
+	reports = sum(bucket.acquire(PRIORITY_REPORT, timeout=0) for _ in range(10))
+	live = sum(bucket.acquire(PRIORITY_LIVE, timeout=0) for _ in range(10))
+	assert (backfills, reports, live) == (5, 3, 2)
+
+def test_drain():
+	bucket = TokenBucket(per_minute=1, burst=10)
+	bucket.drain()
+	assert not bucket.acquire(PRIORITY_LIVE, timeout=0)
+
+def _take_all(path):
+	bucket = TokenBucket(per_minute=1, burst=10, reserves=(0, 0, 0), path=path)
+	while bucket.acquire(timeout=0):
+		pass
+
+def test_shared_between_processes(tmp_path):
+	path = str(tmp_path / "bucket")
+	process = Process(target=_take_all, args=(path,))
+	process.start()
+	process.join()
+	bucket = TokenBucket(per_minute=1, burst=10, path=path)
+	assert not bucket.acquire(PRIORITY_LIVE, timeout=0)
@@ -0,0 +1,19 @@
+from sleeper_wrapper import ScoringRules
+
+def test_score_uses_only_scored_stats():
+	rules = ScoringRules({"pass_yd": 0.04, "pass_td": 4, "rec": 0, "bonus_flag": "yes"})
+	assert rules.weights == (("pass_td", 4.0), ("pass_yd", 0.04))
+	assert rules.score({"pass_yd": 300, "pass_td": 2, "rec": 5, "gp": 1}) == 20
+	assert rules.score(None) == 0
+
+def test_score_all_leaves_stats_untouched():
+	rules = ScoringRules({"rec": 1, "rec_yd": 0.1})
+	week_stats = {"1": {"rec": 5, "rec_yd": 50}, "2": {"rec": 1}}
+	assert rules.score_all(week_stats) == {"1": 10, "2": 1}
+	assert rules.score_all(week_stats, ["2", "3"]) == {"2": 1, "3": 0}
+	assert "pts_custom" not in week_stats["1"]
+
+def test_key_is_the_same_for_the_same_scoring():
+	rules = ScoringRules({"rec": 1, "rec_yd": 0.1})
+	assert ScoringRules({"rec_yd": 0.1, "rec": 1.0, "pass_td": 0}).key == rules.key
+	assert ScoringRules({"rec": 0.5, "rec_yd": 0.1}).key != rules.key
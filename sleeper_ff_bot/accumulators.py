@@ -0,0 +1,196 @@
+import base64
+import math
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from sleeper_wrapper.base_api import bind_thread_state
+
+"""
+Season-to-date fantasy points, kept as dense arrays instead of re-summing weekly stats or downloading the full
+season stats payload.
+
+Every player gets a slot the first time they appear. Each week is one float column over the slots, NaN where the
+player had no stat line (a bye or an inactive, not a zero), and season totals and games played are running sums over
+the columns. A week is added once; only the weeks stat corrections may still touch are replaced on the next update.
+Finished weeks are persisted, so a restart only fetches the weeks that are not final yet.
+"""
+
+
+def _encode(values):
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def _decode(typecode, data):
+    values = array(typecode)
+    values.frombytes(base64.b64decode(data))
+    return values
+
+
+class SeasonAccumulator:
+    def __init__(self, rules, season):
+        """
+        :param rules: ScoringRules the points are scored with
+        :param season: Int season
+        """
+        self.rules = rules
+        self.season = season
+        self.player_ids = []
+        self.slots = {}
+        # week -> array("f") of points per slot
+        self.weeks = {}
+        self.final_weeks = set()
+        self.totals = array("d")
+        self.games = array("H")
+
+    def _slot(self, player_id):
+        slot = self.slots.get(player_id)
+        if slot is None:
+            slot = self.slots[player_id] = len(self.player_ids)
+            self.player_ids.append(player_id)
+            self.totals.append(0.0)
+            self.games.append(0)
+            for column in self.weeks.values():
+                column.append(math.nan)
+        return slot
+
+    def add_week(self, week, week_stats, final=True):
+        """
+        Adds a week's points, replacing the week if it was added before and was not final.
+        :param week: Int week
+        :param week_stats: Dict {player_id: stats} from Stats.get_week_stats
+        :param final: Boolean False while stat corrections may still change the week
+        :return: Boolean True if the week was added
+        """
+        if week in self.final_weeks or not week_stats:
+            return False
+        self._remove_week(week)
+        points = self.rules.score_all(week_stats)
+        for player_id in points:
+            self._slot(player_id)
+        column = array("f", [math.nan]) * len(self.player_ids)
+        for player_id, player_points in points.items():
+            slot = self.slots[player_id]
+            column[slot] = player_points
+            self.totals[slot] += column[slot]
+            self.games[slot] += 1
+        self.weeks[week] = column
+        if final:
+            self.final_weeks.add(week)
+        return True
+
+    def _remove_week(self, week):
+        column = self.weeks.pop(week, None)
+        if column is None:
+            return
+        for slot, player_points in enumerate(column):
+            if not math.isnan(player_points):
+                self.totals[slot] -= player_points
+                self.games[slot] -= 1
+
+    def total(self, player_id):
+        """
+        :return: Float season points to date, 0 for a player without a stat line
+        """
+        slot = self.slots.get(player_id)
+        return self.totals[slot] if slot is not None else 0.0
+
+    def average(self, player_id):
+        """
+        :return: Float points per game played, 0 for a player without a stat line
+        """
+        slot = self.slots.get(player_id)
+        return self.totals[slot] / self.games[slot] if slot is not None and self.games[slot] else 0.0
+
+    def recent(self, player_id, weeks):
+        """
+        :param player_id: String player_id
+        :param weeks: Int number of the latest weeks to look at
+        :return: List of the player's points in those weeks, skipping weeks without a stat line
+        """
+        slot = self.slots.get(player_id)
+        if slot is None:
+            return []
+        latest = sorted(self.weeks)[-weeks:] if weeks > 0 else []
+        return [self.weeks[week][slot] for week in latest if not math.isnan(self.weeks[week][slot])]
+
+    def totals_for(self, player_ids):
+        """
+        :return: Dict {player_id: season points to date} for the player_ids that have a stat line
+        """
+        return {player_id: self.totals[self.slots[player_id]] for player_id in player_ids if player_id in self.slots}
+
+    def to_dict(self):
+        """
+        :return: Dict of the final weeks only, JSON serializable
+        """
+        return {"season": self.season, "player_ids": self.player_ids,
+                "weeks": {str(week): _encode(self.weeks[week]) for week in sorted(self.final_weeks)}}
+
+    @classmethod
+    def from_dict(cls, rules, payload):
+        accumulator = cls(rules, payload["season"])
+        accumulator.player_ids = list(payload["player_ids"])
+        accumulator.slots = {player_id: slot for slot, player_id in enumerate(accumulator.player_ids)}
+        accumulator.totals = array("d", bytes(8 * len(accumulator.player_ids)))
+        accumulator.games = array("H", bytes(2 * len(accumulator.player_ids)))
+        for week, data in payload["weeks"].items():
+            column = _decode("f", data)
+            # columns of earlier weeks were saved before later players got their slots
+            column.extend([math.nan] * (len(accumulator.player_ids) - len(column)))
+            for slot, player_points in enumerate(column):
+                if not math.isnan(player_points):
+                    accumulator.totals[slot] += player_points
+                    accumulator.games[slot] += 1
+            accumulator.weeks[int(week)] = column
+            accumulator.final_weeks.add(int(week))
+        return accumulator
+
+
+class SeasonAccumulators:
+    def __init__(self, cache):
+        """
+        Every scoring system's SeasonAccumulator, shared by all the leagues that score the same way.
+        :param cache: DiskCache the final weeks are persisted to
+        """
+        self.cache = cache
+        # (rules key, season) -> SeasonAccumulator
+        self._accumulators = {}
+        self._lock = threading.Lock()
+        # (rules key, season) -> Lock, so one scoring system's weeks are fetched without holding up the others
+        self._key_locks = {}
+
+    def get(self, rules, season, current_week, fetch_week, max_workers=4):
+        """
+        Brings the season up to the current week and returns it. A week is final once stat corrections are done
+        with it, i.e. from the week after next on.
+        :param rules: ScoringRules of the league
+        :param season: Int season
+        :param current_week: Int current week; weeks before it are played
+        :param fetch_week: Callable taking a week and returning its stats, e.g. Stats.get_week_stats
+        :param max_workers: Int number of weeks fetched at once
+        :return: SeasonAccumulator
+        """
+        key = (rules.key, season)
+        cache_key = "season/{}/{}".format(season, key[0])
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            accumulator = self._accumulators.get(key)
+            if accumulator is None:
+                payload = self.cache.get(cache_key)
+                accumulator = SeasonAccumulator.from_dict(rules, payload) if payload else SeasonAccumulator(rules,
+                                                                                                            season)
+                with self._lock:
+                    self._accumulators[key] = accumulator
+
+            to_fetch = [week for week in range(1, current_week) if week not in accumulator.final_weeks]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                fetched = list(executor.map(bind_thread_state(fetch_week), to_fetch))
+            added_final = False
+            for week, week_stats in zip(to_fetch, fetched):
+                final = week < current_week - 1
+                if accumulator.add_week(week, week_stats, final) and final:
+                    added_final = True
+            if added_final:
+                self.cache.put(cache_key, accumulator.to_dict())
+            return accumulator
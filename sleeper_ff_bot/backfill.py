@@ -0,0 +1,124 @@
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from sleeper_wrapper import Transaction
+from sleeper_wrapper.base_api import bind_thread_state
+
+"""
+Season-wide transaction backfill and the FAAB / waiver analytics built on it.
+"""
+
+
+def fetch_season_transactions(league, current_week, cache, max_workers=8):
+    """
+    Fetches every week's transactions up to current_week concurrently. Weeks before current_week are finished and
+    never change, so they are cached permanently and only fetched once.
+    :param league: League
+    :param current_week: Int current week
+    :param cache: DiskCache for the finished weeks
+    :param max_workers: Int number of weeks to fetch at once
+    :return: Dict {week: [transaction, ...]}
+    """
+    weeks = {}
+    to_fetch = []
+    for week in range(1, current_week + 1):
+        cached = cache.get("transactions/{}/{}".format(league.league_id, week)) if week < current_week else None
+        if cached is None:
+            to_fetch.append(week)
+        else:
+            weeks[week] = cached
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fetched = executor.map(bind_thread_state(league.get_transactions), to_fetch)
+        for week, transactions in zip(to_fetch, fetched):
+            weeks[week] = transactions
+            # an empty list may be an error response, so it is never cached
+            if week < current_week and transactions:
+                cache.put("transactions/{}/{}".format(league.league_id, week), transactions)
+    return weeks
+
+
+class SeasonTransactionStats:
+    def __init__(self, transactions, waiver_budget=100):
+        """
+        :param transactions: Iterable of Transaction for the whole season
+        :param waiver_budget: Int FAAB every team starts the season with
+        """
+        self.waiver_budget = waiver_budget
+        self.faab_spent = defaultdict(int)
+        # FAAB received in trades less FAAB traded away
+        self.faab_traded = defaultdict(int)
+        self.waiver_claims = defaultdict(int)
+        self.waivers_won = defaultdict(int)
+        self.adds = defaultdict(int)
+        self.churn = Counter()
+
+        for t in transactions:
+            if t.type == "waiver" and t.roster_ids:
+                claimant = t.roster_ids[0]
+                self.waiver_claims[claimant] += 1
+                if t.status == "complete":
+                    self.waivers_won[claimant] += 1
+                    self.faab_spent[claimant] += t.waiver_bid or 0
+            if t.status != "complete":
+                continue
+            for budget in t.waiver_budget or ():
+                self.faab_traded[budget["receiver"]] += budget["amount"]
+                self.faab_traded[budget["sender"]] -= budget["amount"]
+            for player_id, roster_id in (t.adds or {}).items():
+                self.adds[roster_id] += 1
+                self.churn[player_id] += 1
+            for player_id in (t.drops or {}):
+                self.churn[player_id] += 1
+
+    @classmethod
+    def from_weeks(cls, weeks, waiver_budget=100):
+        """
+        :param weeks: Dict returned by fetch_season_transactions
+        :param waiver_budget: Int FAAB every team starts the season with
+        :return: SeasonTransactionStats
+        """
+        return cls((Transaction.from_json(t) for week in sorted(weeks) for t in weeks[week]), waiver_budget)
+
+    def faab_remaining(self, roster_id):
+        return self.waiver_budget - self.faab_spent[roster_id] + self.faab_traded[roster_id]
+
+    def waiver_hit_rate(self, roster_id):
+        """
+        :return: Float share of waiver claims that went through, or None if the team never put in a claim
+        """
+        claims = self.waiver_claims[roster_id]
+        return self.waivers_won[roster_id] / claims if claims else None
+
+    def most_churned(self, n=5):
+        """
+        :return: List [(player_id, times_added_or_dropped), ...]
+        """
+        return self.churn.most_common(n)
+
+
+def get_faab_report_string(season_stats, index, players):
+    """
+    Creates and returns the season FAAB and waiver report.
+    :param season_stats: SeasonTransactionStats
+    :param index: LeagueIndex
+    :param players: Dict {player_id: player}
+    :return: String message
+    """
+    lines = ["**================================**", "**FAAB & Waivers**", "**================================**", ""]
+    roster_ids = sorted(index.rosters, key=lambda roster_id: season_stats.faab_remaining(roster_id), reverse=True)
+    for roster_id in roster_ids:
+        hit_rate = season_stats.waiver_hit_rate(roster_id)
+        lines.append("**{}** ${} left (${} spent), {} adds, {} waiver hit rate".format(
+            index.team_name(roster_id, "Team NA"), season_stats.faab_remaining(roster_id),
+            season_stats.faab_spent[roster_id], season_stats.adds[roster_id],
+            "n/a" if hit_rate is None else "{:.0%}".format(hit_rate)))
+
+    churned = season_stats.most_churned()
+    if churned:
+        lines.append("")
+        lines.append("*Most churned players*")
+        for player_id, count in churned:
+            player = players.get(player_id)
+            name = "{} {}".format(player["first_name"], player["last_name"]) if player else player_id
+            lines.append("{} ({} moves)".format(name, count))
+    return "\n".join(lines) + "\n"
@@ -1,38 +1,238 @@
 import schedule
+import signal
+import sys
+import threading
 import time
 import datetime as dt
 import os
 import pendulum
 from discord import Discord
-from sleeper_wrapper import League, Stats, Players, State
+from accumulators import SeasonAccumulators
+from backfill import fetch_season_transactions, SeasonTransactionStats, get_faab_report_string
+from cache import DiskCache
+from bracket import fetch_playoffs, resolve_bracket, get_bracket_string
+from draft import (fetch_draft_picks, season_points, starters_per_position, expected_values, replacement_levels,
+                   DraftReportCard, get_draft_report_string)
+from executor import JobExecutor, PRIORITY_LIVE, PRIORITY_BACKFILL
+from history import load_history, get_all_time_string, get_head_to_head_string
+from interactions import WarmStore, InteractionHandler, make_server
+from lineups import LineupWatcher, kickoff_ahead, get_lineup_alert_string
+from timeline import ScoreTimelines, in_game_window, remaining_share, win_probability, get_comebacks_string
+from exposure import build_exposure_index, refresh_league, get_exposure_string
+from tracing import tracer_from_environment
+from score_tables import ScoreTables
+from trades import ProjectionTable, trade_sides, get_trade_string
+from trending import TrendingTracker, get_waiver_buzz_string
+from waivers import recommend, get_waiver_wire_string
+from snapshot import compact_players, save_snapshot, load_snapshot, dump_jobs, restore_jobs
+from sleeper_wrapper import (League, LeagueRegistry, Stats, Players, State, User, Matchup, Transaction, TokenBucket,
+                            UNCHANGED)
+from sleeper_wrapper.base_api import add_call_listener, add_thread_state_carrier, set_priority, set_rate_limiter
+from sleeper_wrapper.rate_limit import REQUESTS_PER_MINUTE
+
+# Tracing is off unless TRACE_FILE or TRACE_OTLP_ENDPOINT is set.
+tracer = tracer_from_environment()
+add_call_listener(tracer.record_call)
+# report builders fan Sleeper calls out to thread pools; their spans still belong to the job's trace
+add_thread_state_carrier(tracer.bind)
+tracer.instrument(League, ["get_rosters", "get_users", "get_matchups", "get_transactions", "get_scoreboards",
+                           "get_team_score", "get_standings"])
+tracer.instrument(Stats, ["get_week_stats", "get_week_projections"])
+
+"""
+Warm state shared by every job. It is filled lazily, or from a snapshot at boot.
+"""
+
+_state = None
+_players = {}
+# one League per league_id; its metadata, users and rosters load lazily and expire by League.MAX_AGES
+_leagues = LeagueRegistry()
+# league_id -> "created" timestamp (ms) of the newest transaction already posted
+_transaction_cursors = {}
+# held while _players or _transaction_cursors change, so a snapshot copies them whole
+_warm_lock = threading.Lock()
+# responses that never change, such as finished weeks' transactions
+_cache = DiskCache(os.environ.get("CACHE_DIR", "cache"))
+# the SLEEPER_USER's leagues, built on the first exposure report
+_exposure = None
+# league_id -> LeagueHistory of its finished seasons; they never change, so this is never invalidated
+_histories = {}
+# what slash commands answer from; kept warm by refresh_interactions
+_warm_store = WarmStore()
+# shared by every league, so trending players are polled once per hour however many leagues report them
+_trending = TrendingTracker()
+# starters hashes and alerts already sent, so game day polling only looks at rosters that changed
+_lineups = LineupWatcher()
+# every league's live score samples for this week and last
+_timelines = ScoreTimelines()
+# season-to-date points by scoring system, shared by every league that scores the same way
+_seasons = SeasonAccumulators(_cache)
+# each week's player points by scoring system, shared by every league that scores the same way
+_score_tables = ScoreTables(_cache)
+_projection_tables = ScoreTables(_cache, projections=True)
+# rest-of-season points by scoring system, rebuilt daily and shared by every league's trades
+_projections = ProjectionTable()
+
+
+def get_state():
+    """
+    Gets the shared season state, fetching it on first use.
+    :return: State
+    """
+    global _state
+    if _state is None:
+        _state = State()
+    return _state
+
+
+def get_players():
+    """
+    Gets the shared player index, fetching players/nfl on first use.
+    :return: Dict {player_id: player}
+    """
+    if not _players:
+        fresh_players = compact_players(Players().get_all_players())
+        with _warm_lock:
+            _players.update(fresh_players)
+    return _players
+
+
+def refresh_players():
+    """
+    Refetches players/nfl and swaps it into the shared player index in place.
+    :return: None
+    """
+    fresh_players = compact_players(Players().get_all_players())
+    if fresh_players:
+        # update before deleting so jobs reading the dict never see it empty
+        with _warm_lock:
+            _players.update(fresh_players)
+            for player_id in set(_players) - set(fresh_players):
+                del _players[player_id]
+
+
+def get_league(league_id):
+    """
+    Gets the shared League for a league_id. Nothing is fetched until its metadata, users or rosters are used.
+    :param league_id: Int league_id
+    :return: League
+    """
+    return _leagues.get(league_id)
+
+
+def export_warm_state():
+    """
+    Collects the in-memory state worth keeping across restarts.
+    :return: Dict of JSON serializable snapshot sections
+    """
+    # jobs keep running while the snapshot is taken
+    with _warm_lock:
+        players = dict(_players)
+        transaction_cursors = dict(_transaction_cursors)
+    # only what is in memory: this also runs in the SIGTERM handler, which must not wait on Sleeper
+    leagues = {league_id: league.loaded("league") for league_id, league in _leagues.items()}
+    return {
+        "state": _state.get_state() if _state is not None else None,
+        "players": players,
+        "leagues": {league_id: league for league_id, league in leagues.items() if league is not None},
+        "transaction_cursors": transaction_cursors,
+        "jobs": dump_jobs(schedule.jobs),
+        "trending": _trending.to_dict(),
+    }
+
+
+def import_warm_state(snapshot):
+    """
+    Restores the in-memory state from a snapshot. Scheduler bookkeeping is restored separately, once jobs exist.
+    :param snapshot: Dict returned by snapshot.load_snapshot
+    :return: None
+    """
+    global _state
+    if snapshot.get("state"):
+        _state = State(snapshot["state"])
+    with _warm_lock:
+        _players.update(snapshot.get("players") or {})
+        _transaction_cursors.update(snapshot.get("transaction_cursors") or {})
+    for league_id, league in (snapshot.get("leagues") or {}).items():
+        _leagues.get(league_id, league)
+    _trending.load(snapshot.get("trending") or {})
+
+
+def revalidate_warm_state(snapshot_path=None):
+    """
+    Refetches everything restored from a snapshot and swaps it in place, then writes a fresh snapshot.
+    :param snapshot_path: String path to save the refreshed snapshot to, or None to skip saving
+    :return: None
+    """
+    global _state
+    # the snapshot is serving in the meantime, so this must not take tokens from live calls
+    set_priority(PRIORITY_BACKFILL)
+    _state = State()
+    refresh_players()
+
+    _leagues.invalidate()
+    for league_id, league in _leagues.items():
+        league.get_league()
+
+    if snapshot_path:
+        save_snapshot(snapshot_path, export_warm_state())
+
 
 """
 These are all of the utility functions.
 """
 
 
-def get_league_scoreboards(league_id, week):
+@tracer.traced()
+def get_league_scoreboards(league_id, week, matchups=None, rosters=None):
     """
     Returns the scoreboards from the specified sleeper league.
     :param league_id: Int league_id
     :param week: Int week to get the scoreboards of
+    :param matchups: List of the week's matchups already fetched, or None to fetch them
+    :param rosters: List of the league's rosters already fetched, or None to fetch them
     :return: dictionary of the scoreboards; https://github.com/SwapnikKatkoori/sleeper-api-wrapper#get_scoreboards
     """
-    league = League(league_id)
-    matchups = league.get_matchups(week)
+    league = get_league(league_id)
+    if matchups is None:
+        matchups = league.get_matchups(week)
+    if not matchups:
+        return {}
     users = league.get_users()
-    rosters = league.get_rosters()
-    scoreboards = league.get_scoreboards(rosters, matchups, users, "pts_custom", week)
-    return scoreboards
+    if rosters is None:
+        rosters = league.get_rosters()
+    # one stats and one projections download per week for every league that scores the same way, not one per team
+    scoreboards = league.get_scoreboards(rosters, matchups, users, "pts_custom", week,
+                                         get_score_table(league, week), get_score_table(league, week, True))
+    if scoreboards is None:
+        return {}
+    # drop matchups missing a team, which Sleeper returns for byes and while a week is being set up
+    return {matchup_id: matchup for matchup_id, matchup in scoreboards.items() if len(matchup) == 2}
+
+
+def get_score_table(league, week, projected=False):
+    """
+    Gets the week's points of every player by the league's scoring, shared with the leagues that score the same way.
+    :param league: League
+    :param week: Int week
+    :param projected: Boolean True for the week's projected points
+    :return: Dict {player_id: points}; shared, so it must not be modified
+    """
+    tables = _projection_tables if projected else _score_tables
+    return tables.get(league.get_scoring_rules(), get_state().get_season_start_year(), week,
+                      final=week < get_current_week() - 1)
 
 
-def get_highest_score(league_id):
+@tracer.traced()
+def get_highest_score(league_id, week=None):
     """
     Gets the highest score of the week
     :param league_id: Int league_id
+    :param week: Int week, the current week if None
     :return: List [score, team_name]
     """
-    week = get_current_week()
+    if week is None:
+        week = get_current_week()
     scoreboards = get_league_scoreboards(league_id, week)
     max_score = [0, None]
 
@@ -52,13 +252,16 @@ def get_highest_score(league_id):
     return max_score
 
 
-def get_lowest_score(league_id):
+@tracer.traced()
+def get_lowest_score(league_id, week=None):
     """
     Gets the lowest score of the week
     :param league_id: Int league_id
+    :param week: Int week, the current week if None
     :return: List[score, team_name]
     """
-    week = get_current_week()
+    if week is None:
+        week = get_current_week()
     scoreboards = get_league_scoreboards(league_id, week)
     min_score = [999, None]
 
@@ -78,6 +281,7 @@ def get_lowest_score(league_id):
     return min_score
 
 
+@tracer.traced()
 def make_roster_dict(starters_list, bench_list):
     """
     Takes in a teams starter list and bench list and makes a dictionary with positions.
@@ -86,9 +290,9 @@ def make_roster_dict(starters_list, bench_list):
     :return: {starters:{position: []} , bench:{ position: []} }
     """
     week = get_current_week()
-    players = Players().get_all_players()
+    players = get_players()
     stats = Stats()
-    state = State()
+    state = get_state()
     week_stats = stats.get_week_stats("regular", state.get_season_start_year(), week)
 
     roster_dict = {"starters": {}, "bench": {}}
@@ -139,126 +343,63 @@ def get_highest_bench_points(bench_points):
     return max_tup
 
 
-def map_users_to_team_name(users):
-    """
-    Maps user_id to team_name
-    :param users:  https://docs.sleeper.app/#getting-users-in-a-league
-    :return: Dict {user_id:team_name}
-    """
-    users_dict = {}
-
-    # Maps the user_id to team name for easy lookup
-    for user in users:
-        try:
-            users_dict[user["user_id"]] = user["metadata"]["team_name"]
-        except:
-            users_dict[user["user_id"]] = user["display_name"]
-    return users_dict
-
-
-def map_roster_id_to_owner_id(league_id):
-    """
-
-    :return: Dict {roster_id: owner_id, ...}
-    """
-    league = League(league_id)
-    rosters = league.get_rosters()
-    result_dict = {}
-    for roster in rosters:
-        roster_id = roster["roster_id"]
-        owner_id = roster["owner_id"]
-        result_dict[roster_id] = owner_id
-
-    return result_dict
-
-
-def get_bench_points(league_id):
+@tracer.traced()
+def get_bench_points(league_id, week=None):
     """
 
     :param league_id: Int league_id
+    :param week: Int week, the current week if None
     :return: List [(team_name, score), ...]
     """
-    week = get_current_week()
+    if week is None:
+        week = get_current_week()
 
-    league = League(league_id)
-    scoring_settings = league.get_league_scoring_settings()
-    users = league.get_users()
-    matchups = league.get_matchups(week)
-
-    stats = Stats()
-    state = State()
-    # WEEK STATS NEED TO BE FIXED
-    week_stats = stats.get_week_stats("regular", state.get_season_start_year(), week)
+    league = get_league(league_id)
+    index = league.get_index()
+    matchups = [Matchup.from_json(matchup) for matchup in league.get_matchups(week)]
+    points = get_score_table(league, week)
 
-    owner_id_to_team_dict = map_users_to_team_name(users)
-    roster_id_to_owner_id_dict = map_roster_id_to_owner_id(league_id)
     result_list = []
 
     for matchup in matchups:
-        starters = matchup["starters"]
-        all_players = matchup["players"]
-        bench = set(all_players) - set(starters)
-
-        socal_points = 0
-        for player in bench:
-            try:
-                socal_points += stats.get_player_week_stats(week_stats, player, scoring_settings)["pts_custom"]
-            except:
-                continue
-        owner_id = roster_id_to_owner_id_dict[matchup["roster_id"]]
-        if owner_id is None:
-            team_name = "Team name not available"
-        else:
-            team_name = owner_id_to_team_dict[owner_id]
+        socal_points = sum(points.get(player, 0.0) for player in matchup.bench())
+        team_name = index.team_name(matchup.roster_id, "Team name not available")
         result_list.append((team_name, socal_points))
 
     return result_list
 
 
-def get_negative_starters(league_id):
+@tracer.traced()
+def get_negative_starters(league_id, week=None):
     """
     Finds all of the players that scores negative points in standard and
     :param league_id: Int league_id
+    :param week: Int week, the current week if None
     :return: Dict {"owner_name":[("player_name", std_score), ...], "owner_name":...}
     """
-    week = get_current_week()
-
-    league = League(league_id)
-    users = league.get_users()
-    matchups = league.get_matchups(week)
+    if week is None:
+        week = get_current_week()
 
-    stats = Stats()
-    state = State()
-    # WEEK STATS NEED TO BE FIXED
-    week_stats = stats.get_week_stats("regular", state.get_season_start_year(), week)
+    league = get_league(league_id)
+    index = league.get_index()
+    matchups = [Matchup.from_json(matchup) for matchup in league.get_matchups(week)]
+    points = get_score_table(league, week)
 
-    players = Players()
-    players_dict = players.get_all_players()
-    owner_id_to_team_dict = map_users_to_team_name(users)
-    roster_id_to_owner_id_dict = map_roster_id_to_owner_id(league_id)
+    players_dict = get_players()
 
     result_dict = {}
 
     for i, matchup in enumerate(matchups):
-        starters = matchup["starters"]
         negative_players = []
-        for starter_id in starters:
-            try:
-                std_pts = week_stats[str(starter_id)]["pts_custom"]
-            except KeyError:
-                std_pts = 0
+        for starter_id in matchup.starters:
+            std_pts = points.get(str(starter_id), 0)
             if std_pts < 0:
                 player_info = players_dict[starter_id]
                 player_name = "{} {}".format(player_info["first_name"], player_info["last_name"])
                 negative_players.append((player_name, std_pts))
 
         if len(negative_players) > 0:
-            owner_id = roster_id_to_owner_id_dict[matchup["roster_id"]]
-
-            if owner_id is None:
-                team_name = "Team name not available" + str(i)
-            else:
-                team_name = owner_id_to_team_dict[owner_id]
+            team_name = index.team_name(matchup.roster_id, "Team name not available" + str(i))
             result_dict[team_name] = negative_players
     return result_dict
 
@@ -273,13 +414,14 @@ def check_starters_and_bench(lineup_dict):
         pass
 
 
+@tracer.traced()
 def get_current_week():
     """
     Gets the current week.
     :return: Int current week
     """
     today = pendulum.today()
-    state = State()
+    state = get_state()
     starting_week = pendulum.datetime(state.get_season_start_year(), state.get_season_start_month(), state.get_season_start_day())
     week = today.diff(starting_week).in_weeks()
     return week + 1
@@ -295,7 +437,7 @@ def get_welcome_string():
     Creates and returns the welcome message
     :return: String welcome message
     """
-    state = State()
+    state = get_state()
     welcome_message = "👋 Hello, I am Sleeper Bot! \n\nThe bot schedule for the {} ff season can be found here: ".format(
         state.get_season_start_year())
     welcome_message += "https://github.com/cyrusfarsoudi/sleeper-ff-bot#current-schedule \n\n"
@@ -314,14 +456,24 @@ def send_any_string(string_to_send):
     return string_to_send
 
 
-def get_matchups_string(league_id):
+@tracer.traced()
+def get_matchups_string(league_id, week=None):
     """
     Creates and returns a message of the current week's matchups.
     :param league_id: Int league_id
+    :param week: Int week, the current week if None
     :return: string message of the current week mathchups.
     """
-    week = get_current_week()
+    if week is None:
+        week = get_current_week()
     scoreboards = get_league_scoreboards(league_id, week)
+    league = get_league(league_id)
+    owners = {roster.roster_id: roster.owner_id for roster in league.get_index().rosters.values()}
+    # owner ids in scoreboard order, since head-to-head records follow owners across seasons
+    matchup_owners = {}
+    for matchup in league.get_matchups(week) or []:
+        matchup_owners.setdefault(matchup.get("matchup_id"), []).append(owners.get(matchup["roster_id"]))
+    history = get_history(league_id)
     final_message_string = "**===============================**\n"
     final_message_string += "**Matchups for Week {}**\n".format(week)
     final_message_string += "**===============================**\n\n"
@@ -329,58 +481,85 @@ def get_matchups_string(league_id):
     for i, matchup_id in enumerate(scoreboards):
         matchup = scoreboards[matchup_id]
         matchup_string = "*Matchup {}*:\n".format(i + 1)
-        matchup_string += "**{}** vs. **{}** \n\n".format(matchup[0][0], matchup[1][0])
-        final_message_string += matchup_string
+        matchup_string += "**{}** vs. **{}** \n".format(matchup[0][0], matchup[1][0])
+        pair = tuple(matchup_owners.get(matchup_id, ()))
+        if pair in history.head_to_head():
+            matchup_string += get_head_to_head_string(history, *pair)
+        final_message_string += matchup_string + "\n"
 
     return final_message_string
 
 
-def get_playoff_bracket_string(league_id):
+@tracer.traced()
+def get_playoff_bracket_string(league_id, week=None):
     """
-    Creates and returns a message of the league's playoff bracket.
+    Creates and returns a message of the league's winners and losers brackets, with each round's scores so far.
+    Returns an empty string before the playoffs, so nothing is sent.
     :param league_id: Int league_id
+    :param week: Int week to show the bracket as of, the current week if None
     :return: string message league's playoff bracket
     """
-    league = League(league_id)
-    bracket = league.get_playoff_winners_bracket()
-    return bracket
-
-
-def get_scores_string(league_id):
+    league = get_league(league_id)
+    if week is None:
+        week = get_current_week()
+    settings = league.get_league().get("settings") or {}
+    if week < (settings.get("playoff_week_start") or 15):
+        return ""
+    winners, losers, points = fetch_playoffs(league, week, _cache)
+    return get_bracket_string(resolve_bracket(winners, settings, points), resolve_bracket(losers, settings, points),
+                              league.get_index())
+
+
+@tracer.traced()
+def get_scores_string(league_id, week=None):
     """
     Creates and returns a message of the league's current scores for the current week.
     :param league_id: Int league_id
+    :param week: Int week, the current week if None
     :return: string message of the current week's scores
     """
-    week = get_current_week()
-    scoreboards = get_league_scoreboards(league_id, week)
-    final_message_string = "**================================**\n"
-    final_message_string += "**Scores**\n"
-    final_message_string += "**================================**\n\n"
-    for i, matchup_id in enumerate(scoreboards):
-        matchup = scoreboards[matchup_id]
-        first_score = ""
-        second_score = 0
-        if matchup[0][1] is not None:
-            first_score = '{0:.2f}'.format(matchup[0][1]) + " (" + '{0:.2f}'.format(matchup[0][2]) + ")"
-        if matchup[1][1] is not None:
-            second_score = '{0:.2f}'.format(matchup[1][1]) + " (" + '{0:.2f}'.format(matchup[1][2]) + ")"
-        string_to_add = "*Matchup {}*\n**{}** {}\n**{}** {}\n\n".format(i + 1, matchup[0][0], first_score,
-                                                                                matchup[1][0], second_score)
-        final_message_string += string_to_add
+    if week is None:
+        week = get_current_week()
+    return render_scores_string(get_league_scoreboards(league_id, week), "Scores")
 
-    return final_message_string
 
-
-def get_close_games_string(league_id, close_num):
+def render_scores_string(scoreboards, title, live=False):
+    """
+    Renders scoreboards as a scores message, built as a list of lines joined once.
+    :param scoreboards: Dict returned by get_league_scoreboards
+    :param title: String title of the message
+    :param live: Boolean True to show each team's win probability from the points its starters have left
+    :return: string message of the scores
+    """
+    lines = ["**================================**", "**{}**".format(title), "**================================**", ""]
+    for i, matchup in enumerate(scoreboards.values()):
+        lines.append("*Matchup {}*".format(i + 1))
+        probabilities = (None, None)
+        if live:
+            probability = win_probability(matchup[0][1], matchup[0][3], matchup[1][1], matchup[1][3])
+            probabilities = (probability, 1 - probability)
+        for (team_name, score, projected, _), probability in zip(matchup, probabilities):
+            line = "**{}** {}".format(team_name, "" if score is None else "{:.2f} ({:.2f})".format(score, projected))
+            if probability is not None:
+                line += " {:.0f}%".format(100 * probability)
+            lines.append(line)
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+@tracer.traced()
+def get_close_games_string(league_id, close_num, week=None):
     """
     Creates and returns a message of the league's close games.
     :param league_id: Int league_id
     :param close_num: Int what poInt difference is considered a close game.
+    :param week: Int week, the current week if None
     :return: string message of the current week's close games.
     """
-    league = League(league_id)
-    week = get_current_week()
+    league = get_league(league_id)
+    current_week = get_current_week()
+    if week is None:
+        week = current_week
     scoreboards = get_league_scoreboards(league_id, week)
     close_games = league.get_close_games(scoreboards, close_num)
 
@@ -388,24 +567,36 @@ def get_close_games_string(league_id, close_num):
     final_message_string += "**Close games**\n"
     final_message_string += "**================================**\n\n"
 
+    # once the week's games are over its win probabilities are settled, whatever inactive starters were projected
+    settled = week < current_week or remaining_share(dt.datetime.utcnow()) == 0.0
     for i, matchup_id in enumerate(close_games):
         matchup = close_games[matchup_id]
-        string_to_add = "*Matchup {}*\n**{} {:.2f}** ({:.2f})\n**{} {:.2f}** ({:.2f})\n\n".format(i + 1, matchup[0][0], matchup[0][1], matchup[0][2],
-                                                                                matchup[1][0], matchup[1][1], matchup[1][2])
+        left = (0.0, 0.0) if settled else (matchup[0][3], matchup[1][3])
+        probability = win_probability(matchup[0][1], left[0], matchup[1][1], left[1])
+        string_to_add = "*Matchup {}*\n**{} {:.2f}** ({:.2f}) {:.0f}%\n**{} {:.2f}** ({:.2f}) {:.0f}%\n\n".format(
+            i + 1, matchup[0][0], matchup[0][1], matchup[0][2], 100 * probability,
+            matchup[1][0], matchup[1][1], matchup[1][2], 100 * (1 - probability))
         final_message_string += string_to_add
     return final_message_string
 
 
-def get_standings_string(league_id):
+@tracer.traced()
+def get_standings_string(league_id, week=None):
     """
     Creates and returns a message of the league's standings.
     :param league_id: Int league_id
+    :param week: Int week to show the standings after, tallied from the matchups up to it; the latest if None
     :return: string message of the leagues standings.
     """
-    league = League(league_id)
+    league = get_league(league_id)
     rosters = league.get_rosters()
     users = league.get_users()
-    standings = league.get_standings(rosters, users)
+    weeks_matchups = None
+    if week is not None:
+        # playoff games do not count towards the standings
+        playoff_week_start = league.get_league().get("settings", {}).get("playoff_week_start") or week + 1
+        weeks_matchups = [league.get_matchups(w) for w in range(1, min(week + 1, playoff_week_start))]
+    standings = league.get_standings(rosters, users, weeks_matchups)
     final_message_string = "**================================**\n"
     final_message_string += "**Standings **\n"
     final_message_string += "**================================**\n\n"
@@ -424,20 +615,24 @@ def get_standings_string(league_id):
     return final_message_string
 
 
-def get_best_and_worst_string(league_id):
+@tracer.traced()
+def get_best_and_worst_string(league_id, week=None):
     """
     :param league_id: Int league_id
+    :param week: Int week, the current week if None
     :return: String of the highest Scorer, lowest scorer, most points left on the bench, and Why bother section.
     """
+    if week is None:
+        week = get_current_week()
     final_message_string = "**================================**\n"
     final_message_string += "**Highlights**\n"
     final_message_string += "**================================**\n\n"
 
-    highest_scorer = get_highest_score(league_id)[1]
-    highest_score = get_highest_score(league_id)[0]
+    highest_scorer = get_highest_score(league_id, week)[1]
+    highest_score = get_highest_score(league_id, week)[0]
     highest_score_emojis = "<a:eggplantjerkoff:887917138394902530>"
-    lowest_scorer = get_lowest_score(league_id)[1]
-    lowest_score = get_lowest_score(league_id)[0]
+    lowest_scorer = get_lowest_score(league_id, week)[1]
+    lowest_score = get_lowest_score(league_id, week)[0]
     lowest_score_emojis = "<:KekYou:741822317419823244>"
     final_message_string += "{} **Highest Scorer** {}\n{}\n*{:.2f}*\n\n{} **Lowest Scorer** {}\n{}\n*{:.2f}*\n\n".format(highest_score_emojis,
                                                                                                  highest_score_emojis,
@@ -448,13 +643,13 @@ def get_best_and_worst_string(league_id):
                                                                                                  lowest_scorer,
                                                                                                  lowest_score)
     highest_bench_score_emojis = "<:kekw:887913461294723182>"
-    bench_points = get_bench_points(league_id)
+    bench_points = get_bench_points(league_id, week)
     largest_scoring_bench = get_highest_bench_points(bench_points)
     final_message_string += "{} **Most points left on the bench** {}\n{}\n*{:.2f}*\n\n".format(highest_bench_score_emojis,
                                                                                            highest_bench_score_emojis,
                                                                                            largest_scoring_bench[0],
                                                                                            largest_scoring_bench[1])
-    negative_starters = get_negative_starters(league_id)
+    negative_starters = get_negative_starters(league_id, week)
     if negative_starters:
         final_message_string += "🤔🤔Why bother?\n"
 
@@ -467,6 +662,157 @@ def get_best_and_worst_string(league_id):
     return final_message_string
 
 
+@tracer.traced()
+def get_trending_string(league_id):
+    """
+    Creates and returns a message of the trending adds and drops that moved since the last poll, flagging the ones
+    that are free agents in this league.
+    :param league_id: Int league_id
+    :return: string message of the waiver buzz, or None if nobody moved
+    """
+    movers = _trending.poll_if_stale()
+    return get_waiver_buzz_string(movers, get_players(), get_league(league_id).get_index())
+
+
+@tracer.traced()
+def get_transaction_report_string(league_id):
+    """
+    Creates and returns a message of each team's FAAB, adds and waiver hit rate, and the most churned players.
+    Finished weeks come from the cache, so only the current week is fetched after the first run.
+    :param league_id: Int league_id
+    :return: string message of the season transaction report
+    """
+    league = get_league(league_id)
+    weeks = fetch_season_transactions(league, get_current_week(), _cache)
+    waiver_budget = league.get_league().get("settings", {}).get("waiver_budget", 100)
+    season_stats = SeasonTransactionStats.from_weeks(weeks, waiver_budget)
+    return get_faab_report_string(season_stats, league.get_index(), get_players())
+
+
+@tracer.traced()
+def get_waiver_recommendations_string(league_id, recent=3):
+    """
+    Creates and returns the best free agents at each position and the teams they would upgrade, valued with the
+    league's scoring on next week's projections and the last few weeks of production.
+    :param league_id: Int league_id
+    :param recent: Int number of finished weeks to average
+    :return: string message of the waiver recommendations
+    """
+    week = get_current_week()
+    season = get_state().get_season_start_year()
+    league = get_league(league_id)
+    rules = league.get_scoring_rules()
+    stats = Stats()
+    projections = stats.get_week_projections("regular", season, week + 1)
+    # shared with the draft report card; only the weeks not final yet are fetched again
+    accumulator = _seasons.get(rules, season, week + 1, lambda w: stats.get_week_stats("regular", season, w))
+    players = get_players()
+    index = league.get_index()
+    recommendations = recommend(players, index, rules, projections, accumulator, recent)
+    return get_waiver_wire_string(recommendations, index, players, week + 1)
+
+
+@tracer.traced()
+def get_draft_report_card_string(league_id):
+    """
+    Creates and returns the draft report card: team grades, steals and busts by the league's scoring, on points to
+    date plus the season projection for the weeks left. The draft and finished weeks come from the cache.
+    :param league_id: Int league_id
+    :return: string message of the draft report card
+    """
+    week = get_current_week()
+    season = get_state().get_season_start_year()
+    league = get_league(league_id)
+    picks = fetch_draft_picks(league, _cache)
+    rules = league.get_scoring_rules()
+    # the whole pool, not just the drafted players: replacement level is set by the best players left undrafted
+    points = season_points(_seasons, rules, None, season, week)
+    values = expected_values(rules, Stats().get_all_projections("regular", season), points, week)
+
+    players = get_players()
+    index = league.get_index()
+    positions = {player_id: player["position"] for player_id, player in players.items()}
+    starters = starters_per_position(league.get_league().get("roster_positions"))
+    replacement = replacement_levels(values, positions, starters, len(index.rosters))
+    return get_draft_report_string(DraftReportCard(picks, values, positions, replacement), index, players)
+
+
+@tracer.traced()
+def get_exposure_report_string(username):
+    """
+    Creates and returns a message of the players a user rosters across all of their leagues, and which of their
+    starters are on bye or ruled out this week.
+    :param username: String Sleeper username or user_id
+    :return: string message of the user's exposure
+    """
+    global _exposure
+    user = User(username)
+    season = get_state().get_season_start_year()
+    _exposure = build_exposure_index(user, season, index=_exposure)
+    return get_exposure_string(_exposure, get_players(), season, get_current_week())
+
+
+def get_history(league_id):
+    """
+    Gets the all-time history of a league, backfilling its past seasons into the cache on first use.
+    :param league_id: Int league_id
+    :return: LeagueHistory
+    """
+    league_id = str(league_id)
+    if league_id not in _histories:
+        _histories[league_id] = load_history(get_league(league_id).get_league(), _cache)
+        _warm_store.update_history(league_id, _histories[league_id])
+    return _histories[league_id]
+
+
+@tracer.traced()
+def get_history_string(league_id):
+    """
+    Creates and returns a message of the league's champions and all-time records.
+    :param league_id: Int league_id
+    :return: string message of the league history
+    """
+    return get_all_time_string(get_history(league_id))
+
+
+@tracer.traced()
+def get_season_opener_history_string(league_id):
+    """
+    Creates and returns the league history message in the week the season starts, and nothing later in the season.
+    :param league_id: Int league_id
+    :return: string message of the league history, or an empty string
+    """
+    if get_current_week() > 1:
+        return ""
+    return get_history_string(league_id)
+
+
+def refresh_interactions(league_id):
+    """
+    Recomputes the state slash commands are answered from, so commands never call Sleeper themselves.
+    :param league_id: Int league_id
+    :return: None
+    """
+    week = get_current_week()
+    league = get_league(league_id)
+    rosters = league.get_rosters(if_changed="interactions")
+    matchups = league.get_matchups(week, if_changed="interactions")
+    warm = _warm_store.leagues.get(str(league_id))
+    if rosters is UNCHANGED and matchups is UNCHANGED and warm is not None and warm.week == week:
+        return
+    # only a part reported unchanged is asked for again: the rosters from the League's copy, the matchups on a 304
+    if rosters is UNCHANGED:
+        rosters = league.get_rosters()
+    if matchups is UNCHANGED:
+        matchups = league.get_matchups(week)
+    users = league.get_users()
+    scoreboards = get_league_scoreboards(league_id, week, matchups, rosters)
+    _warm_store.update_players(get_players())
+    _warm_store.update_league(league_id, week, league.get_index(rosters, users), scoreboards,
+                              league.get_standings(rosters, users))
+    league.mark_consumed("interactions")
+
+
 def get_bench_beats_starters_string(league_id):
     """
     Gets all bench players that outscored starters at their position.
@@ -474,7 +820,7 @@ def get_bench_beats_starters_string(league_id):
     :return: String teams which had bench players outscore their starters in a position.
     """
     week = get_current_week()
-    league = League(league_id)
+    league = get_league(league_id)
     matchups = league.get_matchups(week)
 
     final_message_string = "________________________________\n"
@@ -486,49 +832,159 @@ def get_bench_beats_starters_string(league_id):
         all_players = matchup["players"]
         bench = set(all_players) - set(starters)
 
-def process_transactions(league_id, players, bot, time_delta=60):
+
+@tracer.traced()
+def check_lineups(league_id, bot):
+    """
+    Sends one alert per team with an empty starting slot or a starter on bye or ruled out. Does nothing unless a
+    kickoff is coming up, and only checks the rosters whose starters changed since the last run.
+    :param league_id: Int league_id
+    :param bot: BotInterface to send the alerts with
+    :return: None
+    """
+    if not kickoff_ahead(dt.datetime.utcnow()):
+        return
+    league = get_league(league_id)
+    rosters = league.get_rosters(if_changed="lineups")
+    if rosters is UNCHANGED:
+        # the watcher still rechecks its last rosters if a player's status changed
+        rosters = None
+    elif not rosters:
+        return
+    players = get_players()
+    alerts = _lineups.check(league, rosters, players, get_state().get_season_start_year(), get_current_week())
+    if alerts:
+        index = league.get_index()
+        for roster_id, problems in alerts.items():
+            bot.send_message(get_lineup_alert_string(index.team_name(roster_id, "Team NA"), problems, players))
+    league.mark_consumed("lineups")
+
+
+@tracer.traced()
+def sample_scores(league_id, bot=None):
+    """
+    Adds the league's current scores to its matchup timelines and, given a bot, keeps the week's live scores message
+    up to date. Does nothing outside the game windows.
+    :param league_id: Int league_id
+    :param bot: BotInterface to edit the live scores message with, or None
+    :return: None
+    """
+    if not in_game_window(dt.datetime.utcnow()):
+        return
     week = get_current_week()
-    league = League(league_id)
-    transactions = league.get_transactions(week)
-    users = league.get_users()
+    scoreboards = get_league_scoreboards(league_id, week)
+    _timelines.record(league_id, week, scoreboards)
+    if bot is not None:
+        bot.send_live("scores/{}".format(week), render_scores_string, scoreboards, "Live scores, week {}".format(week),
+                      True)
+
+
+@tracer.traced()
+def get_comebacks_report_string(league_id):
+    """
+    Creates and returns a message of the week's biggest comebacks, from the sampled score timelines.
+    :param league_id: Int league_id
+    :return: string message of the comebacks
+    """
+    week = get_current_week()
+    return get_comebacks_string(_timelines.week_summary(league_id, week), week)
 
-    owner_id_to_team_dict = map_users_to_team_name(users)
-    roster_id_to_owner_id_dict = map_roster_id_to_owner_id(league_id)
 
-    for t in transactions:
-        transaction_time = t["created"] // 1000
-        if dt.datetime.now().timestamp() - transaction_time > time_delta:
+def get_rest_of_season_values(league):
+    """
+    Gets every player's rest-of-season points by the league's scoring, from a table built once a day.
+    :param league: League
+    :return: Dict {player_id: points}
+    """
+    season = get_state().get_season_start_year()
+    return _projections.get(league.get_scoring_rules(), season, get_current_week(),
+                            lambda: Stats().get_all_projections("regular", season))
+
+
+def _player_name(players, player_id):
+    # a player newer than the player index is named by id, rather than failing the post and retrying it forever
+    player = players.get(player_id) or {}
+    return "{} {}".format(player.get("first_name", ""), player.get("last_name", player_id)).strip()
+
+
+def _advance_transaction_cursor(league_id, created):
+    with _warm_lock:
+        _transaction_cursors[str(league_id)] = max(created, _transaction_cursors.get(str(league_id)) or 0)
+
+
+def restore_transaction_cursors(cursors):
+    """
+    Takes over transaction cursors saved by another process, e.g. the worker a league was moved from.
+    :param cursors: Dict {league_id: created} in ms
+    :return: None
+    """
+    for league_id, created in cursors.items():
+        _advance_transaction_cursor(league_id, created)
+
+
+@tracer.traced()
+def process_transactions(league_id, players, bot, time_delta=60):
+    """
+    Posts every transaction that has not been posted yet. The first run after a cold start (no cursor for the
+    league) only posts transactions from the last time_delta seconds.
+    :param league_id: Int league_id
+    :param players: Dict {player_id: player}
+    :param bot: BotInterface to send the messages with
+    :param time_delta: Int seconds to look back when there is no cursor
+    :return: None
+    """
+    week = get_current_week()
+    league = get_league(league_id)
+    raw_transactions = league.get_transactions(week, if_changed="transactions")
+    if raw_transactions is UNCHANGED:
+        return
+    transactions = [Transaction.from_json(t) for t in raw_transactions]
+    # only fetched once there is something to post
+    index = None
+
+    cursor = _transaction_cursors.get(str(league_id))
+    newest = max((t.created for t in transactions), default=None)
+    rosters_changed = cursor is not None and newest is not None and newest > cursor
+    if rosters_changed:
+        league.invalidate("rosters")
+
+    # oldest first, and the cursor only moves past a transaction once it is posted, so a failed post is retried
+    for t in sorted(transactions, key=lambda transaction: transaction.created):
+        if cursor is not None:
+            if t.created <= cursor:
+                continue
+        elif dt.datetime.now().timestamp() - t.created // 1000 > time_delta:
             continue
 
-        # need to wait to have trade data to develop against
-        if t["type"] == "trade":
+        if index is None:
+            index = league.get_index()
+        if t.type == "trade":
+            bot.send_message(get_trade_string(trade_sides(t), get_rest_of_season_values(league), index, players))
+            _advance_transaction_cursor(league_id, t.created)
             continue
 
         added_player_names = []
         dropped_player_names = []
-        team_name = ""
 
-        roster_id = t["roster_ids"][0]
-        owner_id = roster_id_to_owner_id_dict[roster_id]
-        team_name = owner_id_to_team_dict[owner_id]
+        team_name = index.team_name(t.roster_ids[0])
 
-        adds = t["adds"]
-        drops = t["drops"]
+        adds = t.adds
+        drops = t.drops
 
         if adds:
             for player_id in adds.keys():
-                added_player_names.append(players[player_id]["first_name"] + " " + players[player_id]["last_name"])
+                added_player_names.append(_player_name(players, player_id))
 
         if drops:
             for player_id in drops.keys():
-                dropped_player_names.append(players[player_id]["first_name"] + " " + players[player_id]["last_name"])
+                dropped_player_names.append(_player_name(players, player_id))
 
         final_message_string = "**================================**\n"
         final_message_string += "**Transaction **\n"
         final_message_string += "**================================**\n"
         final_message_string += f"**{team_name}**"
-        if t["type"] == "waiver":
-            bid = t["settings"]["waiver_bid"]
+        if t.type == "waiver":
+            bid = t.waiver_bid
             final_message_string += f" (*${bid}*)"
 
         for added_player in added_player_names:
@@ -537,6 +993,131 @@ def process_transactions(league_id, players, bot, time_delta=60):
             final_message_string += f"\n- {dropped_player}"
 
         bot.send_message(final_message_string)
+        _advance_transaction_cursor(league_id, t.created)
+
+    # everything up to the newest transaction is posted, or was too old to post on a cold start
+    if newest is not None:
+        _advance_transaction_cursor(league_id, newest)
+    if rosters_changed and _exposure is not None and str(league_id) in _exposure.my_rosters:
+        refresh_league(_exposure, league)
+    # only now, so transactions of a run that failed halfway are read again on the next
+    league.mark_consumed("transactions")
+
+
+def configure_rate_limiter():
+    """
+    Every Sleeper call takes a token from one bucket. RATE_LIMIT_FILE shares it with other bot processes on the host.
+    :return: None
+    """
+    set_rate_limiter(TokenBucket(per_minute=int(os.environ.get("RATE_LIMIT_PER_MINUTE", REQUESTS_PER_MINUTE)),
+                                 path=os.environ.get("RATE_LIMIT_FILE")))
+
+
+def restore_warm_state(snapshot_path):
+    """
+    Restores the warm state from the last run, if there is one, and refreshes it in the background.
+    :param snapshot_path: String path of the snapshot
+    :return: Dict snapshot, or None if there was none
+    """
+    snapshot = load_snapshot(snapshot_path)
+    if snapshot is not None:
+        import_warm_state(snapshot)
+        threading.Thread(target=revalidate_warm_state, args=(snapshot_path,), daemon=True).start()
+    return snapshot
+
+
+def schedule_league(executor, league_id, bot, close_num=20, suffix=""):
+    """
+    Schedules a league's posts and transaction polling, and backfills its history in the background.
+    :param executor: JobExecutor the jobs run on
+    :param league_id: Int league_id
+    :param bot: BotInterface the league's messages are sent with
+    :param close_num: Int point margin of a close game
+    :param suffix: String added to the job names, so several leagues can share an executor
+    :return: None
+    """
+    players_dict = get_players()
+
+    schedule.every(1).minute.do(executor.job("transactions" + suffix, process_transactions, league_id, players_dict,
+                                             bot, priority=PRIORITY_LIVE, deadline=50))
+    schedule.every(5).minutes.do(executor.job("lineups" + suffix, check_lineups, league_id, bot,
+                                              priority=PRIORITY_LIVE, deadline=240))  # Lineup alerts before kickoffs
+    live_bot = bot if os.environ.get("LIVE_SCORES_INTERVAL") else None
+    schedule.every(1).minute.do(executor.job("timeline" + suffix, sample_scores, league_id, live_bot,
+                                             priority=PRIORITY_LIVE,
+                                             deadline=50))  # Score timeline and live scores during games
+    schedule.every().thursday.at("19:00").do(executor.job("matchups" + suffix, bot.send, get_matchups_string,
+                                                          league_id, deadline=600))  # Matchups Thursday at 4:00 pm PT
+    schedule.every().wednesday.at("17:00").do(executor.job("history_post" + suffix, bot.send,
+                                                           get_season_opener_history_string, league_id,
+                                                           deadline=900))  # League history Wednesday of week 1
+    schedule.every().friday.at("12:00").do(executor.job("scores" + suffix, bot.send, get_scores_string, league_id,
+                                                        deadline=600))  # Scores Friday at 9 am PT
+    schedule.every().sunday.at("23:00").do(executor.job("close_games" + suffix, bot.send, get_close_games_string,
+                                                        league_id, close_num,
+                                                        deadline=600))  # Close games Sunday on 4:00 pm PT
+    schedule.every().sunday.at("23:05").do(executor.job("bracket" + suffix, bot.send, get_playoff_bracket_string,
+                                                        league_id, deadline=600))  # Live bracket Sunday at 4:05 pm PT
+    schedule.every().monday.at("12:00").do(executor.job("scores" + suffix, bot.send, get_scores_string, league_id,
+                                                        deadline=600))  # Scores Monday at 9 am PT
+    schedule.every().tuesday.at("15:00").do(executor.job("standings" + suffix, bot.send, get_standings_string,
+                                                         league_id, deadline=600))  # Standings Tuesday at 8:00 am PT
+    schedule.every().tuesday.at("15:01").do(executor.job("highlights" + suffix, bot.send, get_best_and_worst_string,
+                                                         league_id, deadline=900))  # Standings Tuesday at 8:01 am PT
+    schedule.every().tuesday.at("15:02").do(executor.job("comebacks" + suffix, bot.send, get_comebacks_report_string,
+                                                         league_id, deadline=900))  # Comebacks Tuesday at 8:02 am PT
+    schedule.every().tuesday.at("15:03").do(executor.job("bracket" + suffix, bot.send, get_playoff_bracket_string,
+                                                         league_id, deadline=900))  # Bracket Tuesday at 8:03 am PT
+    schedule.every().hour.do(executor.job("waiver_buzz" + suffix, bot.send, get_trending_string, league_id,
+                                          deadline=300))  # Waiver buzz every hour
+    schedule.every().tuesday.at("17:00").do(executor.job("waivers" + suffix, bot.send,
+                                                         get_waiver_recommendations_string, league_id,
+                                                         deadline=600))  # Waiver wire Tuesday at 10:00 am PT
+    schedule.every().wednesday.at("15:00").do(executor.job("draft" + suffix, bot.send, get_draft_report_card_string,
+                                                           league_id, priority=PRIORITY_BACKFILL,
+                                                           deadline=900))  # Draft report card Wednesday at 8:00 am PT
+    schedule.every().wednesday.at("16:00").do(executor.job("faab" + suffix, bot.send, get_transaction_report_string,
+                                                           league_id, priority=PRIORITY_BACKFILL,
+                                                           deadline=900))  # FAAB report Wednesday at 9:00 am PT
+
+    # backfill past seasons in the background so history lookups never wait on Sleeper
+    executor.submit("history" + suffix, get_history, (league_id,), PRIORITY_BACKFILL)
+
+
+def run_forever(executor, snapshot_path, snapshot=None):
+    """
+    Runs the scheduler until the process is stopped, saving a snapshot periodically and on SIGTERM.
+    :param executor: JobExecutor the jobs run on
+    :param snapshot_path: String path of the snapshot
+    :param snapshot: Dict snapshot restored at boot, to restore the jobs' bookkeeping from
+    :return: None
+    """
+    state = get_state()
+    starting_date = pendulum.datetime(state.get_season_start_year(), state.get_season_start_month(),
+                                      state.get_season_start_day())
+
+    # injury statuses feed the lineup alerts; Sleeper asks for players/nfl at most once a day
+    schedule.every().day.at("12:00").do(executor.job("players", refresh_players, priority=PRIORITY_BACKFILL,
+                                                     deadline=600))
+
+    if snapshot is not None:
+        restore_jobs(schedule.jobs, snapshot.get("jobs") or {})
+
+    # Heroku sends SIGTERM before every dyno restart; save on it as well as periodically.
+    schedule.every(10).minutes.do(executor.job("snapshot", lambda: save_snapshot(snapshot_path, export_warm_state()),
+                                               priority=PRIORITY_BACKFILL))
+
+    def save_and_exit(signum, frame):
+        save_snapshot(snapshot_path, export_warm_state())
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, save_and_exit)
+
+    while True:
+        if starting_date <= pendulum.today():
+            schedule.run_pending()
+        # run_pending only queues jobs on the executor, so polling often is cheap and keeps jobs on time
+        time.sleep(1)
 
 
 if __name__ == "__main__":
@@ -546,6 +1127,10 @@ if __name__ == "__main__":
     bot = None
 
     league_id = os.environ["LEAGUE_ID"]
+    snapshot_path = os.environ.get("SNAPSHOT_PATH", "snapshot.bin")
+
+    configure_rate_limiter()
+    snapshot = restore_warm_state(snapshot_path)
 
     # Check if the user specified the close game num. Default is 20.
     try:
@@ -553,30 +1138,24 @@ if __name__ == "__main__":
     except:
         close_num = 20
 
-    state = State()
-    starting_date = pendulum.datetime(state.get_season_start_year(), state.get_season_start_month(), state.get_season_start_day())
-
-
     webhook = os.environ["DISCORD_WEBHOOK"]
-    bot = Discord(webhook)
+    bot = Discord(webhook, int(os.environ.get("LIVE_SCORES_INTERVAL", 60)))
 
-    players = Players()
-    players_dict = players.get_all_players()
+    executor = JobExecutor(workers=int(os.environ.get("JOB_WORKERS", 4)), tracer=tracer)
 
     # bot.send(get_welcome_string)  # inital message to send
-    schedule.every(1).minute.do(process_transactions, league_id, players_dict, bot)
-    schedule.every().thursday.at("19:00").do(bot.send, get_matchups_string,
-                                             league_id)  # Matchups Thursday at 4:00 pm PT
-    schedule.every().friday.at("12:00").do(bot.send, get_scores_string, league_id)  # Scores Friday at 9 am PT
-    schedule.every().sunday.at("23:00").do(bot.send, get_close_games_string, league_id,
-                                           int(close_num))  # Close games Sunday on 4:00 pm PT
-    schedule.every().monday.at("12:00").do(bot.send, get_scores_string, league_id)  # Scores Monday at 9 am PT
-    schedule.every().tuesday.at("15:00").do(bot.send, get_standings_string,
-                                            league_id)  # Standings Tuesday at 8:00 am PT
-    schedule.every().tuesday.at("15:01").do(bot.send, get_best_and_worst_string,
-                                            league_id)  # Standings Tuesday at 8:01 am PT
-
-    while True:
-        if starting_date <= pendulum.today():
-            schedule.run_pending()
-        time.sleep(50)
+    schedule_league(executor, league_id, bot, int(close_num))
+    if os.environ.get("SLEEPER_USER"):
+        schedule.every().sunday.at("16:00").do(executor.job("exposure", bot.send, get_exposure_report_string,
+                                                            os.environ["SLEEPER_USER"],
+                                                            deadline=900))  # Exposure Sunday at 9:00 am PT
+
+    # Slash commands, answered from state refreshed every 5 minutes
+    if os.environ.get("INTERACTIONS_PORT"):
+        schedule.every(5).minutes.do(executor.job("interactions", refresh_interactions, league_id, deadline=280))
+        executor.submit("interactions", refresh_interactions, (league_id,))
+        server = make_server(InteractionHandler(_warm_store, league_id), int(os.environ["INTERACTIONS_PORT"]),
+                             os.environ["DISCORD_PUBLIC_KEY"])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    run_forever(executor, snapshot_path, snapshot)
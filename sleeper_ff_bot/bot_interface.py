@@ -1,3 +1,8 @@
+from sleeper_wrapper import BaseApi, DeadlineExceeded, SleeperUnavailable
+
+STALE_NOTE = "\n*Sleeper is not answering right now, so some of this may be out of date.*"
+
+
 class BotInterface:
     def __init__(self, bot_id):
         self.bot_id = bot_id
@@ -13,14 +18,41 @@ class BotInterface:
 
     def send(self, callback, *args):
         """
-
+        Calls the callback and sends the message it returns. Nothing is sent if the callback returns None or an
+        empty string. A message built from Sleeper responses kept from before an outage says so.
         :param callback: The callback function to call
         :param args: The arguments to the callback function
         :return: None
         """
+        # forget stale answers given to earlier jobs on this thread
+        BaseApi.pop_stale()
         try:
             message = callback(*args)
+        except (SleeperUnavailable, DeadlineExceeded):
+            # nothing to report on, and nothing the league needs to hear about; the job runs again on its next schedule
+            raise
         except Exception as err:
             message = "There was an error that occurred with the bot: {}\n\n".format(err)
             message += "Please report it at https://github.com/cyrusfarsoudi/sleeper-ff-bot/issues"
-        self.send_message(message)
+        else:
+            if message and BaseApi.pop_stale():
+                message += STALE_NOTE
+        if message:
+            self.send_message(message)
+
+    def send_live(self, key, callback, *args):
+        """
+        Keeps a message up to date for bots that can edit their messages. Bots that cannot only send the first one
+        for each key, rather than a new message on every update.
+        :param key: String name of the live message; a new key starts a new message
+        :param callback: The callback function to call
+        :param args: The arguments to the callback function
+        :return: None
+        """
+        sent = self.__dict__.setdefault("_live_sent", set())
+        if key in sent:
+            return
+        message = callback(*args)
+        if message:
+            sent.add(key)
+            self.send_message(message)
@@ -0,0 +1,136 @@
+from concurrent.futures import ThreadPoolExecutor
+from constants import NFL_WEEKS
+from sleeper_wrapper.base_api import bind_thread_state
+
+"""
+Playoff brackets: Sleeper's winners and losers brackets resolved into team names and per-round scores.
+
+A match only names its teams once they are known; until then it points at the match they come from, through t1_from
+and t2_from. Matches are resolved in round order so those references always point at a match already resolved.
+Both brackets and every playoff week played so far are fetched at once, and finished weeks come from the cache.
+"""
+
+PLACES = {1: "Championship", 3: "3rd place", 5: "5th place", 7: "7th place"}
+
+
+def round_weeks(settings, rounds):
+    """
+    :param settings: Dict league settings
+    :param rounds: Int number of rounds in the bracket
+    :return: Dict {round: [weeks]}; a round lasts two weeks if playoff_round_type says so
+    """
+    week = settings.get("playoff_week_start") or 15
+    round_type = settings.get("playoff_round_type") or 0
+    result = {}
+    for playoff_round in range(1, rounds + 1):
+        # 1: two week championship, 2: two weeks every round
+        length = 2 if round_type == 2 or (round_type == 1 and playoff_round == rounds) else 1
+        result[playoff_round] = list(range(week, week + length))
+        week += length
+    return result
+
+
+def fetch_playoffs(league, current_week, cache, max_workers=4):
+    """
+    Gets both brackets and the matchups of every playoff week up to the current one, concurrently. A week is cached
+    once stat corrections are done with it, i.e. from the week after next on.
+    :param league: League
+    :param current_week: Int current week
+    :param cache: DiskCache
+    :param max_workers: Int number of requests in flight at once
+    :return: Tuple (winners bracket, losers bracket, {week: {roster_id: points}})
+    """
+    start = (league.get_league().get("settings") or {}).get("playoff_week_start") or 15
+    points = {}
+    to_fetch = []
+    for week in range(start, min(current_week, NFL_WEEKS) + 1):
+        cached = cache.get("playoffs/{}/points/{}".format(league.league_id, week))
+        if cached is None:
+            to_fetch.append(week)
+        else:
+            points[week] = {int(roster_id): week_points for roster_id, week_points in cached.items()}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        winners = executor.submit(bind_thread_state(league.get_playoff_winners_bracket))
+        losers = executor.submit(bind_thread_state(league.get_playoff_losers_bracket))
+        fetched = executor.map(bind_thread_state(league.get_matchups), to_fetch)
+        for week, matchups in zip(to_fetch, fetched):
+            if not matchups:
+                continue
+            points[week] = {matchup["roster_id"]: matchup.get("points") or 0.0 for matchup in matchups}
+            if week < current_week - 1:
+                cache.put("playoffs/{}/points/{}".format(league.league_id, week), points[week])
+        return winners.result() or [], losers.result() or [], points
+
+
+def resolve_bracket(bracket, settings, points):
+    """
+    :param bracket: List of matches from League.get_playoff_winners_bracket or get_playoff_losers_bracket
+    :param settings: Dict league settings
+    :param points: Dict {week: {roster_id: points}} returned by fetch_playoffs
+    :return: List of match dicts in round order: {"round", "match", "place", "weeks", "teams": [(roster_id or
+        None, score or None, source) x2], "winner", "loser"}; source is ("w" or "l", match) for a team not known yet
+    """
+    rounds = max((match["r"] for match in bracket), default=0)
+    weeks = round_weeks(settings, rounds)
+    resolved = {}
+    for match in sorted(bracket, key=lambda m: (m["r"], m["m"])):
+        teams = []
+        for side in ("t1", "t2"):
+            roster_id = match.get(side)
+            source = None
+            if roster_id is None and match.get(side + "_from"):
+                source = next(iter(match[side + "_from"].items()))
+                previous = resolved.get(source[1])
+                if previous is not None:
+                    roster_id = previous["winner"] if source[0] == "w" else previous["loser"]
+            played = [points[week][roster_id] for week in weeks[match["r"]]
+                      if roster_id is not None and roster_id in points.get(week, {})]
+            teams.append((roster_id, sum(played) if played else None, None if roster_id is not None else source))
+        resolved[match["m"]] = {"round": match["r"], "match": match["m"], "place": match.get("p"),
+                                "weeks": weeks[match["r"]], "teams": teams,
+                                "winner": match.get("w"), "loser": match.get("l")}
+    return list(resolved.values())
+
+
+def _team(index, team, decided_winner):
+    roster_id, score, source = team
+    if roster_id is None:
+        if source is None:
+            return "Bye"
+        return "{} of match {}".format("Winner" if source[0] == "w" else "Loser", source[1])
+    name = index.team_name(roster_id, "Team NA")
+    if roster_id == decided_winner:
+        name = "**{}**".format(name)
+    return name if score is None else "{} {:.2f}".format(name, score)
+
+
+def _bracket_lines(title, matches, index):
+    lines = ["*{}*".format(title)]
+    current_round = None
+    for match in matches:
+        if match["round"] != current_round:
+            current_round = match["round"]
+            lines.append("Round {} (week {})".format(current_round, "-".join(str(week) for week in match["weeks"])))
+        label = PLACES.get(match["place"], "Match {}".format(match["match"]))
+        lines.append("{}: {} vs {}".format(label, _team(index, match["teams"][0], match["winner"]),
+                                           _team(index, match["teams"][1], match["winner"])))
+    return lines
+
+
+def get_bracket_string(winners, losers, index):
+    """
+    Creates and returns the playoff bracket message.
+    :param winners: List returned by resolve_bracket for the winners bracket
+    :param losers: List returned by resolve_bracket for the losers bracket
+    :param index: LeagueIndex of the league
+    :return: String message
+    """
+    lines = ["**================================**", "**Playoff Bracket**", "**================================**", ""]
+    if not winners:
+        return "\n".join(lines + ["The playoff bracket is not set yet."])
+    lines.extend(_bracket_lines("Winners bracket", winners, index))
+    if losers:
+        lines.append("")
+        lines.extend(_bracket_lines("Losers bracket", losers, index))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+"""
+A permanent on-disk cache for responses that never change, such as the transactions of a finished week.
+
+Besides plain keys, values can be stored by content: put_content returns the sha256 of the stored document, so the
+same payload is only ever written once, however many seasons or leagues refer to it.
+"""
+
+
+class DiskCache:
+    def __init__(self, directory):
+        """
+        :param directory: String directory to keep the cache in. Created on first write.
+        """
+        self.directory = directory
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + ".json.z")
+
+    def get(self, key, default=None):
+        """
+        :param key: String cache key, e.g. "transactions/<league_id>/3"
+        :param default: Value returned when the key is not cached
+        :return: The cached value, or default
+        """
+        try:
+            with open(self._path(key), "rb") as f:
+                return json.loads(zlib.decompress(f.read()).decode("utf-8"))
+        except (OSError, ValueError, zlib.error):
+            return default
+
+    def put(self, key, value):
+        """
+        Atomically stores a JSON serializable value.
+        :param key: String cache key
+        :param value: The value to store
+        :return: None
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8")))
+        os.replace(tmp_path, path)
+
+    def modified(self, key):
+        """
+        :param key: String cache key
+        :return: Float time the key was last written, or None if it is not cached
+        """
+        try:
+            return os.path.getmtime(self._path(key))
+        except OSError:
+            return None
+
+    def put_content(self, value):
+        """
+        Stores a JSON serializable value under the hash of its content.
+        :param value: The value to store
+        :return: String sha256 digest to read it back with get_content
+        """
+        data = json.dumps(value, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.directory, "objects", digest[:2], digest + ".json.z")
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(data))
+            os.replace(tmp_path, path)
+        return digest
+
+    def get_content(self, digest, default=None):
+        """
+        :param digest: String digest returned by put_content
+        :param default: Value returned when the content is missing
+        :return: The stored value, or default
+        """
+        path = os.path.join(self.directory, "objects", digest[:2], digest + ".json.z")
+        try:
+            with open(path, "rb") as f:
+                return json.loads(zlib.decompress(f.read()).decode("utf-8"))
+        except (OSError, ValueError, zlib.error):
+            return default
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
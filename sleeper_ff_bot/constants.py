@@ -2,3 +2,37 @@ STARTING_YEAR = 2022
 STARTING_MONTH = 9
 STARTING_DAY = 8
 START_DATE_STRING = "22-09-08"
+
+# NFL bye weeks by season, {season: {team: week}}. A season missing here gets no bye alerts rather than wrong ones.
+BYE_WEEKS = {
+    2022: {
+        "DET": 6, "LV": 6, "TEN": 6, "HOU": 6,
+        "BUF": 7, "LAR": 7, "MIN": 7, "PHI": 7,
+        "KC": 8, "LAC": 8,
+        "CLE": 9, "DAL": 9, "DEN": 9, "NYG": 9, "PIT": 9, "SF": 9,
+        "BAL": 10, "CIN": 10, "NE": 10, "NYJ": 10,
+        "JAX": 11, "MIA": 11, "SEA": 11, "TB": 11,
+        "ARI": 13, "CAR": 13,
+        "ATL": 14, "CHI": 14, "GB": 14, "IND": 14, "NO": 14, "WAS": 14,
+    },
+}
+
+# injury statuses that mean a starter is not going to play
+OUT_STATUSES = ("Out", "IR", "PUP", "Sus")
+
+# weeks in the STARTING_YEAR NFL regular season
+NFL_WEEKS = 18
+
+# NFL kickoff windows in KICKOFF_TIMEZONE local time for the STARTING_YEAR season, (weekday, hour, minute) with
+# Monday as 0; the UTC times move by an hour when daylight saving time ends in November
+KICKOFFS = (
+    (3, 20, 15),  # Thursday night
+    (6, 9, 30),  # Sunday London
+    (6, 13, 0), (6, 16, 5), (6, 16, 25),  # Sunday afternoon
+    (6, 20, 20),  # Sunday night
+    (0, 20, 15),  # Monday night
+)
+KICKOFF_TIMEZONE = "America/New_York"
+
+# typical number of games in each KICKOFFS window, in the same order
+KICKOFF_GAMES = (1, 1, 7, 2, 2, 1, 1)
@@ -1,10 +1,64 @@
+import hashlib
+import threading
+import time
+
 import requests
 from bot_interface import BotInterface
 
 
 class Discord(BotInterface):
-    def __init__(self, webhook):
+    def __init__(self, webhook, min_edit_interval=60):
+        """
+        :param webhook: String Discord webhook url
+        :param min_edit_interval: Int seconds between two edits of the same live message
+        """
         self.webhook = webhook
+        self.min_edit_interval = min_edit_interval
+        # key -> [message id, hash of the content shown, time of the last post or edit]
+        self._live = {}
+        self._lock = threading.Lock()
 
     def send_message(self, message):
-        requests.post(self.webhook, json={"content": message})
+        response = requests.post(self.webhook, json={"content": message}, timeout=10)
+        # raise on a failed post, so callers that track what was sent, like the transactions job, try it again
+        response.raise_for_status()
+
+    def send_live(self, key, callback, *args):
+        """
+        Keeps one message per key up to date instead of posting a new one every time: the first call posts it with
+        ?wait=true to learn its id, later calls edit it in place, only when the content changed and at most once per
+        min_edit_interval.
+        :param key: String name of the live message, e.g. "scores/14"; a new key starts a new message
+        :param callback: The callback function to call
+        :param args: The arguments to the callback function
+        :return: None
+        """
+        with self._lock:
+            live = self._live.get(key)
+            if live is not None and time.time() - live[2] < self.min_edit_interval:
+                return
+        message = callback(*args)
+        if not message:
+            return
+        digest = hashlib.sha1(message.encode("utf-8")).hexdigest()
+        with self._lock:
+            live = self._live.get(key)
+            if live is not None and live[1] == digest:
+                return
+            if live is not None:
+                response = requests.patch("{}/messages/{}".format(self.webhook, live[0]), json={"content": message},
+                                          timeout=10)
+                if response.status_code == 429:
+                    # wait out Discord's limit before the next edit
+                    live[2] = time.time() + float(response.json().get("retry_after", 1)) - self.min_edit_interval
+                    return
+                if response.ok:
+                    live[1:] = [digest, time.time()]
+                    return
+                if response.status_code != 404:
+                    # a failed edit keeps the old digest, so the next run tries it again
+                    return
+                # the message was deleted, so post it again
+            response = requests.post(self.webhook, params={"wait": "true"}, json={"content": message}, timeout=10)
+            if response.ok:
+                self._live[key] = [response.json()["id"], digest, time.time()]
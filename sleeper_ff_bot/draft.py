@@ -0,0 +1,201 @@
+from collections import defaultdict
+from constants import NFL_WEEKS
+from sleeper_wrapper import Drafts, Stats
+
+"""
+Draft report card: every pick valued by the league's own scoring, as value over replacement at its position and as
+value against the slot it was taken in, rolled up into per-team grades, steals and busts.
+
+A finished draft never changes and neither do finished weeks' points, so the draft is cached, points to date come
+from the season accumulators, and a weekly regrade only fetches the week that just ended and the season projections.
+"""
+
+# flex slots, and the positions that share them
+FLEX_SLOTS = {
+    "FLEX": ("RB", "WR", "TE"),
+    "WRRB_FLEX": ("RB", "WR"),
+    "REC_FLEX": ("WR", "TE"),
+    "SUPER_FLEX": ("QB", "RB", "WR", "TE"),
+}
+
+# minimum z-score of a team's total value over replacement for each grade
+GRADES = ((1.25, "A+"), (0.75, "A"), (0.25, "B+"), (-0.25, "B"), (-0.75, "C"), (-1.25, "D"))
+
+
+def fetch_draft_picks(league, cache):
+    """
+    Gets the picks of the league's draft, from the cache once the draft is complete.
+    :param league: League
+    :param cache: DiskCache
+    :return: List of picks from Drafts.get_all_picks, empty if the league has not drafted
+    """
+    key = "draft/{}/picks".format(league.league_id)
+    picks = cache.get(key)
+    if picks is not None:
+        return picks
+    drafts = [draft for draft in league.get_all_drafts() or [] if draft.get("status") == "complete"]
+    if not drafts:
+        return []
+    picks = Drafts(drafts[0]["draft_id"]).get_all_picks()
+    if picks:
+        cache.put(key, picks)
+    return picks
+
+
+def season_points(accumulators, rules, player_ids, season, current_week):
+    """
+    Gets the players' points in the played weeks.
+    :param accumulators: SeasonAccumulators
+    :param rules: ScoringRules of the league
+    :param player_ids: Collection of player_ids, or None for every player with a stat line
+    :param season: Int season
+    :param current_week: Int current week; weeks before it are played
+    :return: Dict {player_id: points to date}
+    """
+    stats = Stats()
+    accumulator = accumulators.get(rules, season, current_week,
+                                   lambda week: stats.get_week_stats("regular", season, week))
+    return accumulator.totals_for(accumulator.player_ids if player_ids is None else player_ids)
+
+
+def starters_per_position(roster_positions):
+    """
+    :param roster_positions: List of the league's roster slots, e.g. ["QB", "RB", "RB", "FLEX", "BN", ...]
+    :return: Dict {position: Float starting slots}, flex slots split evenly between the positions that fill them
+    """
+    starters = defaultdict(float)
+    for slot in roster_positions or []:
+        shared = FLEX_SLOTS.get(slot)
+        if shared is not None:
+            for position in shared:
+                starters[position] += 1 / len(shared)
+        elif slot not in ("BN", "IR", "TAXI"):
+            starters[slot] += 1
+    return dict(starters)
+
+
+def expected_values(rules, season_projections, points_to_date, current_week):
+    """
+    :param rules: ScoringRules of the league
+    :param season_projections: Dict {player_id: season projection stats}
+    :param points_to_date: Dict returned by season_points
+    :param current_week: Int current week
+    :return: Dict {player_id: points to date plus the projection for the weeks left}
+    """
+    remaining = max(0, NFL_WEEKS - (current_week - 1)) / NFL_WEEKS
+    projected = rules.score_all(season_projections or {})
+    values = {player_id: points * remaining for player_id, points in projected.items()}
+    for player_id, points in points_to_date.items():
+        values[player_id] = values.get(player_id, 0.0) + points
+    return values
+
+
+def replacement_levels(values, positions, starters, teams):
+    """
+    :param values: Dict {player_id: expected points} over the whole player pool
+    :param positions: Dict {player_id: position}
+    :param starters: Dict returned by starters_per_position
+    :param teams: Int number of teams
+    :return: Dict {position: points of the best player left once every team has filled its starters}
+    """
+    by_position = defaultdict(list)
+    for player_id, value in values.items():
+        position = positions.get(player_id)
+        if position in starters:
+            by_position[position].append(value)
+    levels = {}
+    for position, position_values in by_position.items():
+        position_values.sort(reverse=True)
+        index = int(round(starters[position] * teams))
+        levels[position] = position_values[index] if index < len(position_values) else 0.0
+    return levels
+
+
+class DraftReportCard:
+    def __init__(self, picks, values, positions, replacement):
+        """
+        :param picks: List of picks from Drafts.get_all_picks
+        :param values: Dict returned by expected_values
+        :param positions: Dict {player_id: position}
+        :param replacement: Dict returned by replacement_levels
+        """
+        graded = []
+        for pick in picks:
+            player_id = pick.get("player_id")
+            position = positions.get(player_id) or (pick.get("metadata") or {}).get("position")
+            value = values.get(player_id, 0.0)
+            graded.append({"pick_no": pick["pick_no"], "round": pick.get("round"), "roster_id": pick.get("roster_id"),
+                           "player_id": player_id, "position": position, "value": value,
+                           "vor": value - replacement.get(position, 0.0)})
+
+        # where each pick would have gone had the draft been made in order of value over replacement
+        for rank, pick in enumerate(sorted(graded, key=lambda p: -p["vor"])):
+            pick["slot_delta"] = pick["pick_no"] - (rank + 1)
+        self.picks = sorted(graded, key=lambda p: p["pick_no"])
+
+    def team_totals(self):
+        """
+        :return: Dict {roster_id: total value over replacement of its picks}
+        """
+        totals = defaultdict(float)
+        for pick in self.picks:
+            totals[pick["roster_id"]] += pick["vor"]
+        return dict(totals)
+
+    def team_grades(self):
+        """
+        :return: List [(roster_id, total value over replacement, grade)] best first
+        """
+        totals = self.team_totals()
+        if not totals:
+            return []
+        mean = sum(totals.values()) / len(totals)
+        spread = (sum((total - mean) ** 2 for total in totals.values()) / len(totals)) ** 0.5 or 1.0
+        result = []
+        for roster_id, total in sorted(totals.items(), key=lambda item: -item[1]):
+            z = (total - mean) / spread
+            grade = next((letter for minimum, letter in GRADES if z >= minimum), "F")
+            result.append((roster_id, total, grade))
+        return result
+
+    def steals(self, count=3):
+        """
+        :return: List of the picks taken furthest after their value, best first
+        """
+        return sorted(self.picks, key=lambda p: -p["slot_delta"])[:count]
+
+    def busts(self, count=3):
+        """
+        :return: List of the picks taken furthest before their value, worst first
+        """
+        return sorted(self.picks, key=lambda p: p["slot_delta"])[:count]
+
+
+def _pick_line(pick, players):
+    player = players.get(pick["player_id"]) or {}
+    name = "{} {}".format(player.get("first_name", ""), player.get("last_name", pick["player_id"])).strip()
+    return "{} ({}) pick {}, {:+d} spots, {:.1f} over replacement".format(name, pick["position"], pick["pick_no"],
+                                                                         pick["slot_delta"], pick["vor"])
+
+
+def get_draft_report_string(report_card, index, players):
+    """
+    Creates and returns the draft report card message.
+    :param report_card: DraftReportCard
+    :param index: LeagueIndex of the league
+    :param players: Dict {player_id: player}
+    :return: String message
+    """
+    lines = ["**================================**", "**Draft Report Card**", "**================================**", ""]
+    grades = report_card.team_grades()
+    if not grades:
+        return "\n".join(lines + ["No draft to grade yet."])
+    for roster_id, total, grade in grades:
+        lines.append("**{}** {} ({:+.1f})".format(grade, index.team_name(roster_id, "Team NA"), total))
+    lines.append("")
+    lines.append("*Steals*")
+    lines.extend(_pick_line(pick, players) for pick in report_card.steals())
+    lines.append("")
+    lines.append("*Busts*")
+    lines.extend(_pick_line(pick, players) for pick in report_card.busts())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,138 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from collections import defaultdict, deque
+from sleeper_wrapper.base_api import set_deadline, set_priority
+from sleeper_wrapper.rate_limit import PRIORITY_LIVE, PRIORITY_REPORT, PRIORITY_BACKFILL
+
+"""
+Runs scheduled jobs on a bounded pool of worker threads instead of on the scheduler's thread.
+"""
+
+# Jobs run in PRIORITY_* order, and the Sleeper calls they make take rate limit tokens in the same order.
+
+
+class JobExecutor:
+    def __init__(self, workers=4, history=50, tracer=None):
+        """
+        :param workers: Int number of worker threads. With more than one, one of them is kept free for PRIORITY_LIVE
+            jobs; a single worker runs every job in priority order.
+        :param history: Int number of durations kept per job
+        :param tracer: tracing.Tracer opening a root span for every job run, or None
+        """
+        self.workers = workers
+        self.tracer = tracer
+        self.history = defaultdict(lambda: deque(maxlen=history))
+        # seconds each run waited in the queue before a worker picked it up
+        self.lateness = defaultdict(lambda: deque(maxlen=history))
+        self.overruns = defaultdict(int)
+        self.skipped = defaultdict(int)
+        self._heap = []
+        self._sequence = itertools.count()
+        self._pending = set()
+        self._heavy_running = 0
+        self._heavy_limit = workers - 1 if workers > 1 else workers
+        self._cond = threading.Condition()
+        for i in range(workers):
+            threading.Thread(target=self._work, name="job-worker-{}".format(i), daemon=True).start()
+
+    def job(self, name, func, *args, priority=PRIORITY_REPORT, deadline=None):
+        """
+        Wraps a job for schedule's do(), so the scheduler only queues it.
+        :param name: String job name; a job is never queued again while a run with the same name is pending
+        :param func: The function to run
+        :param args: The arguments to the function
+        :param priority: Int PRIORITY_* class
+        :param deadline: Int seconds the job may run for. Sleeper calls made after it raise DeadlineExceeded.
+        :return: Function taking no arguments
+        """
+        def submit_job():
+            self.submit(name, func, args, priority, deadline)
+        submit_job.__name__ = name
+        return submit_job
+
+    def submit(self, name, func, args=(), priority=PRIORITY_REPORT, deadline=None):
+        """
+        Queues a job unless a run of it is already queued or running.
+        :return: Boolean True if the job was queued
+        """
+        with self._cond:
+            if name in self._pending:
+                self.skipped[name] += 1
+                return False
+            self._pending.add(name)
+            heapq.heappush(self._heap, (priority, next(self._sequence), name, func, args, deadline, time.time()))
+            self._cond.notify_all()
+        return True
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                if self._heap:
+                    priority = self._heap[0][0]
+                    # heavy jobs may use every worker but one, so live jobs never wait behind reports
+                    if priority == PRIORITY_LIVE or self._heavy_running < self._heavy_limit:
+                        item = heapq.heappop(self._heap)
+                        if priority != PRIORITY_LIVE:
+                            self._heavy_running += 1
+                        return item
+                self._cond.wait()
+
+    def _work(self):
+        while True:
+            priority, _, name, func, args, deadline, submitted_at = self._next_job()
+            start = time.time()
+            set_deadline(start + deadline if deadline else None)
+            set_priority(priority)
+            try:
+                if self.tracer is not None:
+                    with self.tracer.span("job:" + name, priority=priority):
+                        func(*args)
+                else:
+                    func(*args)
+            except Exception:
+                # one failing job must not take down the worker or the other jobs
+                traceback.print_exc()
+            finally:
+                set_deadline(None)
+                set_priority(PRIORITY_REPORT)
+                duration = time.time() - start
+                with self._cond:
+                    self.history[name].append(duration)
+                    self.lateness[name].append(start - submitted_at)
+                    if deadline and duration > deadline:
+                        self.overruns[name] += 1
+                    self._pending.discard(name)
+                    if priority != PRIORITY_LIVE:
+                        self._heavy_running -= 1
+                    self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until every queued and running job has finished.
+        :param timeout: Float seconds to wait at most, or None
+        :return: Boolean True if the executor is idle
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending, timeout)
+
+    def stats(self):
+        """
+        :return: Dict {name: {"runs", "last", "mean", "max", "lateness", "overruns", "skipped"}} over the kept
+            history; lateness is the worst queueing delay
+        """
+        with self._cond:
+            result = {}
+            for name, durations in self.history.items():
+                result[name] = {
+                    "runs": len(durations),
+                    "last": durations[-1],
+                    "mean": sum(durations) / len(durations),
+                    "max": max(durations),
+                    "lateness": max(self.lateness[name]),
+                    "overruns": self.overruns[name],
+                    "skipped": self.skipped[name],
+                }
+            return result
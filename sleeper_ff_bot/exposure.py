@@ -0,0 +1,166 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from constants import BYE_WEEKS, OUT_STATUSES
+from sleeper_wrapper import League, Roster
+from sleeper_wrapper.base_api import bind_thread_state
+
+"""
+Cross-league exposure: which of a user's leagues hold a player, and which of their starters are on bye or hurt.
+"""
+
+
+class ExposureIndex:
+    def __init__(self, user_id):
+        """
+        :param user_id: String user_id whose rosters count as "mine"
+        """
+        self.user_id = user_id
+        self.league_names = {}
+        # player_id -> {(league_id, roster_id), ...} across every roster in every league
+        self._holders = defaultdict(set)
+        # league_id -> {player_id: roster_id}, kept so a league can be replaced without rebuilding the index
+        self._league_players = {}
+        # league_id -> the user's own Roster
+        self.my_rosters = {}
+
+    def update_league(self, league_id, rosters, name=None):
+        """
+        Adds a league or replaces its rosters, touching only the players that moved.
+        :param league_id: String league_id
+        :param rosters: List of rosters from League.get_rosters
+        :param name: String league name
+        :return: None
+        """
+        if name is not None:
+            self.league_names[league_id] = name
+        rosters = [Roster.from_json(roster) for roster in rosters]
+        new_players = {player_id: roster.roster_id for roster in rosters for player_id in roster.players}
+        old_players = self._league_players.get(league_id, {})
+
+        for player_id, roster_id in old_players.items():
+            if new_players.get(player_id) != roster_id:
+                self._holders[player_id].discard((league_id, roster_id))
+                if not self._holders[player_id]:
+                    del self._holders[player_id]
+        for player_id, roster_id in new_players.items():
+            if old_players.get(player_id) != roster_id:
+                self._holders[player_id].add((league_id, roster_id))
+        self._league_players[league_id] = new_players
+
+        self.my_rosters.pop(league_id, None)
+        for roster in rosters:
+            if roster.owner_id == self.user_id:
+                self.my_rosters[league_id] = roster
+
+    def holders(self, player_id):
+        """
+        :return: Set {(league_id, roster_id), ...} of every roster holding the player
+        """
+        return self._holders.get(player_id, set())
+
+    def my_leagues_with(self, player_id):
+        """
+        :return: List of league_ids where the user rosters the player
+        """
+        return [league_id for league_id, roster_id in self.holders(player_id)
+                if league_id in self.my_rosters and self.my_rosters[league_id].roster_id == roster_id]
+
+    def my_exposure(self):
+        """
+        :return: List [(player_id, number_of_my_leagues), ...] most exposed first
+        """
+        counts = defaultdict(int)
+        for roster in self.my_rosters.values():
+            for player_id in roster.players:
+                counts[player_id] += 1
+        return sorted(counts.items(), key=lambda item: item[1], reverse=True)
+
+    def my_starters_at_risk(self, players, season, week):
+        """
+        Finds the user's starters that are on bye or ruled out.
+        :param players: Dict {player_id: player}
+        :param season: Int season
+        :param week: Int week
+        :return: Dict {player_id: (reason, [league_id, ...])}
+        """
+        bye_weeks = BYE_WEEKS.get(season, {})
+        result = {}
+        for league_id, roster in self.my_rosters.items():
+            for player_id in roster.starters:
+                player = players.get(player_id)
+                if player is None:
+                    continue
+                if bye_weeks.get(player["team"]) == week:
+                    reason = "on bye"
+                elif player["injury_status"] in OUT_STATUSES:
+                    reason = player["injury_status"]
+                else:
+                    continue
+                result.setdefault(player_id, (reason, []))[1].append(league_id)
+        return result
+
+
+def build_exposure_index(user, season, max_workers=4, index=None):
+    """
+    Discovers every league of a user and fetches their rosters with bounded concurrency.
+    :param user: User
+    :param season: Int season
+    :param max_workers: Int number of leagues to fetch at once
+    :param index: ExposureIndex to update in place instead of building a new one
+    :return: ExposureIndex
+    """
+    if index is None:
+        index = ExposureIndex(user.get_user_id())
+    leagues = user.get_all_leagues("nfl", season)
+
+    def fetch_rosters(league):
+        return League(league["league_id"], league).get_rosters()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for league, rosters in zip(leagues, executor.map(bind_thread_state(fetch_rosters), leagues)):
+            if not rosters:
+                # a failed fetch; keep what the index already knows about the league
+                continue
+            index.update_league(league["league_id"], rosters, league.get("name"))
+    return index
+
+
+def refresh_league(index, league):
+    """
+    Refetches one league's rosters and updates the index in place.
+    :param index: ExposureIndex
+    :param league: League
+    :return: None
+    """
+    rosters = league.get_rosters()
+    if rosters:
+        index.update_league(str(league.league_id), rosters)
+
+
+def get_exposure_string(index, players, season, week, top=10):
+    """
+    Creates and returns the cross-league exposure message.
+    :param index: ExposureIndex
+    :param players: Dict {player_id: player}
+    :param season: Int season
+    :param week: Int week
+    :param top: Int number of most exposed players to list
+    :return: String message
+    """
+    def player_name(player_id):
+        player = players.get(player_id)
+        return "{} {}".format(player["first_name"], player["last_name"]) if player else player_id
+
+    lines = ["**================================**", "**Exposure across {} leagues**".format(len(index.my_rosters)),
+             "**================================**", ""]
+    for player_id, count in index.my_exposure()[:top]:
+        lines.append("{} - {} of {} leagues".format(player_name(player_id), count, len(index.my_rosters)))
+
+    at_risk = index.my_starters_at_risk(players, season, week)
+    if at_risk:
+        lines.append("")
+        lines.append("*Starters on bye or out in week {}*".format(week))
+        for player_id, (reason, league_ids) in at_risk.items():
+            league_names = ", ".join(index.league_names.get(league_id, league_id) for league_id in league_ids)
+            lines.append("{} ({}) in {}".format(player_name(player_id), reason, league_names))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,216 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from sleeper_wrapper import League, LeagueUser
+from sleeper_wrapper.base_api import bind_thread_state
+
+"""
+All-time league history, following the previous_league_id chain back through past seasons.
+
+Finished seasons never change, so everything fetched for them is stored in the DiskCache by content and described
+by a per-season manifest. Once a season has been backfilled it is served without any upstream calls.
+"""
+
+
+def _is_complete(league):
+    return league.get("status") == "complete"
+
+
+def walk_season_chain(league, cache):
+    """
+    Follows previous_league_id from a league back to its first season.
+    :param league: Dict league metadata of the starting league, e.g. League.get_league()
+    :param cache: DiskCache
+    :return: List of league metadata dicts for the previous seasons, newest first
+    """
+    chain = []
+    previous_id = league.get("previous_league_id")
+    while previous_id and previous_id != "0":
+        key = "history/league/{}".format(previous_id)
+        digest = cache.get(key)
+        previous = cache.get_content(digest) if digest else None
+        if previous is None:
+            previous = League(previous_id).get_league()
+            if not previous:
+                break
+            if _is_complete(previous):
+                cache.put(key, cache.put_content(previous))
+        chain.append(previous)
+        previous_id = previous.get("previous_league_id")
+    return chain
+
+
+def _last_week(league):
+    settings = league.get("settings") or {}
+    return settings.get("last_scored_leg") or 17
+
+
+def fetch_season(league, cache, max_workers=8):
+    """
+    Gets a season's users, rosters, brackets and every week's matchups, fetching them concurrently the first time
+    and from the cache afterwards.
+    :param league: Dict league metadata of the season
+    :param cache: DiskCache
+    :param max_workers: Int number of requests in flight at once
+    :return: Dict {"league", "users", "rosters", "winners_bracket", "losers_bracket", "matchups": {week: [...]}}
+    """
+    manifest_key = "history/season/{}".format(league["league_id"])
+    manifest = cache.get(manifest_key)
+    if manifest is not None:
+        season = {name: cache.get_content(digest) for name, digest in manifest.items() if name != "matchups"}
+        season["matchups"] = {int(week): cache.get_content(digest) for week, digest in manifest["matchups"].items()}
+        return season
+
+    api = League(league["league_id"], league)
+    weeks = range(1, _last_week(league) + 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        calls = {
+            "users": executor.submit(bind_thread_state(api.get_users)),
+            "rosters": executor.submit(bind_thread_state(api.get_rosters)),
+            "winners_bracket": executor.submit(bind_thread_state(api.get_playoff_winners_bracket)),
+            "losers_bracket": executor.submit(bind_thread_state(api.get_playoff_losers_bracket)),
+        }
+        get_matchups = bind_thread_state(api.get_matchups)
+        week_calls = {week: executor.submit(get_matchups, week) for week in weeks}
+        season = {name: call.result() for name, call in calls.items()}
+        season["matchups"] = {week: call.result() for week, call in week_calls.items()}
+    season["league"] = league
+
+    # only keep a complete, finished season; an empty response may have been an error
+    if _is_complete(league) and season["users"] and season["rosters"]:
+        manifest = {name: cache.put_content(value) for name, value in season.items() if name != "matchups"}
+        manifest["matchups"] = {str(week): cache.put_content(matchups)
+                                for week, matchups in season["matchups"].items()}
+        cache.put(manifest_key, manifest)
+    return season
+
+
+def load_history(league, cache, max_workers=8):
+    """
+    :param league: Dict league metadata of the current season
+    :param cache: DiskCache
+    :param max_workers: Int number of seasons fetched at once
+    :return: LeagueHistory of every finished season before it
+    """
+    chain = walk_season_chain(league, cache)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        seasons = list(executor.map(bind_thread_state(lambda previous: fetch_season(previous, cache)), chain))
+    return LeagueHistory(seasons)
+
+
+class LeagueHistory:
+    def __init__(self, seasons):
+        """
+        :param seasons: List of season dicts returned by fetch_season, newest first
+        """
+        self.seasons = seasons
+        self._head_to_head = None
+        # owner ids are stable across seasons, roster ids are not
+        self.owner_names = {}
+        for season in reversed(seasons):
+            for user in season["users"]:
+                league_user = LeagueUser.from_json(user)
+                self.owner_names[league_user.user_id] = league_user.team_name
+
+    def owner_name(self, owner_id):
+        return self.owner_names.get(owner_id, "Team NA")
+
+    def games(self):
+        """
+        Yields every finished head-to-head game.
+        :return: Generator of (season, week, (owner_id, points), (owner_id, points))
+        """
+        for season in self.seasons:
+            owners = {roster["roster_id"]: roster.get("owner_id") for roster in season["rosters"]}
+            for week, matchups in sorted(season["matchups"].items()):
+                pairs = defaultdict(list)
+                for matchup in matchups or []:
+                    if matchup.get("matchup_id") is not None:
+                        team = (owners.get(matchup["roster_id"]), matchup.get("points") or 0)
+                        pairs[matchup["matchup_id"]].append(team)
+                for pair in pairs.values():
+                    if len(pair) == 2:
+                        yield season["league"]["season"], week, pair[0], pair[1]
+
+    def head_to_head(self):
+        """
+        :return: Dict {(owner_id, owner_id): [wins, losses, ties]} from the first owner's point of view
+        """
+        if self._head_to_head is not None:
+            return self._head_to_head
+        records = defaultdict(lambda: [0, 0, 0])
+        for _, _, (owner_a, points_a), (owner_b, points_b) in self.games():
+            if owner_a is None or owner_b is None:
+                continue
+            result = 0 if points_a > points_b else 1 if points_a < points_b else 2
+            records[(owner_a, owner_b)][result] += 1
+            records[(owner_b, owner_a)][(1 - result) if result < 2 else 2] += 1
+        self._head_to_head = dict(records)
+        return self._head_to_head
+
+    def champions(self):
+        """
+        :return: List [(season, owner_id), ...] newest first
+        """
+        result = []
+        for season in self.seasons:
+            owners = {roster["roster_id"]: roster.get("owner_id") for roster in season["rosters"]}
+            for match in season["winners_bracket"] or []:
+                if match.get("p") == 1 and match.get("w") is not None:
+                    result.append((season["league"]["season"], owners.get(match["w"])))
+        return result
+
+    def record_book(self):
+        """
+        :return: Dict {"highest_score": (points, season, week, owner_id),
+                       "biggest_blowout": (margin, season, week, winner_id, loser_id)} or None entries if no games
+        """
+        highest = None
+        blowout = None
+        for season, week, (owner_a, points_a), (owner_b, points_b) in self.games():
+            for owner, points in ((owner_a, points_a), (owner_b, points_b)):
+                if highest is None or points > highest[0]:
+                    highest = (points, season, week, owner)
+            winner, loser = (owner_a, owner_b) if points_a >= points_b else (owner_b, owner_a)
+            margin = abs(points_a - points_b)
+            if blowout is None or margin > blowout[0]:
+                blowout = (margin, season, week, winner, loser)
+        return {"highest_score": highest, "biggest_blowout": blowout}
+
+
+def get_all_time_string(history):
+    """
+    Creates and returns the league history message: champions and the record book.
+    :param history: LeagueHistory
+    :return: String message
+    """
+    lines = ["**================================**", "**League History**", "**================================**", ""]
+    champions = history.champions()
+    if champions:
+        lines.append("*Champions*")
+        for season, owner_id in champions:
+            lines.append("{} {}".format(season, history.owner_name(owner_id)))
+        lines.append("")
+
+    records = history.record_book()
+    if records["highest_score"] is not None:
+        points, season, week, owner_id = records["highest_score"]
+        lines.append("*Highest score ever*\n{} {:.2f} (week {}, {})".format(history.owner_name(owner_id), points,
+                                                                              week, season))
+    if records["biggest_blowout"] is not None:
+        margin, season, week, winner, loser = records["biggest_blowout"]
+        lines.append("*Biggest blowout*\n{} over {} by {:.2f} (week {}, {})".format(
+            history.owner_name(winner), history.owner_name(loser), margin, week, season))
+    return "\n".join(lines) + "\n"
+
+
+def get_head_to_head_string(history, owner_a, owner_b):
+    """
+    Creates and returns the all-time record between two owners.
+    :param history: LeagueHistory
+    :param owner_a: String owner_id
+    :param owner_b: String owner_id
+    :return: String message
+    """
+    wins, losses, ties = history.head_to_head().get((owner_a, owner_b), [0, 0, 0])
+    record = "{}-{}".format(wins, losses) if not ties else "{}-{}-{}".format(wins, losses, ties)
+    return "**{}** vs. **{}** all-time: {}\n".format(history.owner_name(owner_a), history.owner_name(owner_b), record)
@@ -0,0 +1,321 @@
+import bisect
+import json
+import threading
+import time
+import socketserver
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from history import get_all_time_string, get_head_to_head_string
+
+try:
+    from nacl.signing import VerifyKey
+    from nacl.exceptions import BadSignatureError
+except ImportError:
+    VerifyKey = None
+
+"""
+Discord slash commands (/scores, /standings, /matchup, /player, /history) answered from state the scheduler keeps warm.
+
+No command makes an upstream call: the scheduler calls WarmStore.update_league with fresh data, and commands only
+read it. PyNaCl is needed to verify Discord's request signatures when the server is exposed to Discord.
+"""
+
+PING = 1
+APPLICATION_COMMAND = 2
+PONG = 1
+CHANNEL_MESSAGE = 4
+
+# Discord application command definitions, for registering the commands with Discord
+COMMANDS = [
+    {"name": "scores", "description": "This week's scores"},
+    {"name": "standings", "description": "League standings"},
+    {"name": "matchup", "description": "A team's matchup this week",
+     "options": [{"type": 3, "name": "team", "description": "Team name", "required": True}]},
+    {"name": "player", "description": "Look up a player",
+     "options": [{"type": 3, "name": "name", "description": "Player name", "required": True}]},
+    {"name": "history", "description": "Champions and all-time records, or a team's all-time head-to-head records",
+     "options": [{"type": 3, "name": "team", "description": "Team name", "required": False}]},
+]
+
+
+class PlayerNameIndex:
+    def __init__(self, players):
+        """
+        Sorted (name, player_id) keys for prefix lookups on full and last names.
+        :param players: Dict {player_id: player}
+        """
+        keys = []
+        for player_id, player in players.items():
+            first = (player.get("first_name") or "").lower()
+            last = (player.get("last_name") or "").lower()
+            if not last:
+                continue
+            keys.append(("{} {}".format(first, last), player_id))
+            keys.append((last, player_id))
+        keys.sort()
+        self._names = [key[0] for key in keys]
+        self._player_ids = [key[1] for key in keys]
+        self.size = len(players)
+
+    def search(self, prefix, limit=5):
+        """
+        :param prefix: String start of a full or last name, case insensitive
+        :param limit: Int maximum number of matches
+        :return: List of player_ids, best (shortest) names first
+        """
+        prefix = prefix.strip().lower()
+        start = bisect.bisect_left(self._names, prefix)
+        matches = []
+        for i in range(start, len(self._names)):
+            if not self._names[i].startswith(prefix):
+                break
+            matches.append((len(self._names[i]), self._player_ids[i]))
+        result = []
+        for _, player_id in sorted(matches):
+            if player_id not in result:
+                result.append(player_id)
+            if len(result) == limit:
+                break
+        return result
+
+
+class WarmLeague:
+    __slots__ = ("week", "index", "scoreboards", "standings", "updated_at")
+
+    def __init__(self, week, index, scoreboards, standings):
+        self.week = week
+        self.index = index
+        self.scoreboards = scoreboards
+        self.standings = standings
+        self.updated_at = time.time()
+
+
+class WarmStore:
+    def __init__(self):
+        self.leagues = {}
+        # league_id -> LeagueHistory, once its past seasons are backfilled
+        self.histories = {}
+        self.players = {}
+        self.player_names = PlayerNameIndex({})
+        self._lock = threading.Lock()
+
+    def update_league(self, league_id, week, index, scoreboards, standings):
+        """
+        Replaces a league's warm state. Called by the scheduler, never by a command.
+        :param league_id: String league_id
+        :param week: Int week of the scoreboards
+        :param index: LeagueIndex
+        :param scoreboards: Dict returned by League.get_scoreboards
+        :param standings: List returned by League.get_standings
+        :return: None
+        """
+        with self._lock:
+            self.leagues[str(league_id)] = WarmLeague(week, index, scoreboards, standings)
+
+    def update_history(self, league_id, history):
+        """
+        :param league_id: String league_id
+        :param history: LeagueHistory of the league's finished seasons
+        :return: None
+        """
+        with self._lock:
+            self.histories[str(league_id)] = history
+
+    def update_players(self, players):
+        """
+        :param players: Dict {player_id: player}; the name index is only rebuilt when the player count changes
+        :return: None
+        """
+        if players is self.players and self.player_names.size == len(players):
+            return
+        player_names = PlayerNameIndex(players)
+        with self._lock:
+            self.players = players
+            self.player_names = player_names
+
+
+def _scores_message(league):
+    lines = ["**Scores, week {}**".format(league.week), ""]
+    for i, matchup in enumerate(league.scoreboards.values()):
+        lines.append("*Matchup {}*".format(i + 1))
+        for team_name, score, projected, _ in matchup:
+            lines.append("**{}** {:.2f} ({:.2f})".format(team_name, score or 0, projected or 0))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _standings_message(league):
+    lines = ["**Standings**", ""]
+    for i, (team, wins, losses, points) in enumerate(league.standings):
+        lines.append("**{}. {}** ({}-{}) *{} points*".format(i + 1, team or "Team NA", wins, losses, points))
+    return "\n".join(lines)
+
+
+def _matchup_message(league, team):
+    search = team.strip().lower()
+    for matchup in league.scoreboards.values():
+        if any(search in team_name.lower() for team_name, _, _, _ in matchup):
+            return "\n".join("**{}** {:.2f} ({:.2f})".format(team_name, score or 0, projected or 0)
+                             for team_name, score, projected, _ in matchup)
+    return "No matchup found for '{}' in week {}.".format(team, league.week)
+
+
+def _player_message(store, league, name):
+    player_ids = store.player_names.search(name)
+    if not player_ids:
+        return "No player found for '{}'.".format(name)
+    lines = []
+    for player_id in player_ids:
+        player = store.players[player_id]
+        roster_id = league.index.roster_of(player_id)
+        owner = league.index.team_name(roster_id, "Team NA") if roster_id is not None else "free agent"
+        status = " - {}".format(player["injury_status"]) if player.get("injury_status") else ""
+        lines.append("**{} {}** ({} {}){} - {}".format(player["first_name"], player["last_name"], player["position"],
+                                                      player["team"] or "FA", status, owner))
+    return "\n".join(lines)
+
+
+def _history_message(history, team):
+    if history is None:
+        return "The league history is still loading, try again in a few minutes."
+    if not team:
+        return get_all_time_string(history)
+    search = team.strip().lower()
+    owner_id = next((owner_id for owner_id, name in history.owner_names.items() if search in (name or "").lower()),
+                    None)
+    if owner_id is None:
+        return "No team found for '{}'.".format(team)
+    records = history.head_to_head()
+    return "".join(get_head_to_head_string(history, owner_id, other) for other in history.owner_names
+                   if other != owner_id and (owner_id, other) in records) or "No games played yet."
+
+
+class InteractionHandler:
+    def __init__(self, store, default_league_id, guild_leagues=None):
+        """
+        :param store: WarmStore
+        :param default_league_id: String league_id answered for guilds without their own league
+        :param guild_leagues: Dict {guild_id: league_id} for a process serving several leagues
+        """
+        self.store = store
+        self.default_league_id = str(default_league_id)
+        self.guild_leagues = guild_leagues or {}
+
+    def handle(self, interaction):
+        """
+        :param interaction: Dict Discord interaction payload
+        :return: Dict interaction response
+        """
+        if interaction.get("type") == PING:
+            return {"type": PONG}
+
+        data = interaction.get("data") or {}
+        options = {option["name"]: option.get("value") for option in data.get("options") or []}
+        league_id = self.guild_leagues.get(interaction.get("guild_id"), self.default_league_id)
+        league = self.store.leagues.get(league_id)
+
+        if data.get("name") == "history":
+            content = _history_message(self.store.histories.get(league_id), options.get("team"))
+        elif league is None:
+            content = "The bot is still warming up, try again in a minute."
+        elif data.get("name") == "scores":
+            content = _scores_message(league)
+        elif data.get("name") == "standings":
+            content = _standings_message(league)
+        elif data.get("name") == "matchup":
+            content = _matchup_message(league, options.get("team", ""))
+        elif data.get("name") == "player":
+            content = _player_message(self.store, league, options.get("name", ""))
+        else:
+            content = "Unknown command."
+        return {"type": CHANNEL_MESSAGE, "data": {"content": content[:2000]}}
+
+
+def verify_signature(public_key, signature, timestamp, body):
+    """
+    Verifies Discord's Ed25519 request signature.
+    :param public_key: String hex application public key
+    :param signature: String hex X-Signature-Ed25519 header
+    :param timestamp: String X-Signature-Timestamp header
+    :param body: Bytes raw request body
+    :return: Boolean True if the request came from Discord
+    """
+    try:
+        VerifyKey(bytes.fromhex(public_key)).verify(timestamp.encode("utf-8") + body, bytes.fromhex(signature or ""))
+        return True
+    except (BadSignatureError, ValueError):
+        return False
+
+
+class ThreadingServer(socketserver.ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer is only in Python 3.7+
+    daemon_threads = True
+
+
+def make_server(handler, port, public_key=None):
+    """
+    Builds the interactions HTTP server. Call serve_forever() on it, e.g. from a daemon thread.
+    :param handler: InteractionHandler
+    :param port: Int port to listen on
+    :param public_key: String hex Discord application public key. Only None for local testing.
+    :return: ThreadingServer
+    """
+    if public_key is not None and VerifyKey is None:
+        raise RuntimeError("PyNaCl is required to verify Discord interactions: pip install pynacl")
+
+    class RequestHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if public_key is not None and not verify_signature(public_key, self.headers.get("X-Signature-Ed25519"),
+                                                               self.headers.get("X-Signature-Timestamp", ""), body):
+                self.send_response(401)
+                self.end_headers()
+                return
+            try:
+                response = json.dumps(handler.handle(json.loads(body))).encode("utf-8")
+            except ValueError:
+                self.send_response(400)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingServer(("", port), RequestHandler)
+
+
+class LocalClient:
+    def __init__(self, handler):
+        """
+        A stand-in for Discord that sends slash commands straight to a handler and times them.
+        :param handler: InteractionHandler
+        """
+        self.handler = handler
+        self.latencies = []
+
+    def command(self, command_name, guild_id=None, **options):
+        """
+        :param command_name: String command name, e.g. "player"
+        :param guild_id: String guild the command is sent from
+        :param options: The command options, e.g. name="mcc"
+        :return: String content of the response
+        """
+        interaction = {"type": APPLICATION_COMMAND, "guild_id": guild_id,
+                       "data": {"name": command_name, "options": [{"name": key, "type": 3, "value": value}
+                                                          for key, value in options.items()]}}
+        start = time.perf_counter()
+        response = self.handler.handle(interaction)
+        self.latencies.append(time.perf_counter() - start)
+        return response["data"]["content"]
+
+    def percentile(self, p):
+        """
+        :param p: Float percentile, e.g. 99
+        :return: Float seconds
+        """
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
@@ -0,0 +1,143 @@
+import datetime as dt
+import time
+from constants import BYE_WEEKS, OUT_STATUSES, KICKOFFS
+from timeline import kickoff_at, local_date
+
+"""
+Pre-kickoff lineup alerts: empty starting slots, and starters who are on bye or ruled out.
+
+Polling is meant to be frequent, so the work is skipped wherever it can be: outside the hours before a kickoff
+nothing is fetched at all, and a roster whose starters hash the same as last time, with no player status change
+since, is not checked again.
+"""
+
+
+def kickoff_ahead(now, lead_minutes=120):
+    """
+    :param now: datetime.datetime in UTC
+    :param lead_minutes: Int minutes before a kickoff that alerts start
+    :return: Boolean True if a kickoff window starts within lead_minutes
+    """
+    today = local_date(now)
+    for weekday, hour, minute in KICKOFFS:
+        kickoff = kickoff_at(today + dt.timedelta(days=(weekday - today.weekday()) % 7), hour, minute)
+        if 0 <= (kickoff - now).total_seconds() <= lead_minutes * 60:
+            return True
+    return False
+
+
+class PlayerStatusIndex:
+    def __init__(self, max_age=60):
+        """
+        The players who cannot score this week, rebuilt from the player index at most every max_age seconds.
+        :param max_age: Int seconds a build is reused for
+        """
+        self.max_age = max_age
+        # bumped whenever the set of at-risk players changes, so unchanged rosters know to be checked again
+        self.version = 0
+        self._at_risk = {}
+        self._built_for = None
+        self._built_at = 0
+
+    def at_risk(self, players, season, week):
+        """
+        :param players: Dict {player_id: player}
+        :param season: Int season
+        :param week: Int week
+        :return: Dict {player_id: reason} of the players on bye or ruled out
+        """
+        if (season, week) == self._built_for and time.time() - self._built_at < self.max_age:
+            return self._at_risk
+        bye_weeks = BYE_WEEKS.get(season, {})
+        at_risk = {}
+        for player_id, player in players.items():
+            if bye_weeks.get(player.get("team")) == week:
+                at_risk[player_id] = "on bye"
+            elif player.get("injury_status") in OUT_STATUSES:
+                at_risk[player_id] = player["injury_status"]
+        if at_risk != self._at_risk:
+            self.version += 1
+        self._at_risk = at_risk
+        self._built_for = (season, week)
+        self._built_at = time.time()
+        return at_risk
+
+
+class LineupWatcher:
+    def __init__(self, statuses=None):
+        """
+        :param statuses: PlayerStatusIndex shared by every league
+        """
+        self.statuses = statuses or PlayerStatusIndex()
+        self.checked = 0
+        # (league_id, roster_id) -> (hash of the starters, statuses version) when the roster was last checked
+        self._fingerprints = {}
+        # (league_id, roster_id) -> frozenset of the problems already alerted
+        self._alerted = {}
+        # league_id -> rosters of the last check
+        self._rosters = {}
+        # (season, week) the fingerprints and alerts are for; a new week alerts every problem again
+        self._week = None
+
+    def check(self, league, rosters, players, season, week):
+        """
+        :param league: League
+        :param rosters: List of rosters from League.get_rosters, or None if they did not change since the last check
+        :param players: Dict {player_id: player}
+        :param season: Int season
+        :param week: Int week
+        :return: Dict {roster_id: [(slot, player_id, reason), ...]} every current problem of the teams with a new one
+        """
+        at_risk = self.statuses.at_risk(players, season, week)
+        if (season, week) != self._week:
+            self._week = (season, week)
+            self._fingerprints.clear()
+            self._alerted.clear()
+        league_id = str(league.league_id)
+        if rosters is None:
+            rosters = self._rosters.get(league_id, [])
+        self._rosters[league_id] = rosters
+        changed = []
+        for roster in rosters:
+            key = (league_id, roster["roster_id"])
+            fingerprint = (hash(tuple(roster.get("starters") or ())), self.statuses.version)
+            if self._fingerprints.get(key) != fingerprint:
+                self._fingerprints[key] = fingerprint
+                changed.append(roster)
+        if not changed:
+            return {}
+
+        self.checked += len(changed)
+        slots = league.get_starter_slots()
+        empty = league.empty_roster_spots(changed)
+        alerts = {}
+        for roster in changed:
+            roster_id = roster["roster_id"]
+            problems = {(slot, None, "empty") for slot in empty.get(roster_id, ())}
+            for slot, player_id in zip(slots, roster.get("starters") or ()):
+                if player_id in at_risk:
+                    problems.add((slot, player_id, at_risk[player_id]))
+            key = (league_id, roster_id)
+            if problems - self._alerted.get(key, frozenset()):
+                alerts[roster_id] = sorted(problems, key=lambda problem: (problem[0], problem[1] or ""))
+            self._alerted[key] = frozenset(problems)
+        return alerts
+
+
+def get_lineup_alert_string(team_name, problems, players):
+    """
+    Creates and returns one team's lineup alert.
+    :param team_name: String team name
+    :param problems: List of (slot, player_id, reason) from LineupWatcher.check
+    :param players: Dict {player_id: player}
+    :return: String message
+    """
+    lines = ["**Lineup alert: {}**".format(team_name)]
+    for slot, player_id, reason in problems:
+        if player_id is None:
+            lines.append("{}: empty".format(slot))
+        else:
+            player = players.get(player_id) or {}
+            lines.append("{}: {} {} ({}) {}".format(slot, player.get("first_name", ""), player.get("last_name", ""),
+                                                    player.get("team") or "FA", reason))
+    return "\n".join(lines)
@@ -0,0 +1,312 @@
+import argparse
+import datetime as dt
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+from constants import BYE_WEEKS, STARTING_YEAR
+from bot_interface import BotInterface
+from sleeper_wrapper import TokenBucket
+from sleeper_wrapper.base_api import get_rate_limiter, set_rate_limiter
+from sleeper_wrapper.testing import StandInSleeper
+
+"""
+Soak and load harness: runs the bot's jobs for many synthetic leagues against a local stand-in Sleeper API through a
+compressed season, and reports throughput, request volume, memory growth and scheduler lateness.
+
+    python sleeper_ff_bot/loadtest.py --leagues 100 --weeks 4
+"""
+
+POSITIONS = (("QB", 0.12), ("RB", 0.25), ("WR", 0.33), ("TE", 0.14), ("K", 0.08), ("DEF", 0.08))
+SCORING_SETTINGS = {"pass_yd": 0.04, "pass_td": 4, "pass_int": -2, "rush_yd": 0.1, "rush_td": 6, "rec": 1,
+                    "rec_yd": 0.1, "rec_td": 6, "fum_lost": -2, "fgm": 3, "xpm": 1, "def_td": 6, "int": 2}
+STARTERS = 9
+ROSTER_POSITIONS = ["QB", "RB", "RB", "WR", "WR", "TE", "FLEX", "K", "DEF"] + ["BN"] * 7
+ROSTER_SIZE = 16
+
+
+class SyntheticSleeper:
+    def __init__(self, leagues=10, teams=12, players=3000, season=2022, seed=0):
+        """
+        Generates leagues, players and weekly stats at realistic sizes.
+        :param leagues: Int number of leagues
+        :param teams: Int teams per league
+        :param players: Int size of the player pool
+        :param season: Int season
+        :param seed: Int random seed
+        """
+        self.rng = random.Random(seed)
+        self.season = season
+        self.teams = teams
+        self.week = 1
+        nfl_teams = sorted(BYE_WEEKS[STARTING_YEAR])
+
+        self.players = {}
+        for i in range(players):
+            position = self.rng.choices([p for p, _ in POSITIONS], [w for _, w in POSITIONS])[0]
+            self.players[str(1000 + i)] = {
+                "player_id": str(1000 + i), "first_name": "First{}".format(i), "last_name": "Last{}".format(i),
+                "position": position, "fantasy_positions": [position], "team": self.rng.choice(nfl_teams),
+                "status": "Active", "injury_status": self.rng.choice([None] * 9 + ["Questionable"]),
+                "search_rank": i, "years_exp": self.rng.randint(0, 12), "college": "College", "height": "72",
+                "weight": "210", "age": self.rng.randint(21, 36),
+            }
+        relevant = list(self.players)[:max(teams * ROSTER_SIZE, players // 4)]
+
+        self.leagues = {}
+        for i in range(leagues):
+            league_id = str(900000000000000000 + i)
+            users = [{"user_id": "{}{:02d}".format(league_id, t), "display_name": "user{}_{}".format(i, t),
+                      "metadata": {"team_name": "Team {}-{}".format(i, t)}} for t in range(teams)]
+            pool = self.rng.sample(relevant, teams * ROSTER_SIZE)
+            rosters = []
+            for t in range(teams):
+                roster_players = pool[t * ROSTER_SIZE:(t + 1) * ROSTER_SIZE]
+                rosters.append({"roster_id": t + 1, "owner_id": users[t]["user_id"], "players": roster_players,
+                                "starters": roster_players[:STARTERS], "reserve": None,
+                                "settings": {"wins": 0, "losses": 0, "ties": 0, "fpts": 0}})
+            self.leagues[league_id] = {
+                "league": {"league_id": league_id, "name": "League {}".format(i), "season": str(season),
+                           "status": "in_season", "previous_league_id": None, "total_rosters": teams,
+                           "scoring_settings": SCORING_SETTINGS, "settings": {"waiver_budget": 100},
+                           "roster_positions": ROSTER_POSITIONS},
+                "users": users, "rosters": rosters, "transactions": {},
+            }
+
+        self.week_stats = {}
+        self.week_projections = {}
+
+    def _stats(self, player_id):
+        position = self.players[player_id]["position"]
+        rng = self.rng
+        if position == "QB":
+            stats = {"pass_yd": rng.gauss(240, 60), "pass_td": rng.randint(0, 4), "pass_int": rng.randint(0, 2),
+                     "rush_yd": rng.gauss(15, 10)}
+        elif position in ("RB", "WR", "TE"):
+            stats = {"rush_yd": rng.gauss(30, 25), "rec": rng.randint(0, 9), "rec_yd": rng.gauss(45, 30),
+                     "rec_td": rng.choice([0, 0, 0, 1]), "rush_td": rng.choice([0, 0, 0, 1]),
+                     "fum_lost": rng.choice([0] * 9 + [1])}
+        elif position == "K":
+            stats = {"fgm": rng.randint(0, 4), "xpm": rng.randint(0, 5)}
+        else:
+            stats = {"int": rng.randint(0, 3), "def_td": rng.choice([0] * 6 + [1])}
+        stats = {key: round(value, 1) for key, value in stats.items()}
+        stats["pts_std"] = round(sum(value * SCORING_SETTINGS.get(key, 0) for key, value in stats.items()), 2)
+        stats["pts_ppr"] = round(stats["pts_std"] + stats.get("rec", 0), 2)
+        stats["pts_half_ppr"] = round(stats["pts_std"] + stats.get("rec", 0) / 2, 2)
+        stats["gp"] = 1
+        return stats
+
+    def set_week(self, week):
+        """
+        Moves the simulated season to a week: the season start date, stats, matchups and a fresh batch of
+        transactions dated now.
+        :param week: Int week
+        :return: None
+        """
+        self.week = week
+        for w in range(1, week + 1):
+            if w not in self.week_stats:
+                self.week_stats[w] = {player_id: self._stats(player_id) for player_id in self.players}
+                self.week_projections[w] = {player_id: self._stats(player_id) for player_id in self.players}
+
+        now_ms = int(time.time() * 1000)
+        for data in self.leagues.values():
+            transactions = []
+            for t in range(self.rng.randint(2, 8)):
+                roster = self.rng.choice(data["rosters"])
+                added = self.rng.choice(list(self.players))
+                dropped = roster["players"][-1]
+                transactions.append({
+                    "transaction_id": "{}{}{}".format(data["league"]["league_id"], week, t),
+                    "type": self.rng.choice(["waiver", "free_agent"]), "status": "complete",
+                    "created": now_ms, "roster_ids": [roster["roster_id"]], "adds": {added: roster["roster_id"]},
+                    "drops": {dropped: roster["roster_id"]}, "draft_picks": [],
+                    "settings": {"waiver_bid": self.rng.randint(0, 20)}, "leg": week,
+                })
+            data["transactions"][week] = transactions
+
+    def draft_picks(self, league_id):
+        """the league's rosters as a snake draft, in roster order"""
+        rosters = self.leagues[league_id]["rosters"]
+        picks = []
+        for round_index in range(ROSTER_SIZE):
+            order = rosters if round_index % 2 == 0 else rosters[::-1]
+            for roster in order:
+                player_id = roster["players"][round_index]
+                picks.append({"pick_no": len(picks) + 1, "round": round_index + 1, "roster_id": roster["roster_id"],
+                              "player_id": player_id, "metadata": {"position": self.players[player_id]["position"]}})
+        return picks
+
+    def matchups(self, league_id, week):
+        rosters = self.leagues[league_id]["rosters"]
+        ids = [roster["roster_id"] for roster in rosters]
+        # round robin: rotate every roster but the first one by the week
+        rotated = [ids[0]] + ids[1:][week % (len(ids) - 1):] + ids[1:][:week % (len(ids) - 1)]
+        stats = self.week_stats.get(week, {})
+        result = []
+        for i in range(len(rotated) // 2):
+            for roster_id in (rotated[i], rotated[-1 - i]):
+                roster = rosters[roster_id - 1]
+                points = sum(stats.get(player_id, {}).get("pts_std", 0) for player_id in roster["starters"])
+                result.append({"matchup_id": i + 1, "roster_id": roster_id, "points": round(points, 2),
+                               "starters": roster["starters"], "players": roster["players"]})
+        return result
+
+    def register(self, stand_in):
+        """
+        Serves the synthetic data from a StandInSleeper.
+        :param stand_in: StandInSleeper
+        :return: None
+        """
+        def state(match, query):
+            start = dt.date.today() - dt.timedelta(weeks=self.week - 1)
+            return {"season": str(self.season), "season_start_date": start.isoformat(), "week": self.week,
+                    "season_type": "regular"}
+
+        def league_data(match):
+            return self.leagues.get(match.group(1))
+
+        def trending(match, query):
+            sample = self.rng.sample(list(self.players)[:300], int(query.get("limit", 25)))
+            return [{"player_id": player_id, "count": self.rng.randint(10, 5000)} for player_id in sample]
+
+        stand_in.route(r"state/nfl", state)
+        stand_in.route(r"players/nfl", lambda match, query: self.players)
+        stand_in.route(r"players/nfl/trending/(add|drop)", trending)
+        stand_in.route(r"league/(\d+)", lambda match, query: (league_data(match) or {}).get("league"))
+        stand_in.route(r"league/(\d+)/(users|rosters)", lambda match, query: (league_data(match) or {}).get(match.group(2)))
+        stand_in.route(r"league/(\d+)/matchups/(\d+)", lambda match, query: self.matchups(match.group(1), int(match.group(2))))
+        stand_in.route(r"league/(\d+)/transactions/(\d+)",
+                       lambda match, query: league_data(match)["transactions"].get(int(match.group(2)), []))
+        stand_in.route(r"league/(\d+)/(winners|losers)_bracket", lambda match, query: [])
+        stand_in.route(r"stats/nfl/regular/(\d+)/(\d+)", lambda match, query: self.week_stats.get(int(match.group(2)), {}))
+        stand_in.route(r"league/(\d+)/drafts",
+                       lambda match, query: [{"draft_id": match.group(1), "status": "complete"}])
+        stand_in.route(r"draft/(\d+)/picks", lambda match, query: self.draft_picks(match.group(1)))
+        stand_in.route(r"projections/nfl/regular/(\d+)",
+                       lambda match, query: {player_id: {stat: value * 17 for stat, value in stats.items()}
+                                             for player_id, stats in self.week_projections.get(1, {}).items()})
+        stand_in.route(r"projections/nfl/regular/(\d+)/(\d+)",
+                       lambda match, query: self.week_projections.get(int(match.group(2)), {}))
+
+
+class CountingBot(BotInterface):
+    def __init__(self):
+        super().__init__(None)
+        self.messages = 0
+        self.characters = 0
+
+    def send_message(self, message):
+        self.messages += 1
+        self.characters += len(message)
+
+
+def run(leagues=10, weeks=3, workers=4, polls_per_week=5, players=3000, rate_limit=None):
+    """
+    Runs a compressed season and prints the report.
+    :param leagues: Int number of synthetic leagues
+    :param weeks: Int number of simulated weeks
+    :param workers: Int JobExecutor workers
+    :param polls_per_week: Int process_transactions runs per league per simulated week
+    :param players: Int size of the player pool
+    :param rate_limit: Int Sleeper calls allowed per minute, or None to measure the bot without the rate limiter
+    :return: Dict of the collected measurements
+    """
+    os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="sleeper-loadtest-"))
+    tracemalloc.start()
+    synthetic = SyntheticSleeper(leagues=leagues, players=players)
+    stand_in = StandInSleeper()
+    synthetic.register(stand_in)
+    stand_in.install()
+    previous_limiter = get_rate_limiter()
+    limiter = TokenBucket(per_minute=rate_limit) if rate_limit else None
+    set_rate_limiter(limiter)
+
+    import bot
+    from executor import JobExecutor, PRIORITY_LIVE, PRIORITY_BACKFILL
+
+    executor = JobExecutor(workers=workers)
+    counting_bot = CountingBot()
+    memory = []
+    week_times = []
+    start = time.time()
+    try:
+        for week in range(1, weeks + 1):
+            synthetic.set_week(week)
+            # the season start date moved, so drop the cached state to pick up the new week
+            bot._state = None
+            week_start = time.time()
+            for league_id in synthetic.leagues:
+                for poll in range(polls_per_week):
+                    executor.submit("transactions:{}:{}".format(league_id, poll), bot.process_transactions,
+                                    (league_id, bot.get_players(), counting_bot), PRIORITY_LIVE)
+                for name, builder in (("matchups", bot.get_matchups_string), ("scores", bot.get_scores_string),
+                                      ("standings", bot.get_standings_string),
+                                      ("highlights", bot.get_best_and_worst_string),
+                                      ("waiver_buzz", bot.get_trending_string),
+                                      ("waivers", bot.get_waiver_recommendations_string),
+                                      ("draft", bot.get_draft_report_card_string)):
+                    executor.submit("{}:{}".format(name, league_id), counting_bot.send, (builder, league_id))
+                executor.submit("close_games:{}".format(league_id), counting_bot.send,
+                                (bot.get_close_games_string, league_id, 20))
+                executor.submit("faab:{}".format(league_id), counting_bot.send,
+                                (bot.get_transaction_report_string, league_id), PRIORITY_BACKFILL)
+            executor.wait()
+            week_times.append(time.time() - week_start)
+            memory.append(tracemalloc.get_traced_memory())
+    finally:
+        stand_in.uninstall()
+        set_rate_limiter(previous_limiter)
+        tracemalloc.stop()
+    elapsed = time.time() - start
+
+    jobs = defaultdict(lambda: {"runs": 0, "total": 0.0, "max": 0.0, "lateness": 0.0})
+    for name, durations in executor.history.items():
+        job = jobs[name.split(":")[0]]
+        job["runs"] += len(durations)
+        job["total"] += sum(durations)
+        job["max"] = max(job["max"], max(durations))
+        job["lateness"] = max(job["lateness"], max(executor.lateness[name]))
+    results = {"elapsed": elapsed, "week_times": week_times, "memory": memory, "jobs": dict(jobs),
+               "requests": dict(stand_in.requests), "bytes": dict(stand_in.bytes), "messages": counting_bot.messages,
+               "rate_limited": list(limiter.waited) if limiter else None}
+    print_report(results, leagues)
+    return results
+
+
+def print_report(results, leagues):
+    runs = sum(job["runs"] for job in results["jobs"].values())
+    print("{} leagues, {} weeks in {:.1f}s: {:.1f} jobs/s, {} messages".format(
+        leagues, len(results["week_times"]), results["elapsed"], runs / results["elapsed"], results["messages"]))
+    if results["rate_limited"]:
+        print("seconds waited for rate limit tokens by priority: {}".format(
+            ", ".join("{:.1f}".format(waited) for waited in results["rate_limited"])))
+    print("\n{:<14}{:>8}{:>12}{:>12}{:>14}".format("job", "runs", "mean s", "max s", "max late s"))
+    for name, job in sorted(results["jobs"].items()):
+        print("{:<14}{:>8}{:>12.3f}{:>12.3f}{:>14.3f}".format(name, job["runs"], job["total"] / job["runs"],
+                                                               job["max"], job["lateness"]))
+    print("\n{:<36}{:>10}{:>14}".format("endpoint", "requests", "MB"))
+    for family, count in sorted(results["requests"].items(), key=lambda item: -item[1]):
+        print("{:<36}{:>10}{:>14.2f}".format(family, count, results["bytes"][family] / 1e6))
+    print("\n{:<6}{:>10}{:>14}{:>14}".format("week", "seconds", "memory MB", "peak MB"))
+    for week, (seconds, (current, peak)) in enumerate(zip(results["week_times"], results["memory"])):
+        print("{:<6}{:>10.1f}{:>14.1f}{:>14.1f}".format(week + 1, seconds, current / 1e6, peak / 1e6))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the bot against a local stand-in Sleeper API.")
+    parser.add_argument("--leagues", type=int, default=10)
+    parser.add_argument("--weeks", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--polls-per-week", type=int, default=5)
+    parser.add_argument("--players", type=int, default=3000)
+    parser.add_argument("--rate-limit", type=int, default=None, help="Sleeper calls per minute, unlimited by default")
+    args = parser.parse_args()
+    run(args.leagues, args.weeks, args.workers, args.polls_per_week, args.players, args.rate_limit)
@@ -0,0 +1,182 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+from cache import DiskCache
+from sleeper_wrapper.base_api import set_priority, set_response_store
+from sleeper_wrapper.rate_limit import PRIORITY_BACKFILL, PRIORITY_REPORT
+
+"""
+Batch rendering: any report for any weeks of any leagues, e.g. to regenerate a season's recaps, to backfill posts
+missed during an outage, or to diff every report before and after a change.
+
+    python sleeper_ff_bot/render.py --leagues <league_id> ... --weeks 1-14 --reports scores highlights --out recaps
+
+Each (league, week) is rendered on a process pool. Every process answers Sleeper calls from one response cache
+directory, so a response is fetched once per run however many processes need it. Reusing the directory with
+--cache-dir renders from exactly the same responses again, which is what a before and after comparison wants.
+"""
+
+# name -> function (bot module, league_id, week, close_num) returning the message
+REPORTS = {
+    "matchups": lambda bot, league_id, week, close_num: bot.get_matchups_string(league_id, week),
+    "scores": lambda bot, league_id, week, close_num: bot.get_scores_string(league_id, week),
+    "standings": lambda bot, league_id, week, close_num: bot.get_standings_string(league_id, week),
+    "highlights": lambda bot, league_id, week, close_num: bot.get_best_and_worst_string(league_id, week),
+    "close_games": lambda bot, league_id, week, close_num: bot.get_close_games_string(league_id, close_num, week),
+    "bracket": lambda bot, league_id, week, close_num: bot.get_playoff_bracket_string(league_id, week),
+}
+DEFAULT_REPORTS = ("scores", "standings", "highlights", "close_games", "bracket")
+
+
+class ResponseCache:
+    def __init__(self, cache):
+        """
+        A BaseApi response store (see base_api.set_response_store) that keeps every response it is given and
+        answers with it from then on.
+        :param cache: DiskCache shared by every render process
+        """
+        self.cache = cache
+
+    def get(self, url):
+        return self.cache.get("responses/" + url)
+
+    def put(self, url, payload):
+        self.cache.put("responses/" + url, payload)
+
+
+def parse_weeks(text):
+    """
+    :param text: String weeks, e.g. "1-14", "3" or "1-4,9"
+    :return: List of Int weeks, sorted
+    """
+    weeks = set()
+    for part in text.split(","):
+        first, _, last = part.strip().partition("-")
+        weeks.update(range(int(first), int(last or first) + 1))
+    return sorted(weeks)
+
+
+def _init_worker(cache_dir):
+    import bot
+    bot.configure_rate_limiter()
+    set_response_store(ResponseCache(DiskCache(cache_dir)))
+    # a live bot sharing the rate limit keeps priority over a batch
+    set_priority(PRIORITY_BACKFILL)
+
+
+def render_league_week(league_id, week, reports, close_num=20):
+    """
+    Renders one week of a league. A report that fails does not stop the others.
+    :param league_id: String league_id
+    :param week: Int week
+    :param reports: List of report names, keys of REPORTS
+    :param close_num: Int point margin of a close game
+    :return: Tuple (league_id, week, [(report, message or None, error or None)])
+    """
+    import bot
+    results = []
+    for name in reports:
+        try:
+            results.append((name, REPORTS[name](bot, league_id, week, close_num), None))
+        except Exception as e:
+            results.append((name, None, "{}: {}".format(type(e).__name__, e)))
+    return league_id, week, results
+
+
+def _write(out, league_id, week, name, message):
+    if out is None:
+        sys.stdout.write("==> {}/{}/{} <==\n{}\n".format(league_id, week, name, message))
+        return
+    directory = os.path.join(out, str(league_id), str(week))
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name + ".md"), "w", encoding="utf-8") as f:
+        f.write(message)
+
+
+def render(league_ids, weeks, reports=DEFAULT_REPORTS, out=None, workers=0, cache_dir=None, close_num=20):
+    """
+    Renders every report for every week of every league. Output is written in league, week and report order
+    whatever order the renders finish in, so two runs can be diffed.
+    :param league_ids: List of String league_ids
+    :param weeks: List of Int weeks
+    :param reports: List of report names, keys of REPORTS
+    :param out: String directory to write <league_id>/<week>/<report>.md to, or None for stdout
+    :param workers: Int render processes, or 0 to render in this process
+    :param cache_dir: String response cache directory, or None for a fresh one
+    :param close_num: Int point margin of a close game
+    :return: Dict {"rendered": Int, "empty": Int, "failed": [(league_id, week, report, error)]}
+    """
+    unknown = [name for name in reports if name not in REPORTS]
+    if unknown:
+        raise ValueError("unknown reports: {}".format(", ".join(unknown)))
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix="sleeper-render-")
+    tasks = [(league_id, week) for league_id in league_ids for week in weeks]
+    summary = {"rendered": 0, "empty": 0, "failed": []}
+
+    def collect(league_id, week, results):
+        for name, message, error in results:
+            if error is not None:
+                summary["failed"].append((league_id, week, name, error))
+            elif not message:
+                # e.g. the bracket before the playoffs, which the bot would not post either
+                summary["empty"] += 1
+            else:
+                _write(out, league_id, week, name, message)
+                summary["rendered"] += 1
+
+    if workers:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(cache_dir,)) as pool:
+            futures = [pool.submit(render_league_week, league_id, week, list(reports), close_num)
+                       for league_id, week in tasks]
+            for future in futures:
+                collect(*future.result())
+        return summary
+
+    set_response_store(ResponseCache(DiskCache(cache_dir)))
+    set_priority(PRIORITY_BACKFILL)
+    try:
+        for league_id, week in tasks:
+            collect(*render_league_week(league_id, week, reports, close_num))
+    finally:
+        set_response_store(None)
+        set_priority(PRIORITY_REPORT)
+    return summary
+
+
+def _default_leagues():
+    if os.environ.get("LEAGUES"):
+        return sorted(json.loads(os.environ["LEAGUES"]))
+    return [os.environ["LEAGUE_ID"]] if os.environ.get("LEAGUE_ID") else []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the bot's reports for any weeks of any leagues.")
+    parser.add_argument("--leagues", nargs="+", default=_default_leagues(),
+                        help="league ids, LEAGUES or LEAGUE_ID by default")
+    parser.add_argument("--weeks", type=parse_weeks, required=True, help="e.g. 1-14, 3 or 1-4,9")
+    parser.add_argument("--reports", nargs="+", choices=sorted(REPORTS), default=list(DEFAULT_REPORTS))
+    parser.add_argument("--out", default=None, help="directory to write the reports to, stdout by default")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="render processes, 0 for none")
+    parser.add_argument("--cache-dir", default=None, help="response cache to reuse, a fresh one by default")
+    parser.add_argument("--close-num", type=int, default=int(os.environ.get("CLOSE_NUM", 20)))
+    args = parser.parse_args()
+    if not args.leagues:
+        parser.error("no leagues: pass --leagues or set LEAGUES or LEAGUE_ID")
+
+    args.cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="sleeper-render-")
+    # one token bucket for every render process
+    os.environ.setdefault("RATE_LIMIT_FILE", os.path.join(args.cache_dir, "rate_limit"))
+    summary = render(args.leagues, args.weeks, args.reports, args.out, args.workers, args.cache_dir, args.close_num)
+    for league_id, week, name, error in summary["failed"]:
+        print("{}/{}/{} failed: {}".format(league_id, week, name, error), file=sys.stderr)
+    print("rendered {}, {} empty, {} failed; responses cached in {}".format(
+        summary["rendered"], summary["empty"], len(summary["failed"]), args.cache_dir), file=sys.stderr)
+    sys.exit(1 if summary["failed"] else 0)
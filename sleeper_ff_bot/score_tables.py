@@ -0,0 +1,101 @@
+import itertools
+import threading
+from collections import OrderedDict
+from sleeper_wrapper import Stats, SleeperUnavailable, UNCHANGED
+
+"""
+Weekly player points by scoring system, computed once and shared by every league that scores the same way.
+
+A table is keyed by season, week, ScoringRules.key and the version of the week's stats it was scored from. The week's
+stats are fetched once for every scoring system, with a conditional GET, so an unchanged payload is neither parsed nor
+scored again; a new payload gets a new version and each table is rescored the next time it is asked for. Tables of
+final weeks are persisted and never rescored. Projections are tabled the same way, in their own ScoreTables.
+"""
+
+
+class ScoreTables:
+    def __init__(self, cache, stats=None, max_tables=64, max_weeks=4, projections=False):
+        """
+        :param cache: DiskCache the final weeks' tables are persisted to
+        :param stats: Stats the week stats are fetched with
+        :param max_tables: Int tables kept in memory, least recently used first out
+        :param max_weeks: Int weeks whose stats are kept in memory to score other scoring systems from
+        :param projections: Boolean True to score the week's projections instead of its stats
+        """
+        self.cache = cache
+        self.projections = projections
+        self._name = "projections" if projections else "scores"
+        self.stats = stats or Stats()
+        self.max_tables = max_tables
+        self.max_weeks = max_weeks
+        # (season, week) -> (stats version, week stats)
+        self._weeks = OrderedDict()
+        # (season, week, rules key) -> (stats version or None once final, {player_id: points})
+        self._tables = OrderedDict()
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+        # (season, week) -> Lock, so leagues asking for the same week at once wait for one fetch and scoring
+        self._week_locks = {}
+
+    def _keep(self, store, key, value, size):
+        with self._lock:
+            store[key] = value
+            store.move_to_end(key)
+            while len(store) > size:
+                store.popitem(last=False)
+
+    def _week_stats(self, season, week):
+        """returns (stats version, week stats), fetching the stats only if they changed"""
+        kept = self._weeks.get((season, week))
+        fetch = self.stats.get_week_projections if self.projections else self.stats.get_week_stats
+        try:
+            week_stats = fetch("regular", season, week, if_changed="score_tables")
+        except SleeperUnavailable:
+            # BaseApi keeps no copy of a week's stats to answer an outage with; the one kept here is it
+            if kept is not None:
+                return kept
+            raise
+        if week_stats is UNCHANGED:
+            if kept is not None:
+                return kept
+            # another ScoreTables saw this response last; this one has to parse it
+            week_stats = fetch("regular", season, week)
+        elif kept is not None and (week_stats is kept[1] or not week_stats):
+            # a response store answered with the same payload again, or Sleeper is failing
+            return kept
+        kept = (next(self._versions), week_stats or {})
+        self._keep(self._weeks, (season, week), kept, self.max_weeks)
+        self.stats.mark_consumed("score_tables")
+        return kept
+
+    def get(self, rules, season, week, final=False):
+        """
+        :param rules: ScoringRules of the league
+        :param season: Int season
+        :param week: Int week
+        :param final: Boolean True once stat corrections are done with the week; its table is then persisted
+        :return: Dict {player_id: points} of every player with a stat line; shared, so it must not be modified
+        """
+        key = (season, week, rules.key)
+        cache_key = "{}/{}/{}/{}".format(self._name, season, week, rules.key)
+        with self._lock:
+            week_lock = self._week_locks.setdefault((season, week), threading.Lock())
+        with week_lock:
+            table = self._tables.get(key)
+            if table is not None and table[0] is None:
+                self._keep(self._tables, key, table, self.max_tables)
+                return table[1]
+            if final:
+                persisted = self.cache.get(cache_key)
+                if persisted is not None:
+                    self._keep(self._tables, key, (None, persisted), self.max_tables)
+                    return persisted
+
+            version, week_stats = self._week_stats(season, week)
+            if table is None or table[0] != version:
+                table = (version, rules.score_all(week_stats))
+            if final and week_stats:
+                self.cache.put(cache_key, table[1])
+                table = (None, table[1])
+            self._keep(self._tables, key, table, self.max_tables)
+            return table[1]
@@ -0,0 +1,334 @@
+"""
+Sharded run mode for many leagues: python sleeper_ff_bot/shards.py, with LEAGUES set to {"<league_id>": "<webhook>"}.
+
+Leagues are spread over SHARD_WORKERS worker processes by consistent hashing, and each worker only polls and posts
+for its own leagues. The coordinator process fetches the data every league shares (state, players and the week's
+stats and projections) and publishes it to a directory; workers answer those calls from there instead of calling
+Sleeper. SIGUSR1 adds a worker and SIGUSR2 removes one; only the leagues that move to a different worker are
+restarted, and they take their transaction cursors with them.
+"""
+import bisect
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pendulum
+import schedule
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+from cache import DiskCache
+from snapshot import load_snapshot
+from sleeper_wrapper import State, Players, Stats
+from sleeper_wrapper.base_api import endpoint_family, set_priority, set_response_store
+from sleeper_wrapper.rate_limit import PRIORITY_LIVE
+
+# Sleeper responses that are the same for every league; the coordinator fetches them, workers only read them
+SHARED_FAMILIES = {
+    # family: seconds between publishes
+    "state/nfl": 600,
+    "players/nfl": 86400,
+    "stats/nfl/regular/*/*": 300,
+    "projections/nfl/regular/*/*": 300,
+}
+
+
+class HashRing:
+    def __init__(self, nodes=(), replicas=64):
+        """
+        Consistent hashing: adding or removing a node only moves the keys of its share of the ring.
+        :param nodes: Iterable of String node names
+        :param replicas: Int points per node on the ring, to even out the shares
+        """
+        self.replicas = replicas
+        self._points = []
+        self._nodes = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value):
+        return int(hashlib.md5(value.encode("utf-8")).hexdigest()[:16], 16)
+
+    def add(self, node):
+        for i in range(self.replicas):
+            point = self._hash("{}#{}".format(node, i))
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._nodes.insert(index, node)
+
+    def remove(self, node):
+        keep = [(point, owner) for point, owner in zip(self._points, self._nodes) if owner != node]
+        self._points = [point for point, _ in keep]
+        self._nodes = [owner for _, owner in keep]
+
+    def node_for(self, key):
+        """
+        :param key: String key, e.g. a league_id
+        :return: String name of the node that owns the key
+        """
+        index = bisect.bisect(self._points, self._hash(str(key))) % len(self._points)
+        return self._nodes[index]
+
+    def assign(self, keys):
+        """
+        :param keys: Iterable of String keys
+        :return: Dict {node: [keys]} for the nodes that own at least one key
+        """
+        result = {}
+        for key in keys:
+            result.setdefault(self.node_for(key), []).append(key)
+        return result
+
+
+class SharedResponses:
+    def __init__(self, cache, publish=False, memo_size=8):
+        """
+        A BaseApi response store (see base_api.set_response_store) backed by a directory every process can read.
+        :param cache: DiskCache the responses are shared through
+        :param publish: Boolean True in the coordinator: fresh responses are written and nothing is answered from
+            the store. False in workers: responses are read, never written.
+        :param memo_size: Int number of decoded responses a worker keeps in memory
+        """
+        self.cache = cache
+        self.publish = publish
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """
+        :param url: String url of the call
+        :return: The published response, or None to call Sleeper, e.g. when it is missing or the coordinator has not
+            refreshed it for three publish intervals
+        """
+        interval = SHARED_FAMILIES.get(endpoint_family(url))
+        if self.publish or interval is None:
+            return None
+        key = "shared/" + url
+        modified = self.cache.modified(key)
+        if modified is None or time.time() - modified > 3 * interval:
+            return None
+        with self._lock:
+            memo = self._memo.get(url)
+            if memo is not None and memo[0] == modified:
+                self._memo.move_to_end(url)
+                return memo[1]
+        payload = self.cache.get(key)
+        if payload is None:
+            return None
+        with self._lock:
+            self._memo[url] = (modified, payload)
+            self._memo.move_to_end(url)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return payload
+
+    def put(self, url, payload):
+        if self.publish and endpoint_family(url) in SHARED_FAMILIES:
+            self.cache.put("shared/" + url, payload)
+
+
+def current_week(state):
+    """
+    :param state: State
+    :return: Int current week, counted the same way as bot.get_current_week
+    """
+    starting_week = pendulum.datetime(state.get_season_start_year(), state.get_season_start_month(),
+                                      state.get_season_start_day())
+    return pendulum.today().diff(starting_week).in_weeks() + 1
+
+
+def publish_players():
+    Players().get_all_players()
+
+
+def publish_state_and_stats():
+    """
+    Refetches the state, then this week's and last week's stats and projections. BaseApi hands every response to
+    the publishing SharedResponses.
+    :return: None
+    """
+    state = State()
+    if not state.get_state():
+        return
+    season = state.get_season_start_year()
+    week = current_week(state)
+    stats = Stats()
+    for published_week in range(max(1, week - 1), week + 1):
+        stats.get_week_stats("regular", season, published_week)
+        stats.get_week_projections("regular", season, published_week)
+
+
+def snapshot_path(name):
+    """
+    :param name: String worker name
+    :return: String path of the worker's snapshot
+    """
+    return os.path.join(os.environ.get("SNAPSHOT_DIR", "."), "snapshot-{}.bin".format(name))
+
+
+def run_worker(name, leagues, shared_dir, close_num, transaction_cursors=None):
+    """
+    Entry point of a worker process: runs the bot for its leagues, reading shared data from the coordinator.
+    :param name: String worker name, also used for its snapshot
+    :param leagues: Dict {league_id: webhook} of the leagues it owns
+    :param shared_dir: String directory the coordinator publishes to
+    :param close_num: Int point margin of a close game
+    :param transaction_cursors: Dict {league_id: created} handed over from the leagues' previous workers, or None
+    :return: None
+    """
+    set_response_store(SharedResponses(DiskCache(shared_dir)))
+
+    import bot
+    from discord import Discord
+    from executor import JobExecutor
+
+    bot.configure_rate_limiter()
+    path = snapshot_path(name)
+    snapshot = bot.restore_warm_state(path)
+    bot.restore_transaction_cursors(transaction_cursors or {})
+    executor = JobExecutor(workers=int(os.environ.get("JOB_WORKERS", 4)), tracer=bot.tracer)
+    for league_id, webhook in sorted(leagues.items()):
+        bot.schedule_league(executor, league_id, Discord(webhook, int(os.environ.get("LIVE_SCORES_INTERVAL", 60))),
+                            close_num, ":" + league_id)
+    bot.run_forever(executor, path, snapshot)
+
+
+class Coordinator:
+    def __init__(self, leagues, workers, shared_dir, close_num=20):
+        """
+        :param leagues: Dict {league_id: webhook}
+        :param workers: Int number of worker processes
+        :param shared_dir: String directory shared data is published to
+        :param close_num: Int point margin of a close game
+        """
+        self.leagues = leagues
+        self.shared_dir = shared_dir
+        self.close_num = close_num
+        self.ring = HashRing()
+        self.names = []
+        self.assignments = {}
+        self.processes = {}
+        self._resize = 0
+        self._context = multiprocessing.get_context("spawn")
+        for _ in range(workers):
+            self._add_node()
+
+    def _add_node(self):
+        name = "worker-{}".format(len(self.names))
+        self.names.append(name)
+        self.ring.add(name)
+
+    def _start(self, name, transaction_cursors=None):
+        leagues = {league_id: self.leagues[league_id] for league_id in self.assignments[name]}
+        process = self._context.Process(target=run_worker, name=name,
+                                        args=(name, leagues, self.shared_dir, self.close_num, transaction_cursors))
+        process.start()
+        self.processes[name] = process
+
+    def _stop(self, name):
+        process = self.processes.pop(name, None)
+        if process is not None:
+            # SIGTERM, so the worker saves its snapshot before it exits
+            process.terminate()
+            process.join(30)
+            if process.is_alive():
+                # a worker still running beside its replacement would post everything twice
+                os.kill(process.pid, signal.SIGKILL)
+                process.join()
+
+    @staticmethod
+    def _saved_cursors(names):
+        """
+        :param names: List of the stopped worker names
+        :return: Dict {league_id: created} of the newest transaction cursor each league has in their snapshots
+        """
+        cursors = {}
+        for name in names:
+            snapshot = load_snapshot(snapshot_path(name)) or {}
+            for league_id, created in (snapshot.get("transaction_cursors") or {}).items():
+                cursors[league_id] = max(created, cursors.get(league_id, 0))
+        return cursors
+
+    def rebalance(self):
+        """
+        Restarts only the workers whose leagues changed. A league that moves is handed the transaction cursor its
+        previous worker saved on the way out, so it neither misses nor reposts transactions.
+        :return: List of the restarted worker names
+        """
+        assignments = {name: sorted(leagues) for name, leagues in self.ring.assign(self.leagues).items()}
+        changed = [name for name in set(assignments) | set(self.assignments)
+                   if assignments.get(name) != self.assignments.get(name)]
+        for name in changed:
+            self._stop(name)
+        cursors = self._saved_cursors(changed)
+        self.assignments = assignments
+        for name in changed:
+            if name in assignments:
+                self._start(name, {league_id: cursors[league_id] for league_id in assignments[name]
+                                   if league_id in cursors})
+        return sorted(changed)
+
+    def add_worker(self):
+        self._add_node()
+        return self.rebalance()
+
+    def remove_worker(self):
+        if len(self.names) > 1:
+            self.ring.remove(self.names.pop())
+        return self.rebalance()
+
+    def run(self):
+        set_response_store(SharedResponses(DiskCache(self.shared_dir), publish=True))
+        # every worker's live scoring waits on what the coordinator publishes
+        set_priority(PRIORITY_LIVE)
+        publish_players()
+        publish_state_and_stats()
+
+        # resize from the loop rather than inside the signal handler
+        signal.signal(signal.SIGUSR1, lambda signum, frame: setattr(self, "_resize", self._resize + 1))
+        signal.signal(signal.SIGUSR2, lambda signum, frame: setattr(self, "_resize", self._resize - 1))
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        self.rebalance()
+
+        schedule.every(SHARED_FAMILIES["players/nfl"]).seconds.do(publish_players)
+        schedule.every(SHARED_FAMILIES["stats/nfl/regular/*/*"]).seconds.do(publish_state_and_stats)
+        while True:
+            schedule.run_pending()
+            while self._resize:
+                if self._resize > 0:
+                    self._resize -= 1
+                    print("added a worker, restarted {}".format(", ".join(self.add_worker())))
+                else:
+                    self._resize += 1
+                    print("removed a worker, restarted {}".format(", ".join(self.remove_worker())))
+            for name, process in list(self.processes.items()):
+                if not process.is_alive():
+                    print("{} exited with {}, restarting it".format(name, process.exitcode))
+                    self._start(name)
+            time.sleep(1)
+
+    def stop(self):
+        for name in list(self.processes):
+            self._stop(name)
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    shared_dir = os.environ.get("SHARED_DIR", "shared")
+    # one token bucket for the coordinator and every worker
+    os.environ.setdefault("RATE_LIMIT_FILE", os.path.join(shared_dir, "rate_limit"))
+    os.makedirs(shared_dir, exist_ok=True)
+
+    import bot
+    bot.configure_rate_limiter()
+
+    Coordinator(json.loads(os.environ["LEAGUES"]), int(os.environ.get("SHARD_WORKERS", os.cpu_count() or 2)),
+                shared_dir, int(os.environ.get("CLOSE_NUM", 20))).run()
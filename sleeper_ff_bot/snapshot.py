@@ -0,0 +1,110 @@
+import datetime as dt
+import json
+import os
+import tempfile
+import zlib
+
+"""
+Warm-restart snapshots of the bot's in-memory state.
+
+A snapshot is a single zlib compressed JSON document holding the player index, season state, league metadata,
+transaction cursors and scheduler bookkeeping, so a restarted dyno can start working without downloading anything.
+"""
+
+SNAPSHOT_VERSION = 1
+
+# The only player fields the bot reads. Keeping just these shrinks players/nfl from megabytes to a few hundred KB.
+PLAYER_FIELDS = ("first_name", "last_name", "position", "fantasy_positions", "team", "status", "injury_status",
+                 "search_rank", "years_exp")
+
+
+def compact_players(players):
+    """
+    Strips a players/nfl payload down to the fields the bot uses.
+    :param players: Dict {player_id: player} from Players().get_all_players()
+    :return: Dict {player_id: {field: value}} with only PLAYER_FIELDS
+    """
+    return {player_id: {field: player.get(field) for field in PLAYER_FIELDS} for player_id, player in players.items()}
+
+
+def save_snapshot(path, sections):
+    """
+    Atomically writes a snapshot file.
+    :param path: String path of the snapshot file
+    :param sections: Dict of JSON serializable sections to store
+    :return: None
+    """
+    payload = dict(sections)
+    payload["version"] = SNAPSHOT_VERSION
+    payload["saved_at"] = dt.datetime.now().timestamp()
+    data = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 6)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # a temp file of its own, so two saves at once never write into the same file
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_snapshot(path):
+    """
+    Reads a snapshot file.
+    :param path: String path of the snapshot file
+    :return: Dict of the stored sections, or None if there is no usable snapshot
+    """
+    try:
+        with open(path, "rb") as f:
+            payload = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+    except (OSError, ValueError, zlib.error):
+        return None
+    if payload.get("version") != SNAPSHOT_VERSION:
+        return None
+    return payload
+
+
+def _job_key(index, job):
+    return "{}:{}:{}:{}".format(index, job.unit, job.at_time, job.start_day)
+
+
+def dump_jobs(jobs):
+    """
+    Records when each scheduled job last ran and is next due.
+    :param jobs: List of schedule jobs, e.g. schedule.jobs
+    :return: Dict {job_key: {"last_run": timestamp, "next_run": timestamp}}
+    """
+    result = {}
+    for i, job in enumerate(jobs):
+        result[_job_key(i, job)] = {
+            "last_run": job.last_run.timestamp() if job.last_run else None,
+            "next_run": job.next_run.timestamp() if job.next_run else None,
+        }
+    return result
+
+
+def restore_jobs(jobs, saved, grace=3600):
+    """
+    Re-arms jobs that came due while the bot was down, so a restart does not skip a weekly post.
+    :param jobs: List of schedule jobs registered in the same order as when the snapshot was taken
+    :param saved: Dict returned by dump_jobs
+    :param grace: Int seconds; jobs that were due longer ago than this are not caught up
+    :return: None
+    """
+    now = dt.datetime.now()
+    for i, job in enumerate(jobs):
+        entry = saved.get(_job_key(i, job))
+        if not entry:
+            continue
+        if entry["last_run"] is not None:
+            job.last_run = dt.datetime.fromtimestamp(entry["last_run"])
+        if entry["next_run"] is None:
+            continue
+        missed_run = dt.datetime.fromtimestamp(entry["next_run"])
+        if now - dt.timedelta(seconds=grace) <= missed_run <= now:
+            job.next_run = missed_run
@@ -0,0 +1,289 @@
+import datetime as dt
+import math
+import threading
+import time
+from array import array
+
+import pendulum
+
+from constants import KICKOFFS, KICKOFF_GAMES, KICKOFF_TIMEZONE
+
+"""
+Live score timelines: every matchup's actual and projected scores sampled through the game windows, for win
+probability now and for the week's comebacks once it is over.
+
+Samples live in fixed-size ring buffers of machine floats, so a matchup costs a few KB however long it is sampled
+for. What the week summary needs, the largest lead each side held and the lowest win probability it fell to, is
+kept as running extremes so it survives the ring wrapping around.
+"""
+
+# variance of a team's remaining points per projected point left; a full 120 point projection spreads by ~25 points
+VARIANCE_PER_POINT = 5.0
+# the NFL week starts on Tuesday morning UTC, once Monday night's game is over
+WEEK_START = (1, 9)
+
+
+def local_date(now):
+    """
+    :param now: datetime.datetime in UTC
+    :return: datetime.date in KICKOFF_TIMEZONE
+    """
+    return pendulum.instance(now, tz="UTC").in_timezone(KICKOFF_TIMEZONE).date()
+
+
+def kickoff_at(day, hour, minute):
+    """
+    :param day: datetime.date of the kickoff in KICKOFF_TIMEZONE
+    :param hour: Int local hour of the kickoff
+    :param minute: Int local minute of the kickoff
+    :return: datetime.datetime of the kickoff in UTC, naive like the times it is compared with
+    """
+    kickoff = pendulum.datetime(day.year, day.month, day.day, hour, minute, tz=KICKOFF_TIMEZONE).in_timezone("UTC")
+    return dt.datetime(kickoff.year, kickoff.month, kickoff.day, kickoff.hour, kickoff.minute)
+
+
+def in_game_window(now, length_minutes=240):
+    """
+    :param now: datetime.datetime in UTC
+    :param length_minutes: Int minutes a game window lasts after its kickoff
+    :return: Boolean True if a kickoff window is in progress
+    """
+    today = local_date(now)
+    for weekday, hour, minute in KICKOFFS:
+        kickoff = kickoff_at(today - dt.timedelta(days=(today.weekday() - weekday) % 7), hour, minute)
+        if 0 <= (now - kickoff).total_seconds() <= length_minutes * 60:
+            return True
+    return False
+
+
+def remaining_share(now, length_minutes=240):
+    """
+    :param now: datetime.datetime in UTC
+    :param length_minutes: Int minutes a game window lasts after its kickoff
+    :return: Float share of the week's games still to be played, counting games in progress by the time left
+    """
+    weekday, hour = WEEK_START
+    start = (now - dt.timedelta(days=(now.weekday() - weekday) % 7)).replace(hour=hour, minute=0, second=0,
+                                                                             microsecond=0)
+    if start > now:
+        start -= dt.timedelta(days=7)
+    start_day = local_date(start)
+    left = 0.0
+    for (kickoff_weekday, kickoff_hour, kickoff_minute), games in zip(KICKOFFS, KICKOFF_GAMES):
+        kickoff = kickoff_at(start_day + dt.timedelta(days=(kickoff_weekday - start_day.weekday()) % 7),
+                             kickoff_hour, kickoff_minute)
+        played = (now - kickoff).total_seconds() / (length_minutes * 60)
+        left += games * (1 - min(max(played, 0.0), 1.0))
+    return left / sum(KICKOFF_GAMES)
+
+
+def win_probability(score, left, opponent_score, opponent_left):
+    """
+    Normal approximation of the final margin: each side adds the projected points it has left, with a variance that
+    grows with the points left to score.
+    :param left: Float projected points of the team's starters still to play, see League.get_scoreboards
+    :param opponent_left: Float projected points of the opponent's starters still to play
+    :return: Float probability that the first team wins
+    """
+    margin = (score + left) - (opponent_score + opponent_left)
+    variance = VARIANCE_PER_POINT * (left + opponent_left)
+    if variance <= 0:
+        return 1.0 if margin > 0 else 0.0 if margin < 0 else 0.5
+    return 0.5 * (1 + math.erf(margin / math.sqrt(2 * variance)))
+
+
+class MatchupTimeline:
+    __slots__ = ("teams", "capacity", "count", "_next", "times", "scores", "projections", "left",
+                 "max_lead", "min_win_probability")
+
+    def __init__(self, teams, capacity=128):
+        """
+        :param teams: Tuple (team_name, team_name) in the order scores are recorded
+        :param capacity: Int samples kept; older samples are overwritten
+        """
+        self.teams = tuple(teams)
+        self.capacity = capacity
+        self.count = 0
+        self._next = 0
+        # sample i is times[i], scores[2i:2i+2], projections[2i:2i+2] and left[2i:2i+2]
+        self.times = array("d", bytes(8 * capacity))
+        self.left = array("f", bytes(8 * capacity))
+        self.scores = array("f", bytes(8 * capacity))
+        self.projections = array("f", bytes(8 * capacity))
+        self.max_lead = array("f", (0.0, 0.0))
+        self.min_win_probability = array("f", (1.0, 1.0))
+
+    def last(self):
+        """
+        :return: Tuple (time, (score, score), (projected, projected)) of the newest sample, or None
+        """
+        if not self.count:
+            return None
+        i = (self._next - 1) % self.capacity
+        return self.times[i], tuple(self.scores[2 * i:2 * i + 2]), tuple(self.projections[2 * i:2 * i + 2])
+
+    def record(self, scores, projections, left, at=None):
+        """
+        Adds a sample, unless the scores and projections are the same as the newest one.
+        :param scores: Tuple (score, score)
+        :param projections: Tuple (projected, projected)
+        :param left: Tuple (projected points left, projected points left) of the starters still to play
+        :param at: Float unix time of the sample, now by default
+        :return: Boolean True if the sample was added
+        """
+        at = at if at is not None else time.time()
+        scores = tuple(float(score or 0.0) for score in scores)
+        projections = tuple(float(projected or 0.0) for projected in projections)
+        left = tuple(float(points or 0.0) for points in left)
+        last = self.last()
+        # stored as single precision, so compare the same way
+        if last is not None and last[1:] == (tuple(array("f", scores)), tuple(array("f", projections))) and \
+                self._last_left() == tuple(array("f", left)):
+            return False
+        i = self._next
+        self.times[i] = at
+        self.scores[2 * i:2 * i + 2] = array("f", scores)
+        self.projections[2 * i:2 * i + 2] = array("f", projections)
+        self.left[2 * i:2 * i + 2] = array("f", left)
+        self._next = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+        for side in (0, 1):
+            self.max_lead[side] = max(self.max_lead[side], scores[side] - scores[1 - side])
+        probability = win_probability(scores[0], left[0], scores[1], left[1])
+        self.min_win_probability[0] = min(self.min_win_probability[0], probability)
+        self.min_win_probability[1] = min(self.min_win_probability[1], 1 - probability)
+        return True
+
+    def _last_left(self):
+        i = (self._next - 1) % self.capacity
+        return tuple(self.left[2 * i:2 * i + 2])
+
+    def samples(self):
+        """
+        :return: List [(time, (score, score), (projected, projected))] oldest first
+        """
+        start = (self._next - self.count) % self.capacity
+        result = []
+        for offset in range(self.count):
+            i = (start + offset) % self.capacity
+            result.append((self.times[i], tuple(self.scores[2 * i:2 * i + 2]),
+                           tuple(self.projections[2 * i:2 * i + 2])))
+        return result
+
+    def win_probability(self):
+        """
+        :return: Float probability that the first team wins, from the newest sample, or None before any sample
+        """
+        last = self.last()
+        if last is None:
+            return None
+        scores, left = last[1], self._last_left()
+        return win_probability(scores[0], left[0], scores[1], left[1])
+
+    def summary(self):
+        """
+        :return: Dict of the finished matchup: winner and loser names, final scores, the largest lead the loser
+            blew and the lowest win probability the winner came back from; None before any sample
+        """
+        last = self.last()
+        if last is None:
+            return None
+        scores = last[1]
+        winner = 0 if scores[0] >= scores[1] else 1
+        loser = 1 - winner
+        return {
+            "winner": self.teams[winner], "loser": self.teams[loser],
+            "scores": (scores[winner], scores[loser]),
+            "lead_blown": float(self.max_lead[loser]),
+            "comeback_win_probability": float(self.min_win_probability[winner]),
+        }
+
+    def nbytes(self):
+        """
+        :return: Int bytes held by the sample buffers
+        """
+        return sum(buffer.itemsize * len(buffer) for buffer in (self.times, self.scores, self.left,
+                                                                 self.projections, self.max_lead,
+                                                                 self.min_win_probability))
+
+
+class ScoreTimelines:
+    def __init__(self, capacity=128, weeks_kept=2):
+        """
+        Every league's matchup timelines, shared by the jobs that sample and report them.
+        :param capacity: Int samples kept per matchup
+        :param weeks_kept: Int most recent weeks kept per league; older ones are dropped when a new week starts
+        """
+        self.capacity = capacity
+        self.weeks_kept = weeks_kept
+        # (league_id, week) -> {matchup_id: MatchupTimeline}
+        self._weeks = {}
+        self._lock = threading.Lock()
+
+    def record(self, league_id, week, scoreboards, at=None):
+        """
+        :param league_id: String league_id
+        :param week: Int week
+        :param scoreboards: Dict {matchup_id: [(team_name, score, projected, left), ...]}, see League.get_scoreboards
+        :param at: Float unix time of the sample, now by default
+        :return: Int number of matchups whose scores moved
+        """
+        key = (str(league_id), week)
+        with self._lock:
+            timelines = self._weeks.get(key)
+            if timelines is None:
+                timelines = self._weeks[key] = {}
+                weeks = sorted(w for league, w in self._weeks if league == key[0])
+                for old_week in weeks[:-self.weeks_kept]:
+                    del self._weeks[(key[0], old_week)]
+            moved = 0
+            for matchup_id, matchup in scoreboards.items():
+                if len(matchup) != 2:
+                    continue
+                timeline = timelines.get(matchup_id)
+                if timeline is None:
+                    timeline = timelines[matchup_id] = MatchupTimeline((matchup[0][0], matchup[1][0]),
+                                                                       self.capacity)
+                if matchup[0][0] == timeline.teams[1]:
+                    # Sleeper listed the teams the other way round this time
+                    matchup = (matchup[1], matchup[0])
+                if timeline.record((matchup[0][1], matchup[1][1]), (matchup[0][2], matchup[1][2]),
+                                   (matchup[0][3], matchup[1][3]), at):
+                    moved += 1
+            return moved
+
+    def get(self, league_id, week):
+        """
+        :return: Dict {matchup_id: MatchupTimeline} of the league's week, empty if it was never sampled
+        """
+        with self._lock:
+            return dict(self._weeks.get((str(league_id), week), {}))
+
+    def week_summary(self, league_id, week):
+        """
+        :return: List of MatchupTimeline.summary dicts, the biggest comeback first
+        """
+        summaries = [timeline.summary() for timeline in self.get(league_id, week).values()]
+        return sorted((summary for summary in summaries if summary is not None),
+                      key=lambda summary: (summary["comeback_win_probability"], -summary["lead_blown"]))
+
+
+def get_comebacks_string(summaries, week, count=3):
+    """
+    Creates and returns the week's comebacks message.
+    :param summaries: List returned by ScoreTimelines.week_summary
+    :param week: Int week
+    :param count: Int matchups listed
+    :return: String message
+    """
+    lines = ["**================================**", "**Comebacks, week {}**".format(week),
+             "**================================**", ""]
+    comebacks = [summary for summary in summaries if summary["lead_blown"] > 0][:count]
+    if not comebacks:
+        lines.append("Every winner led from start to finish.")
+    for summary in comebacks:
+        lines.append("**{}** beat {} {:.2f} to {:.2f}, after trailing by {:.2f} with a {:.0f}% chance to win".format(
+            summary["winner"], summary["loser"], summary["scores"][0], summary["scores"][1], summary["lead_blown"],
+            100 * summary["comeback_win_probability"]))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,305 @@
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+import requests
+
+"""
+Lightweight tracing: a root span per scheduled job, child spans for report builders and wrapper methods, and one
+span per Sleeper API call. Finished traces go to an exporter; slow jobs can be sampled with a stack profiler.
+"""
+
+
+class JsonlExporter:
+    def __init__(self, path):
+        """
+        :param path: String file each finished trace is appended to, one span per line
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        with self._lock:
+            with open(self.path, "a") as f:
+                for span in spans:
+                    f.write(json.dumps(span, separators=(",", ":")) + "\n")
+
+
+class OtlpExporter:
+    def __init__(self, endpoint, service_name="sleeper-ff-bot"):
+        """
+        :param endpoint: String OTLP/HTTP JSON traces url, e.g. http://localhost:4318/v1/traces
+        :param service_name: String service.name resource attribute
+        """
+        self.endpoint = endpoint
+        self.service_name = service_name
+
+    def to_otlp(self, spans):
+        """
+        :param spans: List of span dicts as produced by Tracer
+        :return: Dict OTLP/JSON ExportTraceServiceRequest
+        """
+        otlp_spans = []
+        for span in spans:
+            otlp_spans.append({
+                "traceId": span["trace_id"],
+                "spanId": span["span_id"],
+                "parentSpanId": span["parent_id"] or "",
+                "name": span["name"],
+                "kind": 3 if span["name"] == "http" else 1,
+                "startTimeUnixNano": str(int(span["start"] * 1e9)),
+                "endTimeUnixNano": str(int((span["start"] + span["duration"]) * 1e9)),
+                "attributes": [{"key": key, "value": {"stringValue": str(value)}}
+                               for key, value in span["attributes"].items()],
+                "status": {"code": 2 if span.get("error") else 1},
+            })
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "sleeper_ff_bot.tracing"}, "spans": otlp_spans}],
+        }]}
+
+    def export(self, spans):
+        try:
+            requests.post(self.endpoint, json=self.to_otlp(spans), timeout=5)
+        except requests.exceptions.RequestException:
+            # tracing must never break a job
+            pass
+
+
+class SamplingProfiler:
+    def __init__(self, thread_id, interval=0.01):
+        """
+        Samples one thread's stack every interval seconds until stopped.
+        :param thread_id: Int threading.get_ident() of the thread to sample
+        :param interval: Float seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = traceback.extract_stack(frame, limit=8)
+            self.samples[" <- ".join("{}:{}".format(os.path.basename(f.filename), f.name)
+                                     for f in reversed(stack))] += 1
+
+    def top(self, n=5):
+        """
+        :return: List [(stack, samples), ...] of the hottest stacks
+        """
+        return self.samples.most_common(n)
+
+
+class Tracer:
+    def __init__(self, exporter=None, sample_rate=1.0, slow_threshold=None):
+        """
+        :param exporter: JsonlExporter, OtlpExporter or None to disable tracing
+        :param sample_rate: Float share of root spans (jobs) that are traced
+        :param slow_threshold: Float seconds after which a running job starts being profiled, or None
+        """
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self._local = threading.local()
+        # thread_id -> SamplingProfiler of the slow job running on that thread; None while the job is not slow yet
+        self._profilers = {}
+        self._profilers_lock = threading.Lock()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+            self._local.spans = []
+        return self._local.stack
+
+    def start_span(self, name, **attributes):
+        """
+        Opens a span as a child of the current one, or a new trace if there is none.
+        :return: Dict span, or None if this trace is not sampled
+        """
+        if self.exporter is None:
+            return None
+        stack = self._stack()
+        if stack:
+            parent = stack[-1]
+            if parent is None:
+                stack.append(None)
+                return None
+            trace_id = parent["trace_id"]
+            parent_id = parent["span_id"]
+        else:
+            if random.random() >= self.sample_rate:
+                stack.append(None)
+                return None
+            trace_id = "{:032x}".format(random.getrandbits(128))
+            parent_id = None
+            self._local.spans = []
+            self._local.profile_timer = None
+            if self.slow_threshold is not None:
+                with self._profilers_lock:
+                    self._profilers[threading.get_ident()] = None
+                self._local.profile_timer = threading.Timer(self.slow_threshold, self._start_profiler,
+                                                            (threading.get_ident(),))
+                self._local.profile_timer.daemon = True
+                self._local.profile_timer.start()
+        span = {"trace_id": trace_id, "span_id": "{:016x}".format(random.getrandbits(64)), "parent_id": parent_id,
+                "name": name, "start": time.time(), "duration": None, "attributes": attributes}
+        stack.append(span)
+        return span
+
+    def _start_profiler(self, thread_id):
+        with self._profilers_lock:
+            # the job may have finished while the timer was firing
+            if thread_id not in self._profilers:
+                return
+            profiler = SamplingProfiler(thread_id)
+            self._profilers[thread_id] = profiler
+        profiler.start()
+
+    def end_span(self, span, error=None):
+        if self.exporter is None:
+            # start_span pushed nothing
+            return
+        stack = self._stack()
+        stack.pop()
+        if span is None:
+            return
+        span["duration"] = time.time() - span["start"]
+        if error is not None:
+            span["error"] = repr(error)
+        self._local.spans.append(span)
+        if stack:
+            return
+
+        # the root span finished: stop profiling and export the whole trace
+        if self._local.profile_timer is not None:
+            self._local.profile_timer.cancel()
+        with self._profilers_lock:
+            profiler = self._profilers.pop(threading.get_ident(), None)
+        if profiler is not None:
+            profiler.stop()
+            span["attributes"]["profile"] = profiler.top()
+        spans, self._local.spans = self._local.spans, []
+        self.exporter.export(spans)
+
+    def span(self, name, **attributes):
+        """
+        Context manager opening a child span.
+        :param name: String span name
+        :param attributes: Span attributes
+        """
+        return _SpanContext(self, name, attributes)
+
+    def traced(self, name=None):
+        """
+        Decorator opening a span around every call of the function.
+        :param name: String span name, defaults to the function's name
+        """
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.exporter is None:
+                    return func(*args, **kwargs)
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def instrument(self, cls, method_names):
+        """
+        Wraps methods of a class, e.g. League, in spans named "<Class>.<method>".
+        :param cls: The class to instrument
+        :param method_names: List of method names
+        :return: None
+        """
+        for method_name in method_names:
+            method = getattr(cls, method_name)
+            setattr(cls, method_name, self.traced("{}.{}".format(cls.__name__, method_name))(method))
+
+    def bind(self, func):
+        """
+        sleeper_wrapper thread state carrier: wraps func so the spans it opens on another thread, e.g. a pool
+        thread, are children of the current span and exported with its trace.
+        :param func: The function to wrap
+        :return: Function
+        """
+        if self.exporter is None:
+            return func
+        stack = self._stack()
+        if not stack:
+            return func
+        parent, spans = stack[-1], self._local.spans
+
+        @functools.wraps(func)
+        def bound(*args, **kwargs):
+            self._stack()
+            previous = (self._local.stack, self._local.spans)
+            # an unsampled parent (None) keeps the children unsampled too
+            self._local.stack, self._local.spans = [parent], spans
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.stack, self._local.spans = previous
+        return bound
+
+    def record_call(self, url, status, nbytes, duration, stale):
+        """
+        sleeper_wrapper call listener: records an API call as a finished child span of the current span.
+        """
+        stack = self._stack() if self.exporter is not None else None
+        if not stack or stack[-1] is None:
+            return
+        parent = stack[-1]
+        self._local.spans.append({
+            "trace_id": parent["trace_id"], "span_id": "{:016x}".format(random.getrandbits(64)),
+            "parent_id": parent["span_id"], "name": "http", "start": time.time() - duration, "duration": duration,
+            "attributes": {"url": url, "status": status, "bytes": nbytes, "stale": stale},
+        })
+
+
+class _SpanContext:
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span = None
+
+    def __enter__(self):
+        self.span = self.tracer.start_span(self.name, **self.attributes)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.end_span(self.span, exc)
+        return False
+
+
+def tracer_from_environment():
+    """
+    Builds the bot's tracer from TRACE_FILE / TRACE_OTLP_ENDPOINT, TRACE_SAMPLE_RATE and TRACE_PROFILE_AFTER.
+    :return: Tracer, disabled if neither TRACE_FILE nor TRACE_OTLP_ENDPOINT is set
+    """
+    exporter = None
+    if os.environ.get("TRACE_OTLP_ENDPOINT"):
+        exporter = OtlpExporter(os.environ["TRACE_OTLP_ENDPOINT"])
+    elif os.environ.get("TRACE_FILE"):
+        exporter = JsonlExporter(os.environ["TRACE_FILE"])
+    profile_after = os.environ.get("TRACE_PROFILE_AFTER")
+    return Tracer(exporter, float(os.environ.get("TRACE_SAMPLE_RATE", 1.0)),
+                  float(profile_after) if profile_after else None)
@@ -0,0 +1,109 @@
+import threading
+import time
+from draft import expected_values
+
+"""
+Trade summaries: what each side of a trade receives, valued by the league's own scoring on rest-of-season
+projections.
+
+Scoring every player's season projection is the expensive part, so it is done once a day per scoring system and
+shared by every league that scores the same way. Evaluating a trade is then a handful of dict lookups.
+"""
+
+
+class ProjectionTable:
+    def __init__(self, max_age=86400):
+        """
+        Rest-of-season points of every projected player, one table per scoring system.
+        :param max_age: Int seconds a table is kept before it is rebuilt
+        """
+        self.max_age = max_age
+        # ScoringRules.key -> (built at, season, week, {player_id: points})
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def get(self, rules, season, current_week, fetch_projections):
+        """
+        :param rules: ScoringRules of the league
+        :param season: Int season
+        :param current_week: Int current week; the projection is scaled to the weeks left
+        :param fetch_projections: Callable returning the season projections, only called to rebuild the table
+        :return: Dict {player_id: rest-of-season points}
+        """
+        with self._lock:
+            table = self._tables.get(rules.key)
+        if table is not None and table[1:3] == (season, current_week) and time.time() - table[0] < self.max_age:
+            return table[3]
+        values = expected_values(rules, fetch_projections(), {}, current_week)
+        with self._lock:
+            self._tables[rules.key] = (time.time(), season, current_week, values)
+        return values
+
+
+def trade_sides(transaction):
+    """
+    :param transaction: Transaction of type "trade"
+    :return: Dict {roster_id: {"players_in", "players_out", "picks_in", "picks_out": lists, "faab": Int net FAAB}}
+    """
+    sides = {roster_id: {"players_in": [], "players_out": [], "picks_in": [], "picks_out": [], "faab": 0}
+             for roster_id in transaction.roster_ids}
+    for player_id, roster_id in (transaction.adds or {}).items():
+        if roster_id in sides:
+            sides[roster_id]["players_in"].append(player_id)
+    for player_id, roster_id in (transaction.drops or {}).items():
+        if roster_id in sides:
+            sides[roster_id]["players_out"].append(player_id)
+    for pick in transaction.draft_picks:
+        if pick.get("owner_id") in sides:
+            sides[pick["owner_id"]]["picks_in"].append(pick)
+        if pick.get("previous_owner_id") in sides:
+            sides[pick["previous_owner_id"]]["picks_out"].append(pick)
+    for budget in transaction.waiver_budget:
+        if budget.get("receiver") in sides:
+            sides[budget["receiver"]]["faab"] += budget.get("amount") or 0
+        if budget.get("sender") in sides:
+            sides[budget["sender"]]["faab"] -= budget.get("amount") or 0
+    return sides
+
+
+def evaluate_trade(sides, values):
+    """
+    :param sides: Dict returned by trade_sides
+    :param values: Dict {player_id: rest-of-season points} from ProjectionTable.get
+    :return: Dict {roster_id: rest-of-season points received minus points given up}; picks and FAAB are not valued
+    """
+    return {roster_id: sum(values.get(player_id, 0.0) for player_id in side["players_in"])
+            - sum(values.get(player_id, 0.0) for player_id in side["players_out"])
+            for roster_id, side in sides.items()}
+
+
+def _player_line(players, player_id, values):
+    player = players.get(player_id) or {}
+    name = "{} {}".format(player.get("first_name", ""), player.get("last_name", player_id)).strip()
+    return "+ {} ({}) {:.1f} pts rest of season".format(name, player.get("position") or "?",
+                                                       values.get(player_id, 0.0))
+
+
+def get_trade_string(sides, values, index, players):
+    """
+    Creates and returns the trade message.
+    :param sides: Dict returned by trade_sides
+    :param values: Dict {player_id: rest-of-season points} from ProjectionTable.get
+    :param index: LeagueIndex of the league
+    :param players: Dict {player_id: player}
+    :return: String message
+    """
+    lines = ["**================================**", "**Trade**", "**================================**"]
+    for roster_id, side in sides.items():
+        lines.append("**{}** gets:".format(index.team_name(roster_id, "Team NA")))
+        lines.extend(_player_line(players, player_id, values) for player_id in side["players_in"])
+        for pick in side["picks_in"]:
+            lines.append("+ {} round {} pick ({})".format(pick.get("season"), pick.get("round"),
+                                                          index.team_name(pick.get("roster_id"), "Team NA")))
+        if side["faab"] > 0:
+            lines.append("+ ${} FAAB".format(side["faab"]))
+    net = evaluate_trade(sides, values)
+    lines.append("")
+    lines.append("Rest of season: " + ", ".join("{} {:+.1f}".format(index.team_name(roster_id, "Team NA"), points)
+                                                for roster_id, points in net.items()))
+    return "\n".join(lines)
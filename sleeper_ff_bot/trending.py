@@ -0,0 +1,107 @@
+import time
+from sleeper_wrapper import Players
+
+"""
+Waiver buzz: trending adds and drops, reported only when they move.
+"""
+
+
+class TrendingTracker:
+    def __init__(self, lookback_hours=24, limit=25, min_change=0.25, max_age=1800):
+        """
+        :param lookback_hours: Int hours of trending activity Sleeper should count
+        :param limit: Int number of trending players to fetch per direction
+        :param min_change: Float relative increase in count that makes an already trending player a mover again
+        :param max_age: Int seconds a poll is reused for before poll_if_stale polls again. Well under the hour
+            between two waiver buzz runs of a league, so no run is handed the poll its previous run already posted.
+        """
+        self.lookback_hours = lookback_hours
+        self.limit = limit
+        self.min_change = min_change
+        self.max_age = max_age
+        self.polled_at = None
+        self._counts = {"add": {}, "drop": {}}
+        self._movers = {"add": [], "drop": []}
+
+    def poll(self):
+        """
+        Fetches the trending adds and drops and works out which players moved since the last poll.
+        :return: Dict {"add": [(player_id, count, delta), ...], "drop": [...]} sorted by delta
+        """
+        players = Players()
+        for add_drop in ("add", "drop"):
+            trending = players.get_trending_players("nfl", add_drop, self.lookback_hours, self.limit)
+            if not trending:
+                # keep the previous counts rather than treating an outage as everyone dropping off the list, and
+                # do not report the previous movers again
+                self._movers[add_drop] = []
+                continue
+            current = {t["player_id"]: t["count"] for t in trending}
+            previous = self._counts[add_drop]
+
+            movers = []
+            for player_id, count in current.items():
+                before = previous.get(player_id)
+                if before is None or count - before >= max(1, before * self.min_change):
+                    movers.append((player_id, count, count - (before or 0)))
+            movers.sort(key=lambda mover: mover[2], reverse=True)
+
+            self._counts[add_drop] = current
+            self._movers[add_drop] = movers
+        self.polled_at = time.time()
+        return self._movers
+
+    def poll_if_stale(self):
+        """
+        Polls at most once every max_age seconds, so many leagues can share one poll.
+        :return: Dict of the latest movers, see poll
+        """
+        if self.polled_at is None or time.time() - self.polled_at >= self.max_age:
+            return self.poll()
+        return self._movers
+
+    def to_dict(self):
+        return {"counts": self._counts, "polled_at": self.polled_at}
+
+    def load(self, saved):
+        """
+        Restores the counts saved with to_dict, so a restart does not report every trending player as a mover.
+        :param saved: Dict returned by to_dict
+        :return: None
+        """
+        self._counts = saved.get("counts") or self._counts
+        self.polled_at = saved.get("polled_at", self.polled_at)
+
+
+def get_waiver_buzz_string(movers, players, index):
+    """
+    Creates and returns the waiver buzz message for one league.
+    :param movers: Dict returned by TrendingTracker.poll
+    :param players: Dict {player_id: player}; the local player index
+    :param index: LeagueIndex of the league
+    :return: String message, or None if nothing moved
+    """
+    if not movers["add"] and not movers["drop"]:
+        return None
+
+    mover_ids = {mover[0] for add_drop in movers for mover in movers[add_drop]}
+    free_agents = mover_ids.difference(index.rostered_players())
+
+    lines = ["**================================**", "**Waiver Buzz**", "**================================**"]
+    for add_drop, title in (("add", "📈 Trending adds"), ("drop", "📉 Trending drops")):
+        if not movers[add_drop]:
+            continue
+        lines.append("")
+        lines.append("*{}*".format(title))
+        for player_id, count, delta in movers[add_drop]:
+            player = players.get(player_id)
+            if player is None:
+                continue
+            name = "{} {}".format(player["first_name"], player["last_name"])
+            if player_id in free_agents:
+                owner = "**free agent**"
+            else:
+                owner = index.team_name(index.roster_of(player_id), "Team NA")
+            lines.append("{} ({} {}) {} (+{}) - {}".format(name, player["position"], player["team"] or "FA", count,
+                                                           delta, owner))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,136 @@
+from collections import defaultdict
+from constants import OUT_STATUSES
+
+"""
+Weekly waiver recommendations: the best free agents at each position by the league's own scoring, and the teams
+whose weakest starter at that position they would beat.
+"""
+
+FANTASY_POSITIONS = ("QB", "RB", "WR", "TE", "K", "DEF")
+
+
+def free_agents(players, index):
+    """
+    :param players: Dict {player_id: player}
+    :param index: LeagueIndex of the league
+    :return: Set of player_ids on an NFL team, at a fantasy position, not ruled out and on no roster in the league
+    """
+    available = {player_id for player_id, player in players.items()
+                 if player.get("team") and player.get("position") in FANTASY_POSITIONS
+                 and player.get("injury_status") not in OUT_STATUSES}
+    return available.difference(index.rostered_players())
+
+
+def player_values(player_ids, rules, projections, season, recent_weeks=3, recent_weight=0.4):
+    """
+    Values players by their projection for the coming week, blended with their recent production.
+    :param player_ids: Iterable of player_ids
+    :param rules: ScoringRules of the league
+    :param projections: Dict week projections of the coming week
+    :param season: SeasonAccumulator of the league's scoring, up to the last played week
+    :param recent_weeks: Int number of the latest weeks to average
+    :param recent_weight: Float weight of the recent average against the projection
+    :return: Dict {player_id: (value, projected, recent average)}
+    """
+    projections = projections or {}
+    result = {}
+    for player_id in player_ids:
+        projected = rules.score(projections.get(player_id))
+        # weeks without a stat line are byes or inactives, not zeros
+        recent = season.recent(player_id, recent_weeks)
+        recent_average = sum(recent) / len(recent) if recent else 0.0
+        value = (1 - recent_weight) * projected + recent_weight * recent_average if recent else projected
+        result[player_id] = (value, projected, recent_average)
+    return result
+
+
+def weakest_starters(index, players, values):
+    """
+    :param index: LeagueIndex of the league
+    :param players: Dict {player_id: player}
+    :param values: Dict returned by player_values, covering every starter
+    :return: Dict {position: [(value, roster_id, player_id), ...]} weakest first
+    """
+    weakest = defaultdict(dict)
+    for roster in index.rosters.values():
+        for player_id in roster.starters:
+            player = players.get(player_id)
+            if player is None or player_id not in values:
+                continue
+            value = values[player_id][0]
+            current = weakest[player["position"]].get(roster.roster_id)
+            if current is None or value < current[0]:
+                weakest[player["position"]][roster.roster_id] = (value, roster.roster_id, player_id)
+    return {position: sorted(by_roster.values()) for position, by_roster in weakest.items()}
+
+
+def recommend(players, index, rules, projections, season, recent_weeks=3, top=3):
+    """
+    Ranks the league's free agents per position and matches them with the teams they would upgrade.
+    :param players: Dict {player_id: player}
+    :param index: LeagueIndex of the league
+    :param rules: ScoringRules of the league
+    :param projections: Dict week projections of the coming week
+    :param season: SeasonAccumulator of the league's scoring, up to the last played week
+    :param recent_weeks: Int number of the latest weeks to average
+    :param top: Int free agents listed per position
+    :return: Dict {position: {"free_agents": [(player_id, value, projected, recent)],
+                              "upgrades": [(roster_id, starter_id, gain)]}}
+    """
+    available = free_agents(players, index)
+    starters = {player_id for roster in index.rosters.values() for player_id in roster.starters}
+    values = player_values(available | starters, rules, projections, season, recent_weeks)
+    weakest = weakest_starters(index, players, values)
+
+    by_position = defaultdict(list)
+    for player_id in available:
+        value, projected, recent = values[player_id]
+        if value > 0:
+            by_position[players[player_id]["position"]].append((value, player_id, projected, recent))
+
+    result = {}
+    for position in FANTASY_POSITIONS:
+        ranked = sorted(by_position.get(position, ()), reverse=True)[:top]
+        if not ranked:
+            continue
+        best = ranked[0][0]
+        upgrades = [(roster_id, starter_id, best - value) for value, roster_id, starter_id in weakest.get(position, ())
+                    if value < best]
+        result[position] = {
+            "free_agents": [(player_id, value, projected, recent) for value, player_id, projected, recent in ranked],
+            "upgrades": upgrades,
+        }
+    return result
+
+
+def _name(players, player_id):
+    player = players.get(player_id) or {}
+    return "{} {}".format(player.get("first_name", ""), player.get("last_name", player_id)).strip()
+
+
+def get_waiver_wire_string(recommendations, index, players, week):
+    """
+    Creates and returns the waiver recommendations message.
+    :param recommendations: Dict returned by recommend
+    :param index: LeagueIndex of the league
+    :param players: Dict {player_id: player}
+    :param week: Int week the projections are for
+    :return: String message
+    """
+    lines = ["**================================**", "**Waiver Wire, week {}**".format(week),
+             "**================================**", ""]
+    if not recommendations:
+        lines.append("No free agents worth a claim this week.")
+    for position, recommendation in recommendations.items():
+        lines.append("*{}*".format(position))
+        for player_id, value, projected, recent in recommendation["free_agents"]:
+            lines.append("{} ({}) {:.1f} proj, {:.1f} avg".format(_name(players, player_id),
+                                                                players[player_id].get("team") or "FA",
+                                                                projected, recent))
+        if recommendation["upgrades"]:
+            needs = ["{} (+{:.1f} over {})".format(index.team_name(roster_id, "Team NA"), gain,
+                                                    _name(players, starter_id))
+                     for roster_id, starter_id, gain in recommendation["upgrades"][:3]]
+            lines.append("Upgrades for: " + ", ".join(needs))
+        lines.append("")
+    return "\n".join(lines)
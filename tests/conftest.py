@@ -0,0 +1,13 @@
+import pytest
+
+from sleeper_wrapper.testing import reset_api_state
+
+
+@pytest.fixture(autouse=True)
+def api_state():
+    """
+    Every test starts and ends with no circuit breakers, cached responses or response store.
+    """
+    reset_api_state()
+    yield
+    reset_api_state()
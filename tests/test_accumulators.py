@@ -0,0 +1,80 @@
+import math
+import threading
+
+from sleeper_ff_bot import accumulators
+from sleeper_ff_bot.cache import DiskCache
+from sleeper_wrapper import ScoringRules
+
+RULES = ScoringRules({"rush_yd": 0.1, "rush_td": 6})
+WEEKS = {
+    1: {"1": {"rush_yd": 100}, "2": {"rush_yd": 50, "rush_td": 1}},
+    2: {"1": {"rush_yd": 80, "rush_td": 2}},
+    3: {"1": {"rush_yd": 10}, "2": {"rush_yd": 20}, "3": {"rush_yd": 150}},
+}
+
+
+def test_totals_averages_and_recent_weeks():
+    season = accumulators.SeasonAccumulator(RULES, 2022)
+    for week, week_stats in WEEKS.items():
+        assert season.add_week(week, week_stats)
+    assert not season.add_week(1, WEEKS[1])
+
+    assert abs(season.total("1") - 31.0) < 1e-4
+    # player 2 had no stat line in week 2, which is no zero
+    assert abs(season.average("2") - 6.5) < 1e-4
+    assert [round(points, 4) for points in season.recent("2", 2)] == [2.0]
+    assert season.total("4") == 0.0 and season.recent("4", 3) == []
+    assert set(season.totals_for(["1", "3", "4"])) == {"1", "3"}
+    assert math.isnan(season.weeks[1][season.slots["3"]])
+
+
+def test_weeks_that_are_not_final_are_replaced():
+    season = accumulators.SeasonAccumulator(RULES, 2022)
+    season.add_week(1, WEEKS[1], final=False)
+    # a stat correction
+    season.add_week(1, {"1": {"rush_yd": 120}}, final=True)
+    assert abs(season.total("1") - 12.0) < 1e-4
+    assert season.total("2") == 0.0 and season.games[season.slots["2"]] == 0
+    assert not season.add_week(1, WEEKS[1])
+
+
+def test_final_weeks_persist_and_are_shared(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    fetched = []
+
+    def fetch(week):
+        fetched.append(week)
+        return WEEKS[week]
+
+    season = accumulators.SeasonAccumulators(cache).get(RULES, 2022, 4, fetch)
+    assert sorted(fetched) == [1, 2, 3]
+    # the same scoring written in a different order is the same scoring system
+    same = ScoringRules({"rush_td": 6, "rush_yd": 0.1})
+    fetched.clear()
+    restarted = accumulators.SeasonAccumulators(cache).get(same, 2022, 4, fetch)
+    # weeks 1 and 2 were final; week 3 may still see stat corrections
+    assert fetched == [3]
+    assert abs(restarted.total("1") - season.total("1")) < 1e-4
+    assert restarted.slots == season.slots
+
+
+def test_fetching_one_scoring_system_does_not_hold_up_another(tmp_path):
+    seasons = accumulators.SeasonAccumulators(DiskCache(str(tmp_path)))
+    fetching = threading.Event()
+    release = threading.Event()
+
+    def slow_fetch(week):
+        fetching.set()
+        release.wait(5)
+        return WEEKS[week]
+
+    slow = threading.Thread(target=seasons.get, args=(RULES, 2022, 2, slow_fetch))
+    slow.start()
+    try:
+        assert fetching.wait(5)
+        other = seasons.get(ScoringRules({"rush_yd": 0.2}), 2022, 2, WEEKS.get)
+        assert abs(other.total("1") - 20.0) < 1e-4
+        assert slow.is_alive()
+    finally:
+        release.set()
+        slow.join()
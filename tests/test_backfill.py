@@ -0,0 +1,61 @@
+from sleeper_ff_bot import backfill
+from sleeper_ff_bot.cache import DiskCache
+
+
+class FakeLeague:
+    league_id = "1"
+
+    def __init__(self):
+        self.fetched_weeks = []
+
+    def get_transactions(self, week):
+        self.fetched_weeks.append(week)
+        return [{"transaction_id": str(week), "type": "waiver", "status": "complete", "created": week,
+                 "roster_ids": [1], "adds": {"6794": 1}, "drops": {"4034": 1}, "settings": {"waiver_bid": 10}},
+                {"transaction_id": str(week) + "f", "type": "waiver", "status": "failed", "created": week,
+                 "roster_ids": [2], "adds": {"6794": 2}, "drops": None, "settings": {"waiver_bid": 5}}]
+
+
+def test_fetch_season_transactions_caches_finished_weeks(tmp_path):
+    """
+    Tests that a second backfill only fetches the current week
+    :return:
+    """
+    cache = DiskCache(str(tmp_path))
+    league = FakeLeague()
+    weeks = backfill.fetch_season_transactions(league, 3, cache)
+    assert sorted(weeks) == [1, 2, 3]
+    assert sorted(league.fetched_weeks) == [1, 2, 3]
+
+    league = FakeLeague()
+    weeks = backfill.fetch_season_transactions(league, 3, cache)
+    assert sorted(weeks) == [1, 2, 3]
+    assert league.fetched_weeks == [3]
+
+
+def test_season_transaction_stats():
+    weeks = {1: FakeLeague().get_transactions(1), 2: FakeLeague().get_transactions(2)}
+    season_stats = backfill.SeasonTransactionStats.from_weeks(weeks, 100)
+
+    assert season_stats.faab_remaining(1) == 80
+    assert season_stats.faab_remaining(2) == 100
+    assert season_stats.waiver_hit_rate(1) == 1
+    assert season_stats.waiver_hit_rate(2) == 0
+    assert season_stats.waiver_hit_rate(3) is None
+    assert season_stats.adds[1] == 2
+    assert season_stats.most_churned(1) == [("6794", 2)]
+
+
+def test_traded_faab_moves_between_rosters():
+    weeks = {1: FakeLeague().get_transactions(1),
+             2: [{"transaction_id": "t", "type": "trade", "status": "complete", "created": 2, "roster_ids": [1, 2],
+                  "adds": None, "drops": None, "settings": None,
+                  "waiver_budget": [{"sender": 2, "receiver": 1, "amount": 15}]},
+                 {"transaction_id": "v", "type": "trade", "status": "failed", "created": 2, "roster_ids": [1, 2],
+                  "adds": None, "drops": None, "settings": None,
+                  "waiver_budget": [{"sender": 1, "receiver": 2, "amount": 50}]}]}
+    season_stats = backfill.SeasonTransactionStats.from_weeks(weeks, 100)
+
+    assert season_stats.faab_remaining(1) == 100 - 10 + 15
+    assert season_stats.faab_remaining(2) == 100 - 15
+    assert season_stats.faab_spent[1] == 10
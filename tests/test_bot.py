@@ -1,6 +1,14 @@
 from sleeper_ff_bot import bot
 import pytest
 
+def test_render_scores_string():
+    scoreboards = {1: [("Alpha", 100.0, 110.0, 0.0), ("Beta", 90.5, 120.0, 0.0)]}
+    message = bot.render_scores_string(scoreboards, "Scores")
+    assert message == ("**================================**\n**Scores**\n**================================**\n\n"
+                       "*Matchup 1*\n**Alpha** 100.00 (110.00)\n**Beta** 90.50 (120.00)\n\n")
+    # nothing left to play: the leader has won
+    assert "**Alpha** 100.00 (110.00) 100%" in bot.render_scores_string(scoreboards, "Live scores", True)
+
 def test_get_matchups_string():
     """
     Tests the get_matchups method
@@ -55,3 +63,93 @@ def test_get_current_week():
     current_week = bot.get_current_week()
     assert current_week > 0
     assert current_week < 16
+
+
+def test_failed_transaction_posts_are_retried(monkeypatch):
+    from sleeper_wrapper import LeagueRegistry
+    from sleeper_wrapper.testing import StandInSleeper
+    players = {"1": {"first_name": "Added", "last_name": "Back"}, "2": {"first_name": "Dropped", "last_name": "End"}}
+    transactions = [{"transaction_id": str(created), "type": "free_agent", "status": "complete", "created": created,
+                     "roster_ids": [1], "adds": {"1": 1}, "drops": {"2": 1}, "draft_picks": [], "settings": {},
+                     "leg": 1} for created in (3000, 2000)]
+    stand_in = StandInSleeper()
+    stand_in.route(r"league/55/transactions/1", lambda match, query: transactions)
+    stand_in.route(r"league/55/users", lambda match, query: [{"user_id": "u1", "display_name": "alpha"}])
+    stand_in.route(r"league/55/rosters", lambda match, query: [{"roster_id": 1, "owner_id": "u1"}])
+    monkeypatch.setattr(bot, "get_current_week", lambda: 1)
+    monkeypatch.setattr(bot, "_leagues", LeagueRegistry())
+    monkeypatch.setattr(bot, "_transaction_cursors", {"55": 1000})
+
+    class FlakyBot:
+        def __init__(self):
+            self.messages = []
+            self.failures = 1
+
+        def send_message(self, message):
+            if len(self.messages) == 1 and self.failures:
+                self.failures -= 1
+                raise RuntimeError("webhook down")
+            self.messages.append(message)
+
+    flaky = FlakyBot()
+    stand_in.install()
+    try:
+        # oldest first; the second post fails, so the cursor stays on the first
+        with pytest.raises(RuntimeError):
+            bot.process_transactions("55", players, flaky)
+        assert bot._transaction_cursors["55"] == 2000
+        # the unchanged transactions are read again, and only the one that failed is posted
+        bot.process_transactions("55", players, flaky)
+        assert bot._transaction_cursors["55"] == 3000
+        assert len(flaky.messages) == 2 and all("+ Added Back" in message for message in flaky.messages)
+        bot.process_transactions("55", players, flaky)
+        assert len(flaky.messages) == 2
+    finally:
+        stand_in.uninstall()
+
+
+def test_transactions_of_players_missing_from_the_index_are_posted(monkeypatch):
+    from sleeper_wrapper import LeagueRegistry
+    from sleeper_wrapper.testing import StandInSleeper
+    transactions = [{"transaction_id": "1", "type": "free_agent", "status": "complete", "created": 2000,
+                     "roster_ids": [1], "adds": {"9999": 1}, "drops": {"2": 1}, "draft_picks": [], "settings": {},
+                     "leg": 1}]
+    stand_in = StandInSleeper()
+    stand_in.route(r"league/55/transactions/1", lambda match, query: transactions)
+    stand_in.route(r"league/55/users", lambda match, query: [{"user_id": "u1", "display_name": "alpha"}])
+    stand_in.route(r"league/55/rosters", lambda match, query: [{"roster_id": 1, "owner_id": "u1"}])
+    monkeypatch.setattr(bot, "get_current_week", lambda: 1)
+    monkeypatch.setattr(bot, "_leagues", LeagueRegistry())
+    monkeypatch.setattr(bot, "_transaction_cursors", {"55": 1000})
+
+    class RecordingBot:
+        messages = []
+
+        def send_message(self, message):
+            self.messages.append(message)
+
+    stand_in.install()
+    try:
+        bot.process_transactions("55", {"2": {"first_name": "Dropped", "last_name": "End"}}, RecordingBot())
+    finally:
+        stand_in.uninstall()
+    assert "+ 9999" in RecordingBot.messages[0] and "- Dropped End" in RecordingBot.messages[0]
+    assert bot._transaction_cursors["55"] == 2000
+
+
+def test_export_warm_state_never_calls_sleeper(monkeypatch):
+    from sleeper_wrapper import LeagueRegistry
+    from sleeper_wrapper.testing import StandInSleeper
+    leagues = LeagueRegistry()
+    leagues.get("55", {"league_id": "55", "name": "loaded"})
+    # known, but its league payload was never fetched
+    leagues.get("56")
+    monkeypatch.setattr(bot, "_leagues", leagues)
+    stand_in = StandInSleeper()
+    stand_in.install()
+    try:
+        snapshot = bot.export_warm_state()
+    finally:
+        stand_in.uninstall()
+    assert snapshot["leagues"] == {"55": {"league_id": "55", "name": "loaded"}}
+    assert not sum(stand_in.requests.values())
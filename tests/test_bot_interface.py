@@ -0,0 +1,61 @@
+import pytest
+
+from sleeper_ff_bot import bot_interface
+from sleeper_wrapper import BaseApi, DeadlineExceeded, SleeperUnavailable
+from sleeper_wrapper import base_api
+
+URL = "https://api.sleeper.app/v1/league/1/users"
+
+
+class RecordingBot(bot_interface.BotInterface):
+    def __init__(self):
+        super().__init__("test")
+        self.messages = []
+
+    def send_message(self, message):
+        self.messages.append(message)
+
+
+def users_string():
+    return "{} users".format(len(BaseApi()._call(URL)))
+
+
+def test_stale_answers_are_flagged(monkeypatch):
+    """
+    Tests that a report built while Sleeper is down says it may be out of date, and one built after does not
+    :return:
+    """
+    bot = RecordingBot()
+    monkeypatch.setattr(base_api, "_fetch", lambda url, timeout=None, validators=None: ([{"user_id": "1"}], None))
+    bot.send(users_string)
+
+    def unavailable(url, timeout=None, validators=None):
+        raise base_api._Unavailable()
+    monkeypatch.setattr(base_api, "_fetch", unavailable)
+    monkeypatch.setattr(base_api, "_refresh_in_background", lambda url, breaker: None)
+    bot.send(users_string)
+    assert bot.messages == ["1 users", "1 users" + bot_interface.STALE_NOTE]
+
+    monkeypatch.setattr(base_api, "_fetch", lambda url, timeout=None, validators=None: ([{"user_id": "1"}], None))
+    base_api._breakers.clear()
+    bot.send(users_string)
+    assert bot.messages[-1] == "1 users"
+
+
+def test_nothing_is_sent_without_an_answer(monkeypatch):
+    def unavailable(url, timeout=None, validators=None):
+        raise base_api._Unavailable()
+    monkeypatch.setattr(base_api, "_fetch", unavailable)
+    bot = RecordingBot()
+    with pytest.raises(SleeperUnavailable):
+        bot.send(users_string)
+    assert bot.messages == []
+
+
+def test_overrunning_jobs_are_not_posted():
+    def overrun():
+        raise DeadlineExceeded()
+    bot = RecordingBot()
+    with pytest.raises(DeadlineExceeded):
+        bot.send(overrun)
+    assert bot.messages == []
@@ -0,0 +1,71 @@
+from sleeper_ff_bot import bracket
+from sleeper_ff_bot.cache import DiskCache
+from sleeper_wrapper import League, LeagueIndex
+from sleeper_wrapper.testing import StandInSleeper
+
+SETTINGS = {"playoff_week_start": 15, "playoff_round_type": 0}
+USERS = [{"user_id": str(i), "display_name": "user{}".format(i), "metadata": {"team_name": "Team {}".format(i)}}
+         for i in range(1, 5)]
+ROSTERS = [{"roster_id": i, "owner_id": str(i), "players": [], "starters": []} for i in range(1, 5)]
+# semifinals in week 15, the final and third place game in week 16
+WINNERS = [
+    {"r": 1, "m": 1, "t1": 1, "t2": 4, "w": 1, "l": 4},
+    {"r": 1, "m": 2, "t1": 2, "t2": 3, "w": 3, "l": 2},
+    {"r": 2, "m": 3, "t1": None, "t2": None, "t1_from": {"w": 1}, "t2_from": {"w": 2}, "w": None, "l": None, "p": 1},
+    {"r": 2, "m": 4, "t1": None, "t2": None, "t1_from": {"l": 1}, "t2_from": {"l": 2}, "w": None, "l": None, "p": 3},
+]
+POINTS = {15: {1: 120.5, 2: 90.0, 3: 101.25, 4: 80.0}, 16: {1: 40.0, 2: 55.0, 3: 62.0, 4: 20.0}}
+
+
+def test_round_weeks():
+    assert bracket.round_weeks(SETTINGS, 3) == {1: [15], 2: [16], 3: [17]}
+    assert bracket.round_weeks({"playoff_week_start": 14, "playoff_round_type": 1}, 3) == {1: [14], 2: [15],
+                                                                                           3: [16, 17]}
+
+
+def test_resolves_references_to_earlier_matches():
+    matches = bracket.resolve_bracket(WINNERS, SETTINGS, POINTS)
+    final = matches[2]
+    assert final["place"] == 1
+    assert final["teams"] == [(1, 40.0, None), (3, 62.0, None)]
+    assert matches[3]["teams"] == [(4, 20.0, None), (2, 55.0, None)]
+
+    # before the semifinals are decided the final only knows where its teams come from
+    pending = [dict(match, w=None, l=None) for match in WINNERS]
+    final = bracket.resolve_bracket(pending, SETTINGS, {15: POINTS[15]})[2]
+    assert final["teams"] == [(None, None, ("w", 1)), (None, None, ("w", 2))]
+
+
+def test_bracket_message():
+    index = LeagueIndex.from_json(USERS, ROSTERS)
+    winners = bracket.resolve_bracket(WINNERS, SETTINGS, POINTS)
+    message = bracket.get_bracket_string(winners, [], index)
+    assert "Round 1 (week 15)" in message
+    assert "Match 1: **Team 1** 120.50 vs Team 4 80.00" in message
+    assert "Championship: Team 1 40.00 vs Team 3 62.00" in message
+    assert "Losers bracket" not in message
+
+    pending = bracket.resolve_bracket([dict(match, w=None, l=None) for match in WINNERS], SETTINGS, {})
+    assert "3rd place: Loser of match 1 vs Loser of match 2" in bracket.get_bracket_string(pending, [], index)
+
+
+def test_fetch_playoffs_caches_finished_weeks(tmp_path):
+    stand_in = StandInSleeper()
+    stand_in.route(r"league/(\d+)/winners_bracket", lambda match, query: WINNERS)
+    stand_in.route(r"league/(\d+)/losers_bracket", lambda match, query: [])
+    stand_in.route(r"league/(\d+)/matchups/(\d+)", lambda match, query: [
+        {"roster_id": roster_id, "matchup_id": 1, "points": points}
+        for roster_id, points in POINTS.get(int(match.group(2)), {}).items()])
+    stand_in.install()
+    cache = DiskCache(str(tmp_path))
+    try:
+        league = League("300", {"league_id": "300", "settings": SETTINGS})
+        for _ in range(2):
+            winners, losers, points = bracket.fetch_playoffs(league, 17, cache)
+    finally:
+        stand_in.uninstall()
+
+    assert winners == WINNERS and losers == []
+    assert points == POINTS
+    # week 15 is final by week 17; week 16 may still see stat corrections and week 17 has no games yet
+    assert stand_in.requests["league/*/matchups/*"] == 3 + 2
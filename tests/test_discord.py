@@ -0,0 +1,80 @@
+from sleeper_ff_bot import discord
+
+
+class Response:
+    def __init__(self, status_code=200, body=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self._body = body or {}
+
+    def json(self):
+        return self._body
+
+
+class Webhook:
+    def __init__(self):
+        self.posts = []
+        self.patches = []
+        self.patch_status = 200
+
+    def post(self, url, params=None, json=None, timeout=None):
+        self.posts.append((params, json["content"]))
+        return Response(body={"id": str(len(self.posts))})
+
+    def patch(self, url, json=None, timeout=None):
+        self.patches.append((url, json["content"]))
+        return Response(self.patch_status)
+
+
+def test_live_message_is_edited_only_when_it_changes(monkeypatch):
+    webhook = Webhook()
+    monkeypatch.setattr(discord.requests, "post", webhook.post)
+    monkeypatch.setattr(discord.requests, "patch", webhook.patch)
+    bot = discord.Discord("https://discord/webhook", min_edit_interval=0)
+
+    bot.send_live("scores/1", lambda score: "score {}".format(score), 1)
+    assert webhook.posts == [({"wait": "true"}, "score 1")]
+    bot.send_live("scores/1", lambda score: "score {}".format(score), 1)
+    assert webhook.patches == []
+    bot.send_live("scores/1", lambda score: "score {}".format(score), 2)
+    assert webhook.patches == [("https://discord/webhook/messages/1", "score 2")]
+
+    # a deleted message is posted again, and a new key starts a new message
+    webhook.patch_status = 404
+    bot.send_live("scores/1", lambda: "score 3")
+    bot.send_live("scores/2", lambda: "score 0")
+    assert [content for _, content in webhook.posts] == ["score 1", "score 3", "score 0"]
+
+
+def test_failed_live_message_edits_are_retried(monkeypatch):
+    webhook = Webhook()
+    monkeypatch.setattr(discord.requests, "post", webhook.post)
+    monkeypatch.setattr(discord.requests, "patch", webhook.patch)
+    bot = discord.Discord("https://discord/webhook", min_edit_interval=0)
+
+    bot.send_live("scores/1", lambda: "score 1")
+    webhook.patch_status = 502
+    bot.send_live("scores/1", lambda: "score 2")
+    webhook.patch_status = 200
+    bot.send_live("scores/1", lambda: "score 2")
+    assert [content for _, content in webhook.patches] == ["score 2", "score 2"]
+    bot.send_live("scores/1", lambda: "score 2")
+    assert len(webhook.patches) == 2 and len(webhook.posts) == 1
+
+
+def test_live_message_edits_are_throttled(monkeypatch):
+    webhook = Webhook()
+    monkeypatch.setattr(discord.requests, "post", webhook.post)
+    monkeypatch.setattr(discord.requests, "patch", webhook.patch)
+    bot = discord.Discord("https://discord/webhook", min_edit_interval=60)
+    calls = []
+
+    def render(score):
+        calls.append(score)
+        return "score {}".format(score)
+
+    bot.send_live("scores/1", render, 1)
+    bot.send_live("scores/1", render, 2)
+    # throttled before anything is rendered
+    assert calls == [1]
+    assert webhook.patches == []
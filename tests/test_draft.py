@@ -0,0 +1,69 @@
+from sleeper_ff_bot import draft
+from sleeper_ff_bot.accumulators import SeasonAccumulators
+from sleeper_ff_bot.cache import DiskCache
+from sleeper_ff_bot.loadtest import SyntheticSleeper, SCORING_SETTINGS, ROSTER_POSITIONS
+from sleeper_wrapper import LeagueIndex, ScoringRules
+from sleeper_wrapper.testing import StandInSleeper
+
+PICKS = [
+    {"pick_no": 1, "round": 1, "roster_id": 1, "player_id": "a"},
+    {"pick_no": 2, "round": 1, "roster_id": 2, "player_id": "b"},
+    {"pick_no": 3, "round": 2, "roster_id": 2, "player_id": "c"},
+    {"pick_no": 4, "round": 2, "roster_id": 1, "player_id": "d"},
+]
+POSITIONS = {"a": "RB", "b": "RB", "c": "WR", "d": "WR", "e": "RB", "f": "WR"}
+VALUES = {"a": 100.0, "b": 150.0, "c": 40.0, "d": 200.0, "e": 50.0, "f": 60.0}
+
+
+def test_starters_per_position_splits_flex():
+    starters = draft.starters_per_position(["QB", "RB", "WR", "FLEX", "BN", "BN"])
+    assert starters["QB"] == 1
+    assert abs(starters["RB"] - 4 / 3) < 1e-9
+    assert "BN" not in starters
+
+
+def test_report_card_values_against_replacement_and_slot():
+    replacement = draft.replacement_levels(VALUES, POSITIONS, {"RB": 1, "WR": 1}, 2)
+    assert replacement == {"RB": 50.0, "WR": 40.0}
+
+    card = draft.DraftReportCard(PICKS, VALUES, POSITIONS, replacement)
+    assert card.team_totals() == {1: 50.0 + 160.0, 2: 100.0 + 0.0}
+    assert [roster_id for roster_id, _, _ in card.team_grades()] == [1, 2]
+    assert card.steals(1)[0]["player_id"] == "d"
+    assert card.busts(1)[0]["player_id"] == "a"
+
+
+def test_weekly_regrade_reuses_cached_draft_and_weeks(tmp_path):
+    synthetic = SyntheticSleeper(leagues=1, players=300)
+    synthetic.set_week(4)
+    stand_in = StandInSleeper()
+    synthetic.register(stand_in)
+    stand_in.install()
+    cache = DiskCache(str(tmp_path))
+    league_id = next(iter(synthetic.leagues))
+    try:
+        from sleeper_wrapper import League
+        league = League(league_id)
+        rules = ScoringRules(SCORING_SETTINGS)
+        for _ in range(2):
+            picks = draft.fetch_draft_picks(league, cache)
+            points = draft.season_points(SeasonAccumulators(cache), rules, None, 2022, 4)
+    finally:
+        stand_in.uninstall()
+
+    assert len(picks) == 12 * 16
+    assert stand_in.requests["draft/*/picks"] == 1
+    # weeks 1 and 2 are final after the first run; week 3 may still see stat corrections
+    assert stand_in.requests["stats/nfl/regular/*/*"] == 3 + 1
+    expected = sum(rules.score(synthetic.week_stats[week].get(picks[0]["player_id"])) for week in (1, 2, 3))
+    assert abs(points[picks[0]["player_id"]] - expected) < 1e-6
+    # undrafted players count too, since they set the replacement level
+    assert set(points) > {pick["player_id"] for pick in picks}
+
+    index = LeagueIndex.from_json(synthetic.leagues[league_id]["users"], synthetic.leagues[league_id]["rosters"])
+    values = draft.expected_values(rules, {}, points, 4)
+    positions = {player_id: player["position"] for player_id, player in synthetic.players.items()}
+    replacement = draft.replacement_levels(values, positions, draft.starters_per_position(ROSTER_POSITIONS), 12)
+    message = draft.get_draft_report_string(draft.DraftReportCard(picks, values, positions, replacement), index,
+                                            synthetic.players)
+    assert "*Steals*" in message and message.count("Team 0-") == 12
@@ -0,0 +1,48 @@
+import threading
+import time
+from sleeper_ff_bot import executor
+
+
+def wait_for(condition, timeout=5):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_live_jobs_do_not_wait_behind_reports():
+    """
+    Tests that a live job runs while every other worker is busy with a report
+    :return:
+    """
+    job_executor = executor.JobExecutor(workers=2)
+    release = threading.Event()
+    ran = []
+
+    job_executor.submit("report_1", release.wait, (5,))
+    job_executor.submit("report_2", release.wait, (5,))
+    job_executor.submit("transactions", ran.append, ("transactions",), executor.PRIORITY_LIVE)
+
+    assert wait_for(lambda: ran == ["transactions"])
+    release.set()
+    assert wait_for(lambda: job_executor.stats().get("report_2", {}).get("runs") == 1)
+
+
+def test_overlapping_runs_are_skipped():
+    job_executor = executor.JobExecutor(workers=2)
+    release = threading.Event()
+
+    assert job_executor.submit("highlights", release.wait, (5,))
+    assert not job_executor.submit("highlights", release.wait, (5,))
+    release.set()
+    assert wait_for(lambda: "highlights" in job_executor.stats())
+    assert job_executor.stats()["highlights"]["skipped"] == 1
+
+
+def test_a_single_worker_runs_reports():
+    job_executor = executor.JobExecutor(workers=1)
+    ran = []
+
+    job_executor.submit("report", ran.append, ("report",))
+    job_executor.submit("transactions", ran.append, ("transactions",), executor.PRIORITY_LIVE)
+    assert wait_for(lambda: sorted(ran) == ["report", "transactions"])
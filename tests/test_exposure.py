@@ -0,0 +1,38 @@
+from sleeper_ff_bot import exposure
+
+PLAYERS = {
+    "4034": {"first_name": "Christian", "last_name": "McCaffrey", "position": "RB", "team": "SF", "injury_status": None},
+    "6794": {"first_name": "Justin", "last_name": "Jefferson", "position": "WR", "team": "MIN", "injury_status": "Out"},
+}
+
+
+def test_exposure_index_updates_incrementally():
+    """
+    Tests that replacing one league's rosters only moves the players that changed
+    :return:
+    """
+    index = exposure.ExposureIndex("me")
+    index.update_league("1", [{"roster_id": 1, "owner_id": "me", "players": ["4034", "6794"], "starters": ["4034"]},
+                              {"roster_id": 2, "owner_id": "you", "players": ["4881"]}], "League One")
+    index.update_league("2", [{"roster_id": 5, "owner_id": "me", "players": ["4034"], "starters": ["4034"]}])
+
+    assert index.holders("4034") == {("1", 1), ("2", 5)}
+    assert index.my_exposure()[0] == ("4034", 2)
+
+    index.update_league("1", [{"roster_id": 1, "owner_id": "me", "players": ["6794"], "starters": ["6794"]},
+                              {"roster_id": 2, "owner_id": "you", "players": ["4881", "4034"]}])
+
+    assert index.holders("4034") == {("1", 2), ("2", 5)}
+    assert sorted(index.my_leagues_with("4034")) == ["2"]
+
+
+def test_my_starters_at_risk():
+    index = exposure.ExposureIndex("me")
+    index.update_league("1", [{"roster_id": 1, "owner_id": "me", "players": ["4034", "6794"],
+                               "starters": ["4034", "6794"]}], "League One")
+
+    at_risk = index.my_starters_at_risk(PLAYERS, 2022, 9)
+    assert at_risk == {"4034": ("on bye", ["1"]), "6794": ("Out", ["1"])}
+    assert "Justin Jefferson (Out) in League One" in exposure.get_exposure_string(index, PLAYERS, 2022, 9)
+    # no bye weeks are known for the season, so none are guessed from another
+    assert index.my_starters_at_risk(PLAYERS, 2031, 9) == {"6794": ("Out", ["1"])}
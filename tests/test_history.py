@@ -0,0 +1,54 @@
+from sleeper_ff_bot import history
+from sleeper_ff_bot.cache import DiskCache
+from sleeper_wrapper.testing import StandInSleeper
+
+SEASON = {
+    "league": {"league_id": "100", "season": "2021", "status": "complete", "settings": {"last_scored_leg": 2}},
+    "users": [{"user_id": "a", "display_name": "alpha"}, {"user_id": "b", "display_name": "beta"}],
+    "rosters": [{"roster_id": 1, "owner_id": "a"}, {"roster_id": 2, "owner_id": "b"}],
+    "winners_bracket": [{"r": 1, "m": 1, "t1": 1, "t2": 2, "w": 2, "l": 1, "p": 1}],
+    "losers_bracket": [],
+    "matchups": {
+        1: [{"matchup_id": 1, "roster_id": 1, "points": 150.5}, {"matchup_id": 1, "roster_id": 2, "points": 90.0}],
+        2: [{"matchup_id": 1, "roster_id": 1, "points": 100.0}, {"matchup_id": 1, "roster_id": 2, "points": 110.0}],
+    },
+}
+
+
+def test_league_history():
+    """
+    Tests the head to head records, champions and record book
+    :return:
+    """
+    league_history = history.LeagueHistory([SEASON])
+
+    assert league_history.head_to_head()[("a", "b")] == [1, 1, 0]
+    assert league_history.champions() == [("2021", "b")]
+    records = league_history.record_book()
+    assert records["highest_score"] == (150.5, "2021", 1, "a")
+    assert records["biggest_blowout"] == (60.5, "2021", 1, "a", "b")
+    assert "alpha over beta by 60.50" in history.get_all_time_string(league_history)
+
+
+def test_finished_season_is_served_from_cache(tmp_path):
+    """
+    Tests that a finished season is fetched once, then read back from the cache without calling Sleeper
+    :return:
+    """
+    stand_in = StandInSleeper()
+    stand_in.route(r"league/100/(users|rosters|winners_bracket|losers_bracket)",
+                   lambda match, query: SEASON[match.group(1)])
+    stand_in.route(r"league/100/matchups/(\d+)", lambda match, query: SEASON["matchups"][int(match.group(1))])
+    stand_in.install()
+    cache = DiskCache(str(tmp_path))
+    try:
+        fetched = history.fetch_season(SEASON["league"], cache)
+        calls = sum(stand_in.requests.values())
+        cached = history.fetch_season(SEASON["league"], cache)
+    finally:
+        stand_in.uninstall()
+
+    assert fetched == SEASON
+    assert calls == 6
+    assert cached == SEASON
+    assert sum(stand_in.requests.values()) == calls
@@ -0,0 +1,70 @@
+from sleeper_ff_bot import history, interactions
+from sleeper_wrapper import LeagueIndex
+
+PLAYERS = {
+    "4034": {"first_name": "Christian", "last_name": "McCaffrey", "position": "RB", "team": "SF", "injury_status": None},
+    "6794": {"first_name": "Justin", "last_name": "Jefferson", "position": "WR", "team": "MIN", "injury_status": "Q"},
+    "4881": {"first_name": "Lamar", "last_name": "Jackson", "position": "QB", "team": "BAL", "injury_status": None},
+}
+
+
+def make_client():
+    store = interactions.WarmStore()
+    store.update_players(PLAYERS)
+    index = LeagueIndex.from_json([{"user_id": "1", "display_name": "alpha"}, {"user_id": "2", "display_name": "beta"}],
+                                  [{"roster_id": 1, "owner_id": "1", "players": ["4034"]},
+                                   {"roster_id": 2, "owner_id": "2", "players": ["6794"]}])
+    scoreboards = {1: [("alpha", 101.5, 110.0, 10.0), ("beta", 99.25, 95.0, 0.0)]}
+    standings = [("alpha", "3", "1", "500"), ("beta", "1", "3", "400")]
+    store.update_league("1", 4, index, scoreboards, standings)
+    return interactions.LocalClient(interactions.InteractionHandler(store, "1"))
+
+
+def test_player_name_index():
+    """
+    Tests prefix lookups on full and last names
+    :return:
+    """
+    names = interactions.PlayerNameIndex(PLAYERS)
+    # the shortest matching name first: "jackson", then "jefferson"
+    assert names.search("J") == ["4881", "6794"]
+    assert names.search("christian mc") == ["4034"]
+    assert names.search("mcc") == ["4034"]
+    assert names.search("zzz") == []
+
+
+def test_slash_commands():
+    client = make_client()
+    assert "**alpha** 101.50 (110.00)" in client.command("scores")
+    assert "**2. beta** (1-3)" in client.command("standings")
+    assert "**beta** 99.25" in client.command("matchup", team="BET")
+    assert "Lamar Jackson** (QB BAL) - free agent" in client.command("player", name="lamar")
+    assert "Justin Jefferson** (WR MIN) - Q - beta" in client.command("player", name="jefferson")
+    assert client.percentile(99) < 0.05
+
+
+SEASON = {
+    "league": {"league_id": "100", "season": "2021"},
+    "users": [{"user_id": "1", "display_name": "alpha"}, {"user_id": "2", "display_name": "beta"}],
+    "rosters": [{"roster_id": 1, "owner_id": "1"}, {"roster_id": 2, "owner_id": "2"}],
+    "winners_bracket": [{"r": 1, "m": 1, "t1": 1, "t2": 2, "w": 2, "l": 1, "p": 1}],
+    "losers_bracket": [],
+    "matchups": {
+        1: [{"matchup_id": 1, "roster_id": 1, "points": 150.5}, {"matchup_id": 1, "roster_id": 2, "points": 90.0}],
+        2: [{"matchup_id": 1, "roster_id": 1, "points": 100.0}, {"matchup_id": 1, "roster_id": 2, "points": 110.0}],
+    },
+}
+
+
+def test_history_command():
+    client = make_client()
+    assert "still loading" in client.command("history")
+    client.handler.store.update_history("1", history.LeagueHistory([SEASON]))
+    assert "2021 beta" in client.command("history")
+    assert client.command("history", team="alp") == "**alpha** vs. **beta** all-time: 1-1\n"
+    assert "No team found" in client.command("history", team="gamma")
+
+
+def test_ping():
+    handler = interactions.InteractionHandler(interactions.WarmStore(), "1")
+    assert handler.handle({"type": interactions.PING}) == {"type": interactions.PONG}
@@ -0,0 +1,80 @@
+import datetime as dt
+
+from sleeper_ff_bot import lineups
+from sleeper_wrapper import League
+
+PLAYERS = {
+    "1": {"first_name": "Healthy", "last_name": "Back", "team": "KC", "injury_status": None},
+    "2": {"first_name": "Hurt", "last_name": "Receiver", "team": "KC", "injury_status": "Out"},
+    "3": {"first_name": "Resting", "last_name": "End", "team": "DET", "injury_status": None},
+}
+LEAGUE = {"league_id": "1", "roster_positions": ["RB", "WR", "TE", "FLEX", "BN"]}
+
+
+def roster(roster_id, starters):
+    return {"roster_id": roster_id, "owner_id": str(roster_id), "players": list(starters), "starters": starters}
+
+
+def test_kickoff_ahead():
+    # Sunday 2022-09-11
+    assert lineups.kickoff_ahead(dt.datetime(2022, 9, 11, 16, 0))
+    assert not lineups.kickoff_ahead(dt.datetime(2022, 9, 11, 10, 0))
+    # Thursday night game kicks off just after midnight UTC
+    assert lineups.kickoff_ahead(dt.datetime(2022, 9, 15, 23, 0))
+    # Thursday night kicks off at 20:15 Eastern, 01:15 UTC once daylight saving time ends
+    assert lineups.kickoff_ahead(dt.datetime(2022, 11, 18, 0, 30))
+
+
+def test_alerts_once_per_team_and_skips_unchanged_rosters():
+    league = League("1", LEAGUE)
+    watcher = lineups.LineupWatcher()
+    rosters = [roster(1, ["1", "2", "3", "0"]), roster(2, ["1", "1", "1", "1"])]
+
+    alerts = watcher.check(league, rosters, PLAYERS, 2022, 6)
+    assert alerts == {1: [("FLEX", None, "empty"), ("TE", "3", "on bye"), ("WR", "2", "Out")]}
+    assert watcher.checked == 2
+
+    # nothing changed: no roster is looked at again and nothing is resent
+    assert watcher.check(league, rosters, PLAYERS, 2022, 6) == {}
+    assert watcher.checked == 2
+
+    # filling the empty slot is no new problem; benching the hurt receiver for another hurt player is
+    rosters[0] = roster(1, ["1", "2", "3", "1"])
+    assert watcher.check(league, rosters, PLAYERS, 2022, 6) == {}
+    players = dict(PLAYERS, **{"4": {"first_name": "Also", "last_name": "Hurt", "team": "KC", "injury_status": "IR"}})
+    watcher.statuses.max_age = 0
+    rosters[0] = roster(1, ["1", "4", "3", "1"])
+    assert watcher.check(league, rosters, players, 2022, 6) == {1: [("TE", "3", "on bye"), ("WR", "4", "IR")]}
+    assert watcher.checked == 2 + 1 + 2
+
+
+def test_unchanged_rosters_are_rechecked_on_status_changes():
+    league = League("1", LEAGUE)
+    watcher = lineups.LineupWatcher()
+    watcher.statuses.max_age = 0
+    assert watcher.check(league, [roster(1, ["1", "1", "1", "1"])], PLAYERS, 2022, 6) == {}
+
+    # the rosters came back unchanged, but the starting back was ruled out since
+    players = dict(PLAYERS, **{"1": dict(PLAYERS["1"], injury_status="Out")})
+    alerts = watcher.check(league, None, players, 2022, 6)
+    assert alerts == {1: [("FLEX", "1", "Out"), ("RB", "1", "Out"), ("TE", "1", "Out"), ("WR", "1", "Out")]}
+
+
+def test_problems_that_persist_are_alerted_again_the_next_week():
+    league = League("1", LEAGUE)
+    watcher = lineups.LineupWatcher()
+    players = dict(PLAYERS, **{"4": {"first_name": "Also", "last_name": "Hurt", "team": "KC", "injury_status": "IR"}})
+    rosters = [roster(1, ["1", "4", "1", "1"])]
+    assert watcher.check(league, rosters, players, 2022, 6) == {1: [("WR", "4", "IR")]}
+    assert watcher.check(league, rosters, players, 2022, 6) == {}
+    assert watcher.check(league, None, players, 2022, 7) == {1: [("WR", "4", "IR")]}
+
+
+def test_empty_roster_spots():
+    league = League("1", LEAGUE)
+    assert league.empty_roster_spots([roster(1, ["1", "0"]), roster(2, ["1", "2", "3", "1"])]) == {1: ["WR", "TE", "FLEX"]}
+
+
+def test_alert_message():
+    message = lineups.get_lineup_alert_string("alpha", [("FLEX", None, "empty"), ("WR", "2", "Out")], PLAYERS)
+    assert message == "**Lineup alert: alpha**\nFLEX: empty\nWR: Hurt Receiver (KC) Out"
@@ -0,0 +1,21 @@
+from sleeper_ff_bot import loadtest
+
+
+def test_small_soak_run(tmp_path, monkeypatch):
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path))
+    results = loadtest.run(leagues=1, weeks=1, workers=2, polls_per_week=2, players=250)
+
+    assert results["messages"] > 0
+    assert results["jobs"]["transactions"]["runs"] == 2
+    assert results["requests"]["league/*/rosters"] > 0
+    assert len(results["memory"]) == 1
+
+
+def test_synthetic_matchups_pair_every_team():
+    synthetic = loadtest.SyntheticSleeper(leagues=1, players=250)
+    synthetic.set_week(3)
+    league_id = next(iter(synthetic.leagues))
+    matchups = synthetic.matchups(league_id, 3)
+
+    assert sorted(m["roster_id"] for m in matchups) == list(range(1, 13))
+    assert len({m["matchup_id"] for m in matchups}) == 6
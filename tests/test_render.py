@@ -0,0 +1,54 @@
+import pytest
+
+from sleeper_ff_bot import render
+from sleeper_ff_bot.loadtest import SyntheticSleeper
+from sleeper_wrapper.testing import StandInSleeper
+
+
+def test_parse_weeks():
+    assert render.parse_weeks("3") == [3]
+    assert render.parse_weeks("1-4,9") == [1, 2, 3, 4, 9]
+    assert render.parse_weeks("2-3, 3-4") == [2, 3, 4]
+
+
+def test_renders_every_week_from_one_response_cache(tmp_path):
+    import bot
+    synthetic = SyntheticSleeper(leagues=2, teams=4, players=100)
+    synthetic.set_week(3)
+    stand_in = StandInSleeper()
+    synthetic.register(stand_in)
+    stand_in.install()
+    league_ids = sorted(synthetic.leagues)
+    reports = ["scores", "standings", "highlights", "close_games", "bracket"]
+    try:
+        bot._state = None
+        bot._leagues.invalidate()
+        summary = render.render(league_ids, [1, 2], reports, str(tmp_path / "out"), cache_dir=str(tmp_path / "cache"))
+        first = sum(stand_in.requests.values())
+        assert first > 0
+
+        # a second run from the same cache makes no calls at all
+        bot._state = None
+        bot._leagues.invalidate()
+        again = render.render(league_ids, [1, 2], reports, str(tmp_path / "again"), cache_dir=str(tmp_path / "cache"))
+    finally:
+        stand_in.uninstall()
+
+    assert summary["failed"] == []
+    # no bracket before the playoffs
+    assert summary["rendered"] == 2 * 2 * 4 and summary["empty"] == 2 * 2
+    scores = (tmp_path / "out" / league_ids[0] / "1" / "scores.md").read_text()
+    assert "*Matchup 2*" in scores
+    assert not (tmp_path / "out" / league_ids[0] / "1" / "bracket.md").exists()
+    # standings as they were after each week, not the season's latest
+    standings = (tmp_path / "out" / league_ids[0] / "1" / "standings.md").read_text()
+    assert standings.count("(1-0)") == 2 and standings.count("(0-1)") == 2
+    assert sum(stand_in.requests.values()) == first
+    assert again == summary
+    assert (tmp_path / "again" / league_ids[1] / "2" / "highlights.md").read_text() == \
+        (tmp_path / "out" / league_ids[1] / "2" / "highlights.md").read_text()
+
+
+def test_unknown_reports_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        render.render(["1"], [1], ["recap"], cache_dir=str(tmp_path))
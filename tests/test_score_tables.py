@@ -0,0 +1,83 @@
+import requests
+
+from sleeper_ff_bot.cache import DiskCache
+from sleeper_ff_bot.score_tables import ScoreTables
+from sleeper_wrapper import ScoringRules
+from sleeper_wrapper.testing import StandInSleeper
+
+PPR = {"rec": 1, "rec_yd": 0.1, "rec_td": 6}
+
+
+def serve(week_stats):
+    stand_in = StandInSleeper()
+    stand_in.route(r"stats/nfl/regular/(\d+)/(\d+)", lambda match, query: week_stats)
+    stand_in.install()
+    return stand_in
+
+
+def count_scoring(monkeypatch):
+    scored = []
+    score_all = ScoringRules.score_all
+
+    def counting(rules, week_stats, player_ids=None):
+        scored.append(rules.key)
+        return score_all(rules, week_stats, player_ids)
+    monkeypatch.setattr(ScoringRules, "score_all", counting)
+    return scored
+
+
+def test_leagues_with_the_same_scoring_share_a_table(tmp_path, monkeypatch):
+    scored = count_scoring(monkeypatch)
+    week_stats = {"1": {"rec": 5, "rec_yd": 60}, "2": {"rec": 2, "rec_yd": 10, "rec_td": 1}}
+    stand_in = serve(week_stats)
+    tables = ScoreTables(DiskCache(str(tmp_path)))
+    try:
+        first = tables.get(ScoringRules(PPR), 2031, 5)
+        # the same rules in another order, with a zero weight: the same table, neither parsed nor scored again
+        second = tables.get(ScoringRules({"rec_td": 6, "pass_td": 0, "rec_yd": 0.1, "rec": 1}), 2031, 5)
+        assert second is first
+        assert first == {"1": 11.0, "2": 9.0}
+        assert len(scored) == 1 and stand_in.not_modified["stats/nfl/regular/*/*"] == 1
+
+        # another scoring system is scored from the stats already held
+        half = tables.get(ScoringRules(dict(PPR, rec=0.5)), 2031, 5)
+        assert half["1"] == 8.5
+        assert stand_in.not_modified["stats/nfl/regular/*/*"] == 2
+
+        # a stat correction is a new version of the week, so the table is rescored
+        week_stats["1"]["rec_td"] = 1
+        assert tables.get(ScoringRules(PPR), 2031, 5)["1"] == 17.0
+        assert len(scored) == 3
+    finally:
+        stand_in.uninstall()
+
+
+def test_final_weeks_are_persisted(tmp_path):
+    stand_in = serve({"1": {"rec": 3}})
+    try:
+        assert ScoreTables(DiskCache(str(tmp_path))).get(ScoringRules(PPR), 2032, 2, final=True) == {"1": 3.0}
+        restarted = ScoreTables(DiskCache(str(tmp_path)))
+        assert restarted.get(ScoringRules(PPR), 2032, 2, final=True) == {"1": 3.0}
+        assert restarted.get(ScoringRules(PPR), 2032, 2, final=True) == {"1": 3.0}
+    finally:
+        stand_in.uninstall()
+    assert stand_in.requests["stats/nfl/regular/*/*"] == 1
+
+
+def test_outages_are_answered_from_the_tables_own_copy(tmp_path):
+    week_stats = {"1": {"rec": 3}}
+    stand_in = StandInSleeper()
+
+    def respond(match, query):
+        if week_stats is None:
+            raise requests.ConnectionError("Sleeper is down")
+        return week_stats
+    stand_in.route(r"stats/nfl/regular/(\d+)/(\d+)", respond)
+    stand_in.install()
+    tables = ScoreTables(DiskCache(str(tmp_path)))
+    try:
+        assert tables.get(ScoringRules(PPR), 2033, 4) == {"1": 3.0}
+        week_stats = None
+        assert tables.get(ScoringRules(dict(PPR, rec=0.5)), 2033, 4) == {"1": 1.5}
+    finally:
+        stand_in.uninstall()
@@ -0,0 +1,110 @@
+import os
+import time
+
+from sleeper_ff_bot.cache import DiskCache
+from sleeper_ff_bot.shards import HashRing, SharedResponses
+from sleeper_wrapper import Stats
+from sleeper_wrapper.base_api import set_response_store
+from sleeper_wrapper.testing import StandInSleeper
+
+LEAGUES = [str(900000000000000000 + i) for i in range(300)]
+
+
+def test_adding_a_node_only_moves_its_share():
+    ring = HashRing(["worker-0", "worker-1", "worker-2"])
+    before = {league: ring.node_for(league) for league in LEAGUES}
+    assert all(len(leagues) > 50 for leagues in ring.assign(LEAGUES).values())
+
+    ring.add("worker-3")
+    after = {league: ring.node_for(league) for league in LEAGUES}
+    moved = [league for league in LEAGUES if before[league] != after[league]]
+    assert all(after[league] == "worker-3" for league in moved)
+    assert 30 < len(moved) < 120
+
+    ring.remove("worker-3")
+    assert {league: ring.node_for(league) for league in LEAGUES} == before
+
+
+def test_workers_read_what_the_coordinator_publishes(tmp_path):
+    stand_in = StandInSleeper()
+    stand_in.route(r"stats/nfl/regular/(\d+)/(\d+)", lambda match, query: {"4034": {"pts_ppr": 20.5}})
+    stand_in.install()
+    cache = DiskCache(str(tmp_path))
+    try:
+        set_response_store(SharedResponses(cache, publish=True))
+        Stats().get_week_stats("regular", 2022, 3)
+        set_response_store(SharedResponses(cache))
+        assert Stats().get_week_stats("regular", 2022, 3) == {"4034": {"pts_ppr": 20.5}}
+        assert Stats().get_week_stats("regular", 2022, 3) == {"4034": {"pts_ppr": 20.5}}
+        assert stand_in.requests["stats/nfl/regular/*/*"] == 1
+
+        # a response the coordinator stopped refreshing is fetched again
+        key = "shared/https://api.sleeper.app/v1/stats/nfl/regular/2022/3"
+        os.utime(cache._path(key), (time.time() - 3600, time.time() - 3600))
+        Stats().get_week_stats("regular", 2022, 3)
+        assert stand_in.requests["stats/nfl/regular/*/*"] == 2
+    finally:
+        set_response_store(None)
+        stand_in.uninstall()
+
+
+def test_rebalance_restarts_only_changed_workers(monkeypatch, tmp_path):
+    from sleeper_ff_bot.shards import Coordinator
+    started = []
+    monkeypatch.setattr(Coordinator, "_start", lambda self, name, transaction_cursors=None: started.append(name))
+    monkeypatch.setattr(Coordinator, "_stop", lambda self, name: None)
+    coordinator = Coordinator({league: "webhook" for league in LEAGUES}, 3, str(tmp_path))
+    assert coordinator.rebalance() == ["worker-0", "worker-1", "worker-2"]
+
+    restarted = coordinator.add_worker()
+    assert "worker-3" in restarted
+    assert sum(len(leagues) for leagues in coordinator.assignments.values()) == len(LEAGUES)
+    assert coordinator.rebalance() == []
+
+
+def test_moved_leagues_take_their_transaction_cursors(monkeypatch, tmp_path):
+    from sleeper_ff_bot.shards import Coordinator, snapshot_path
+    from sleeper_ff_bot.snapshot import save_snapshot
+    monkeypatch.setenv("SNAPSHOT_DIR", str(tmp_path))
+    started = {}
+    monkeypatch.setattr(Coordinator, "_start", lambda self, name, transaction_cursors=None:
+                        started.__setitem__(name, transaction_cursors))
+    monkeypatch.setattr(Coordinator, "_stop", lambda self, name: None)
+    coordinator = Coordinator({league: "webhook" for league in LEAGUES}, 3, str(tmp_path))
+    coordinator.rebalance()
+    # every worker saves its leagues' cursors on the way out; worker-3 last ran long ago with stale ones
+    for name, leagues in coordinator.assignments.items():
+        save_snapshot(snapshot_path(name), {"transaction_cursors": {league: 1000 + LEAGUES.index(league)
+                                                                    for league in leagues}})
+    save_snapshot(snapshot_path("worker-3"), {"transaction_cursors": {league: 1 for league in LEAGUES}})
+    started.clear()
+
+    coordinator.add_worker()
+    assert coordinator.assignments["worker-3"]
+    for name, cursors in started.items():
+        assert cursors == {league: 1000 + LEAGUES.index(league) for league in coordinator.assignments[name]}
+
+
+def test_a_worker_that_ignores_sigterm_is_killed_before_its_replacement_starts(monkeypatch, tmp_path):
+    from sleeper_ff_bot import shards
+
+    class StuckProcess:
+        pid = 4242
+        killed = False
+
+        def terminate(self):
+            pass
+
+        def join(self, timeout=None):
+            pass
+
+        def is_alive(self):
+            return not self.killed
+
+    process = StuckProcess()
+    monkeypatch.setattr(shards.os, "kill",
+                        lambda pid, signum: setattr(process, "killed", signum == shards.signal.SIGKILL))
+    coordinator = shards.Coordinator({}, 1, str(tmp_path))
+    coordinator.processes["worker-0"] = process
+    coordinator._stop("worker-0")
+    assert process.killed and "worker-0" not in coordinator.processes
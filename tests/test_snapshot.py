@@ -0,0 +1,41 @@
+from sleeper_ff_bot import snapshot
+
+
+def test_save_and_load_snapshot(tmp_path):
+    """
+    Tests that a snapshot round trips and that players are compacted
+    :return:
+    """
+    path = str(tmp_path / "snapshot.bin")
+    players = snapshot.compact_players({"4034": {"first_name": "Christian", "last_name": "McCaffrey",
+                                                 "position": "RB", "college": "Stanford"}})
+    snapshot.save_snapshot(path, {"players": players, "transaction_cursors": {"1": 10}})
+    loaded = snapshot.load_snapshot(path)
+
+    assert loaded["players"]["4034"]["last_name"] == "McCaffrey"
+    assert "college" not in loaded["players"]["4034"]
+    assert loaded["transaction_cursors"] == {"1": 10}
+
+
+def test_load_missing_snapshot(tmp_path):
+    """
+    Tests that a missing or corrupt snapshot is ignored
+    :return:
+    """
+    assert snapshot.load_snapshot(str(tmp_path / "missing.bin")) is None
+    corrupt = tmp_path / "corrupt.bin"
+    corrupt.write_bytes(b"not a snapshot")
+    assert snapshot.load_snapshot(str(corrupt)) is None
+
+
+def test_concurrent_saves_use_their_own_temp_files(tmp_path):
+    import threading
+    path = str(tmp_path / "snapshot.bin")
+    threads = [threading.Thread(target=snapshot.save_snapshot, args=(path, {"transaction_cursors": {"1": i}}))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert snapshot.load_snapshot(path)["transaction_cursors"]["1"] in range(8)
+    assert [p.name for p in tmp_path.iterdir()] == ["snapshot.bin"]
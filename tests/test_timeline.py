@@ -0,0 +1,118 @@
+import datetime as dt
+
+from sleeper_ff_bot import timeline
+from sleeper_ff_bot.cache import DiskCache
+from sleeper_ff_bot.loadtest import SyntheticSleeper
+from sleeper_ff_bot.score_tables import ScoreTables
+from sleeper_wrapper.testing import StandInSleeper
+
+# Sunday 2022-09-11 17:00 UTC, when the afternoon games kick off
+SUNDAY = dt.datetime(2022, 9, 11, 17, 0).replace(tzinfo=dt.timezone.utc).timestamp()
+
+
+def scoreboards(first, second, first_projected=100.0, second_projected=100.0, first_left=0.0, second_left=0.0):
+    return {1: [("Alpha", first, first_projected, first_left), ("Beta", second, second_projected, second_left)]}
+
+
+def test_in_game_window():
+    # Sunday 2022-09-11, afternoon games kick off at 17:00 UTC
+    assert timeline.in_game_window(dt.datetime(2022, 9, 11, 18, 30))
+    assert not timeline.in_game_window(dt.datetime(2022, 9, 11, 12, 0))
+    # Monday night runs past midnight UTC into Tuesday
+    assert timeline.in_game_window(dt.datetime(2022, 9, 13, 2, 0))
+    assert not timeline.in_game_window(dt.datetime(2022, 9, 14, 2, 0))
+    # kickoffs are Eastern time, an hour later in UTC once daylight saving time ends: Sunday night 20:20 EST
+    assert timeline.in_game_window(dt.datetime(2022, 11, 14, 4, 50))
+    assert not timeline.in_game_window(dt.datetime(2022, 11, 13, 14, 0))  # London kicks off at 14:30
+
+
+def test_remaining_share():
+    assert timeline.remaining_share(dt.datetime(2022, 9, 8, 12, 0)) == 1.0
+    # Thursday night and London are over, the seven afternoon games are an eighth played
+    assert timeline.remaining_share(dt.datetime(2022, 9, 11, 17, 30)) == (7 * 7 / 8 + 2 + 2 + 1 + 1) / 15
+    assert timeline.remaining_share(dt.datetime(2022, 9, 13, 8, 0)) == 0.0
+    # Tuesday morning starts the next week
+    assert timeline.remaining_share(dt.datetime(2022, 9, 13, 10, 0)) == 1.0
+    # in November the afternoon games kick off at 18:00 UTC
+    assert timeline.remaining_share(dt.datetime(2022, 11, 13, 18, 30)) == (7 * 7 / 8 + 2 + 2 + 1 + 1) / 15
+
+
+def test_win_probability():
+    assert timeline.win_probability(50, 50, 50, 50) == 0.5
+    assert timeline.win_probability(90, 50, 50, 50) > 0.9
+    assert timeline.win_probability(90, 50, 50, 75) < timeline.win_probability(90, 50, 50, 50)
+    # a team whose starters have all played cannot add to its score, however far the rest of the league is
+    assert timeline.win_probability(90, 0, 50, 60) < 0.5
+    # nothing left to play: the leader has won
+    assert timeline.win_probability(101, 0, 100, 0) == 1.0
+    assert timeline.win_probability(99, 0, 100, 0) == 0.0
+
+
+def test_ring_buffer_keeps_the_newest_samples_and_the_extremes():
+    matchup = timeline.MatchupTimeline(("Alpha", "Beta"), capacity=4)
+    assert matchup.record((0, 0), (100, 100), (100, 100), at=SUNDAY)
+    # an unchanged sample takes no room
+    assert not matchup.record((0, 0), (100, 100), (100, 100), at=SUNDAY + 60)
+    matchup.record((40, 0), (100, 100), (60, 60), at=SUNDAY + 120)
+    for minute in range(3, 10):
+        matchup.record((40, 5 * minute), (100, 130), (0, 130 - 5 * minute), at=SUNDAY + 60 * minute)
+
+    samples = matchup.samples()
+    assert [at for at, _, _ in samples] == [SUNDAY + 60 * minute for minute in (6, 7, 8, 9)]
+    assert samples[-1][1] == (40.0, 45.0)
+    assert matchup.nbytes() < 4096
+
+    summary = matchup.summary()
+    assert summary["winner"] == "Beta"
+    assert summary["lead_blown"] == 40.0
+    assert summary["comeback_win_probability"] < 0.2
+
+
+def test_score_timelines_by_league_and_week():
+    timelines = timeline.ScoreTimelines(capacity=8, weeks_kept=2)
+    assert timelines.record("1", 3, scoreboards(10, 0), at=SUNDAY) == 1
+    # Sleeper may list the teams the other way round
+    assert timelines.record("1", 3, {1: [("Beta", 30, 100, 70), ("Alpha", 12, 100, 88)]}, at=SUNDAY + 60) == 1
+    assert timelines.get("1", 3)[1].last()[1] == (12.0, 30.0)
+
+    timelines.record("1", 4, scoreboards(0, 0), at=SUNDAY + 120)
+    timelines.record("1", 5, scoreboards(0, 0), at=SUNDAY + 180)
+    assert timelines.get("1", 3) == {}
+    assert set(timelines.get("1", 5)) == {1}
+
+    summaries = timelines.week_summary("1", 5)
+    assert summaries[0]["lead_blown"] == 0
+    assert "led from start to finish" in timeline.get_comebacks_string(summaries, 5)
+
+
+def test_comebacks_message():
+    timelines = timeline.ScoreTimelines()
+    timelines.record("1", 1, scoreboards(30, 0, 100, 120, 70, 120), at=SUNDAY)
+    timelines.record("1", 1, scoreboards(100, 110, 100, 120), at=SUNDAY + 86400)
+    message = timeline.get_comebacks_string(timelines.week_summary("1", 1), 1)
+    assert "**Beta** beat Alpha 110.00 to 100.00, after trailing by 30.00" in message
+
+
+def test_sampling_downloads_the_week_once_for_every_team(tmp_path, monkeypatch):
+    from sleeper_ff_bot import bot
+    synthetic = SyntheticSleeper(leagues=1, teams=12, players=250)
+    synthetic.set_week(3)
+    stand_in = StandInSleeper()
+    synthetic.register(stand_in)
+    monkeypatch.setattr(bot, "in_game_window", lambda now: True)
+    monkeypatch.setattr(bot, "_state", None)
+    monkeypatch.setattr(bot, "_score_tables", ScoreTables(DiskCache(str(tmp_path))))
+    monkeypatch.setattr(bot, "_projection_tables", ScoreTables(DiskCache(str(tmp_path)), projections=True))
+    monkeypatch.setattr(bot, "_timelines", timeline.ScoreTimelines())
+    league_id = next(iter(synthetic.leagues))
+    stand_in.install()
+    try:
+        for _ in range(2):
+            bot.sample_scores(league_id)
+    finally:
+        stand_in.uninstall()
+
+    assert len(bot._timelines.get(league_id, 3)) == 6
+    for family in ("stats/nfl/regular/*/*", "projections/nfl/regular/*/*"):
+        # later samples only revalidate the payload, which is then neither parsed nor scored again
+        assert stand_in.requests[family] - stand_in.not_modified[family] == 1
@@ -0,0 +1,66 @@
+import json
+from sleeper_ff_bot import tracing
+
+
+def test_spans_are_exported_as_one_trace(tmp_path):
+    """
+    Tests that a job span, a builder span and an API call end up in one trace
+    :return:
+    """
+    path = str(tmp_path / "traces.jsonl")
+    tracer = tracing.Tracer(tracing.JsonlExporter(path))
+
+    @tracer.traced()
+    def get_scores_string():
+        tracer.record_call("https://api.sleeper.app/v1/state/nfl", 200, 512, 0.05, False)
+        return "scores"
+
+    with tracer.span("job:scores"):
+        assert get_scores_string() == "scores"
+
+    with open(path) as f:
+        spans = {span["name"]: span for span in map(json.loads, f)}
+    assert set(spans) == {"job:scores", "get_scores_string", "http"}
+    assert len({span["trace_id"] for span in spans.values()}) == 1
+    assert spans["http"]["parent_id"] == spans["get_scores_string"]["span_id"]
+    assert spans["get_scores_string"]["parent_id"] == spans["job:scores"]["span_id"]
+    assert spans["http"]["attributes"]["bytes"] == 512
+
+
+def test_unsampled_traces_are_dropped(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = tracing.Tracer(tracing.JsonlExporter(str(path)), sample_rate=0)
+    with tracer.span("job:scores"):
+        with tracer.span("get_scores_string"):
+            pass
+    assert not path.exists()
+
+
+def test_disabled_tracer_spans_are_no_ops():
+    tracer = tracing.Tracer(None)
+    for _ in range(2):
+        with tracer.span("job:transactions"):
+            with tracer.span("get_scores_string"):
+                pass
+    tracer.record_call("https://api.sleeper.app/v1/state/nfl", 200, 10, 0.1, False)
+
+
+def test_pool_thread_spans_join_the_job_trace(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    path = str(tmp_path / "traces.jsonl")
+    tracer = tracing.Tracer(tracing.JsonlExporter(path))
+
+    @tracer.traced()
+    def get_matchups(week):
+        tracer.record_call("https://api.sleeper.app/v1/league/1/matchups/{}".format(week), 200, 64, 0.01, False)
+        return week
+
+    with tracer.span("job:bracket"):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            assert list(executor.map(tracer.bind(get_matchups), [15, 16])) == [15, 16]
+
+    with open(path) as f:
+        spans = list(map(json.loads, f))
+    job = next(span for span in spans if span["name"] == "job:bracket")
+    assert len(spans) == 5 and len({span["trace_id"] for span in spans}) == 1
+    assert [span["parent_id"] for span in spans if span["name"] == "get_matchups"] == [job["span_id"]] * 2
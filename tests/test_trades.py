@@ -0,0 +1,54 @@
+from sleeper_ff_bot import trades
+from sleeper_wrapper import LeagueIndex, ScoringRules, Transaction
+
+USERS = [{"user_id": str(i), "display_name": "user{}".format(i), "metadata": {"team_name": "Team {}".format(i)}}
+         for i in (1, 2)]
+ROSTERS = [{"roster_id": i, "owner_id": str(i), "players": [], "starters": []} for i in (1, 2)]
+PLAYERS = {
+    "10": {"first_name": "Star", "last_name": "Back", "position": "RB"},
+    "20": {"first_name": "Good", "last_name": "Receiver", "position": "WR"},
+    "30": {"first_name": "Deep", "last_name": "Sleeper", "position": "WR"},
+}
+TRADE = Transaction.from_json({
+    "transaction_id": "7", "type": "trade", "status": "complete", "created": 1000, "roster_ids": [1, 2],
+    "adds": {"10": 2, "20": 1, "30": 1}, "drops": {"10": 1, "20": 2, "30": 2},
+    "draft_picks": [{"season": "2023", "round": 1, "roster_id": 2, "previous_owner_id": 2, "owner_id": 1}],
+    "waiver_budget": [{"sender": 1, "receiver": 2, "amount": 15}],
+})
+
+
+def test_trade_sides():
+    sides = trades.trade_sides(TRADE)
+    assert sorted(sides[1]["players_in"]) == ["20", "30"]
+    assert sides[1]["players_out"] == ["10"]
+    assert sides[1]["picks_in"][0]["round"] == 1 and sides[2]["picks_out"] == sides[1]["picks_in"]
+    assert (sides[1]["faab"], sides[2]["faab"]) == (-15, 15)
+
+
+def test_projection_table_is_built_once_per_scoring_and_week():
+    table = trades.ProjectionTable()
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return {"10": {"rush_yd": 1800}, "20": {"rec_yd": 1200}, "30": {"rec_yd": 300}}
+
+    rules = ScoringRules({"rush_yd": 0.1, "rec_yd": 0.1})
+    values = table.get(rules, 2022, 10, fetch)
+    # nine of eighteen weeks left
+    assert values == {"10": 90.0, "20": 60.0, "30": 15.0}
+    assert table.get(ScoringRules({"rec_yd": 0.1, "rush_yd": 0.1}), 2022, 10, fetch) is values
+    assert len(fetches) == 1
+    table.get(rules, 2022, 11, fetch)
+    assert len(fetches) == 2
+
+
+def test_trade_message():
+    values = {"10": 90.0, "20": 60.0, "30": 15.0}
+    sides = trades.trade_sides(TRADE)
+    assert trades.evaluate_trade(sides, values) == {1: -15.0, 2: 15.0}
+    message = trades.get_trade_string(sides, values, LeagueIndex.from_json(USERS, ROSTERS), PLAYERS)
+    assert "**Team 1** gets:\n+ Good Receiver (WR) 60.0 pts rest of season" in message
+    assert "+ 2023 round 1 pick (Team 2)" in message
+    assert "**Team 2** gets:\n+ Star Back (RB) 90.0 pts rest of season\n+ $15 FAAB" in message
+    assert message.endswith("Rest of season: Team 1 -15.0, Team 2 +15.0")
@@ -0,0 +1,80 @@
+import time
+
+from sleeper_ff_bot import trending
+from sleeper_wrapper import LeagueIndex
+from sleeper_wrapper.testing import StandInSleeper
+
+PLAYERS = {
+    "4034": {"first_name": "Christian", "last_name": "McCaffrey", "position": "RB", "team": "SF"},
+    "6794": {"first_name": "Justin", "last_name": "Jefferson", "position": "WR", "team": "MIN"},
+}
+
+
+def test_get_waiver_buzz_string():
+    """
+    Tests that trending players are flagged as free agents or by the team rostering them
+    :return:
+    """
+    index = LeagueIndex.from_json([{"user_id": "1", "display_name": "alpha"}],
+                                  [{"roster_id": 1, "owner_id": "1", "players": ["4034"]}])
+    movers = {"add": [("6794", 900, 400)], "drop": [("4034", 50, 50)]}
+    buzz_string = trending.get_waiver_buzz_string(movers, PLAYERS, index)
+
+    assert "Justin Jefferson (WR MIN) 900 (+400) - **free agent**" in buzz_string
+    assert "Christian McCaffrey (RB SF) 50 (+50) - alpha" in buzz_string
+
+
+def test_get_waiver_buzz_string_no_movers():
+    index = LeagueIndex.from_json([], [])
+    assert trending.get_waiver_buzz_string({"add": [], "drop": []}, PLAYERS, index) is None
+
+
+def test_poll_reports_movers_since_the_last_poll():
+    """
+    Tests that a second poll only reports new players and counts that grew by min_change, and that an empty or
+    failed poll keeps the counts it would be compared with
+    :return:
+    """
+    polls = {"add": [{"player_id": "1", "count": 100}, {"player_id": "2", "count": 100}],
+             "drop": [{"player_id": "3", "count": 40}]}
+    stand_in = StandInSleeper()
+    stand_in.route(r"players/nfl/trending/(add|drop)", lambda match, query: polls[match.group(1)])
+    stand_in.install()
+    try:
+        tracker = trending.TrendingTracker(min_change=0.25)
+        first = tracker.poll()
+        assert [mover[0] for mover in first["add"]] == ["1", "2"]
+        assert first["drop"] == [("3", 40, 40)]
+
+        # player 1 grew by less than 25%, player 2 by more, player 4 is new; the drops fail
+        polls["add"] = [{"player_id": "1", "count": 120}, {"player_id": "2", "count": 130},
+                        {"player_id": "4", "count": 10}]
+        # a 404, which the client answers with an empty list
+        polls["drop"] = None
+        second = tracker.poll()
+        assert second["add"] == [("2", 130, 30), ("4", 10, 10)]
+        assert second["drop"] == []
+
+        # compared with the last drops that came through
+        polls["add"] = []
+        polls["drop"] = [{"player_id": "3", "count": 45}]
+        third = tracker.poll()
+        assert third == {"add": [], "drop": []}
+        assert tracker.to_dict()["counts"]["add"] == {"1": 120, "2": 130, "4": 10}
+    finally:
+        stand_in.uninstall()
+
+    restored = trending.TrendingTracker()
+    restored.load(tracker.to_dict())
+    assert restored.polled_at == tracker.polled_at
+    assert restored.poll_if_stale() == {"add": [], "drop": []}
+
+
+def test_hourly_runs_never_reuse_the_last_poll(monkeypatch):
+    tracker = trending.TrendingTracker()
+    polls = []
+    monkeypatch.setattr(tracker, "poll", lambda: polls.append(1) or {"add": [], "drop": []})
+    # the previous hourly run polled a little less than an hour ago, as its HTTP calls took a while
+    tracker.polled_at = time.time() - 3590
+    tracker.poll_if_stale()
+    assert polls == [1]
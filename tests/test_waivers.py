@@ -0,0 +1,53 @@
+import time
+
+from sleeper_ff_bot import waivers
+from sleeper_ff_bot.accumulators import SeasonAccumulator
+from sleeper_ff_bot.loadtest import SyntheticSleeper, SCORING_SETTINGS
+from sleeper_wrapper import LeagueIndex, ScoringRules
+
+PLAYERS = {
+    "1": {"first_name": "Starting", "last_name": "Back", "position": "RB", "team": "SF", "injury_status": None},
+    "2": {"first_name": "Free", "last_name": "Back", "position": "RB", "team": "KC", "injury_status": None},
+    "3": {"first_name": "Hurt", "last_name": "Back", "position": "RB", "team": "KC", "injury_status": "Out"},
+    "4": {"first_name": "Cut", "last_name": "Back", "position": "RB", "team": None, "injury_status": None},
+}
+RULES = ScoringRules({"rush_yd": 0.1, "rush_td": 6})
+
+
+def make_index():
+    return LeagueIndex.from_json([{"user_id": "u1", "display_name": "alpha"}],
+                                 [{"roster_id": 1, "owner_id": "u1", "players": ["1"], "starters": ["1"]}])
+
+
+def test_free_agents_skip_rostered_unsigned_and_out():
+    assert waivers.free_agents(PLAYERS, make_index()) == {"2"}
+
+
+def test_recommend_matches_free_agents_with_weak_starters():
+    projections = {"1": {"rush_yd": 40}, "2": {"rush_yd": 90, "rush_td": 1}}
+    season = SeasonAccumulator(RULES, 2022)
+    season.add_week(1, {"1": {"rush_yd": 30}, "2": {"rush_yd": 100}})
+    result = waivers.recommend(PLAYERS, make_index(), RULES, projections, season)
+
+    (player_id, value, projected, average), = result["RB"]["free_agents"]
+    assert (player_id, projected, average) == ("2", 15, 10)
+    assert result["RB"]["upgrades"][0][:2] == (1, "1")
+    message = waivers.get_waiver_wire_string(result, make_index(), PLAYERS, 4)
+    assert "Free Back (KC) 15.0 proj, 10.0 avg" in message
+    assert "alpha (+" in message
+
+
+def test_ranking_a_league_is_sub_second():
+    synthetic = SyntheticSleeper(leagues=1, players=2000)
+    synthetic.set_week(3)
+    league = next(iter(synthetic.leagues.values()))
+    index = LeagueIndex.from_json(league["users"], league["rosters"])
+    rules = ScoringRules(SCORING_SETTINGS)
+    season = SeasonAccumulator(rules, 2022)
+    for week in (1, 2, 3):
+        season.add_week(week, synthetic.week_stats[week])
+
+    start = time.perf_counter()
+    result = waivers.recommend(synthetic.players, index, rules, synthetic.week_projections[3], season)
+    assert time.perf_counter() - start < 1
+    assert set(result) == set(waivers.FANTASY_POSITIONS)